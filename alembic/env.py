@@ -7,15 +7,25 @@ from pathlib import Path
 from alembic import context
 from sqlalchemy import engine_from_config, pool
 
+from powersnitch_app.config import Settings
+from powersnitch_app.db import install_sqlite_pragmas, sqlite_pragmas
 from powersnitch_app.db_models import Base
+from powersnitch_app.partitions import is_partition
 
 config = context.config
 
 if config.config_file_name is not None:
-    fileConfig(config.config_file_name)
+    # Migrations also run inside the app; leave its loggers enabled.
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
 
 target_metadata = Base.metadata
 
+
+def include_name(name, type_, parent_names) -> bool:
+    # Monthly telemetry partitions are created and dropped at runtime.
+    return not (type_ == "table" and name is not None and is_partition(name))
+
+
 db_url = os.getenv("POWERSNITCH_SQLALCHEMY_URL")
 if not db_url:
     sqlite_path = os.getenv("POWERSNITCH_SQLITE_PATH")
@@ -28,7 +38,7 @@ if db_url:
 
 def run_migrations_offline() -> None:
     url = config.get_main_option("sqlalchemy.url")
-    context.configure(url=url, target_metadata=target_metadata, literal_binds=True)
+    context.configure(url=url, target_metadata=target_metadata, literal_binds=True, include_name=include_name)
     with context.begin_transaction():
         context.run_migrations()
 
@@ -39,8 +49,11 @@ def run_migrations_online() -> None:
         prefix="sqlalchemy.",
         poolclass=pool.NullPool,
     )
+    if connectable.dialect.name == "sqlite":
+        pragmas = config.attributes.get("sqlite_pragmas")
+        install_sqlite_pragmas(connectable, pragmas if pragmas is not None else sqlite_pragmas(Settings()))
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        context.configure(connection=connection, target_metadata=target_metadata, include_name=include_name)
         with context.begin_transaction():
             context.run_migrations()
 
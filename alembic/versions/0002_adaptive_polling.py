@@ -0,0 +1,37 @@
+"""adaptive polling bounds
+
+Revision ID: 0002_adaptive_polling
+Revises: 0001_initial_schema
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002_adaptive_polling"
+down_revision = "0001_initial_schema"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "ups_devices",
+        sa.Column("adaptive_polling", sa.Boolean(), nullable=False, server_default=sa.text("0")),
+    )
+    op.add_column(
+        "ups_devices",
+        sa.Column("min_poll_interval_seconds", sa.Float(), nullable=False, server_default="1"),
+    )
+    op.add_column(
+        "ups_devices",
+        sa.Column("max_poll_interval_seconds", sa.Float(), nullable=False, server_default="60"),
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("ups_devices") as batch_op:
+        batch_op.drop_column("max_poll_interval_seconds")
+        batch_op.drop_column("min_poll_interval_seconds")
+        batch_op.drop_column("adaptive_polling")
@@ -0,0 +1,24 @@
+"""custom rule expressions
+
+Revision ID: 0004_rule_expressions
+Revises: 0003_notification_outbox
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004_rule_expressions"
+down_revision = "0003_notification_outbox"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("alert_rules", sa.Column("expression", sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("alert_rules") as batch_op:
+        batch_op.drop_column("expression")
@@ -0,0 +1,38 @@
+"""hot table indexes
+
+Revision ID: 0005_hot_table_indexes
+Revises: 0004_rule_expressions
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005_hot_table_indexes"
+down_revision = "0004_rule_expressions"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_telemetry_samples_device_observed",
+        "telemetry_samples",
+        ["ups_device_id", "observed_at"],
+    )
+    op.create_index("ix_alert_events_occurred_at", "alert_events", ["occurred_at"])
+    op.create_index(
+        "ix_alert_events_failed",
+        "alert_events",
+        ["occurred_at"],
+        sqlite_where=sa.text("success = 0"),
+    )
+    op.create_index("ix_active_conditions_active_since", "active_conditions", ["active_since"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_active_conditions_active_since", table_name="active_conditions")
+    op.drop_index("ix_alert_events_failed", table_name="alert_events")
+    op.drop_index("ix_alert_events_occurred_at", table_name="alert_events")
+    op.drop_index("ix_telemetry_samples_device_observed", table_name="telemetry_samples")
@@ -0,0 +1,100 @@
+"""content-addressed raw payloads
+
+Revision ID: 0006_raw_payloads
+Revises: 0005_hot_table_indexes
+Create Date: 2026-10-17
+"""
+
+import hashlib
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006_raw_payloads"
+down_revision = "0005_hot_table_indexes"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+
+def _digest(raw_json: str) -> tuple[str, str]:
+    payload_json = json.dumps(json.loads(raw_json), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload_json.encode()).hexdigest(), payload_json
+
+
+def upgrade() -> None:
+    op.create_table(
+        "raw_payloads",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("digest", sa.String(), nullable=False, unique=True),
+        sa.Column("payload_json", sa.Text(), nullable=False),
+        sa.Column("first_seen_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    with op.batch_alter_table("telemetry_samples") as batch_op:
+        batch_op.alter_column("raw_json", existing_type=sa.Text(), nullable=True)
+        batch_op.add_column(sa.Column("payload_id", sa.Integer(), nullable=True))
+        batch_op.create_foreign_key("fk_telemetry_samples_payload_id", "raw_payloads", ["payload_id"], ["id"])
+    with op.batch_alter_table("ups_devices") as batch_op:
+        batch_op.add_column(sa.Column("last_payload_id", sa.Integer(), nullable=True))
+        batch_op.create_foreign_key("fk_ups_devices_last_payload_id", "raw_payloads", ["last_payload_id"], ["id"])
+
+    # Move existing payloads over in batches so large databases do not need
+    # every sample in memory at once.
+    connection = op.get_bind()
+    payload_ids: dict[str, int] = {}
+    while True:
+        rows = connection.execute(
+            sa.text(
+                "SELECT id, observed_at, raw_json FROM telemetry_samples "
+                "WHERE raw_json IS NOT NULL ORDER BY id LIMIT :limit"
+            ),
+            {"limit": BATCH_SIZE},
+        ).all()
+        if not rows:
+            break
+        for sample_id, observed_at, raw_json in rows:
+            digest, payload_json = _digest(raw_json)
+            payload_id = payload_ids.get(digest)
+            if payload_id is None:
+                connection.execute(
+                    sa.text(
+                        "INSERT INTO raw_payloads (digest, payload_json, first_seen_at) "
+                        "VALUES (:digest, :payload_json, :first_seen_at)"
+                    ),
+                    {"digest": digest, "payload_json": payload_json, "first_seen_at": observed_at},
+                )
+                payload_id = connection.execute(
+                    sa.text("SELECT id FROM raw_payloads WHERE digest = :digest"),
+                    {"digest": digest},
+                ).scalar_one()
+                payload_ids[digest] = payload_id
+            connection.execute(
+                sa.text("UPDATE telemetry_samples SET payload_id = :payload_id, raw_json = NULL WHERE id = :id"),
+                {"payload_id": payload_id, "id": sample_id},
+            )
+
+
+def downgrade() -> None:
+    op.execute(
+        "UPDATE telemetry_samples SET raw_json = "
+        "(SELECT payload_json FROM raw_payloads WHERE raw_payloads.id = telemetry_samples.payload_id) "
+        "WHERE raw_json IS NULL"
+    )
+    op.execute(
+        "UPDATE ups_devices SET last_snapshot_json = "
+        "(SELECT payload_json FROM raw_payloads WHERE raw_payloads.id = ups_devices.last_payload_id) "
+        "WHERE last_snapshot_json IS NULL"
+    )
+    with op.batch_alter_table("ups_devices") as batch_op:
+        batch_op.drop_constraint("fk_ups_devices_last_payload_id", type_="foreignkey")
+        batch_op.drop_column("last_payload_id")
+    with op.batch_alter_table("telemetry_samples") as batch_op:
+        batch_op.drop_constraint("fk_telemetry_samples_payload_id", type_="foreignkey")
+        batch_op.drop_column("payload_id")
+    op.execute("UPDATE telemetry_samples SET raw_json = '{}' WHERE raw_json IS NULL")
+    with op.batch_alter_table("telemetry_samples") as batch_op:
+        batch_op.alter_column("raw_json", existing_type=sa.Text(), nullable=False)
+    op.drop_table("raw_payloads")
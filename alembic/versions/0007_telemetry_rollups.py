@@ -0,0 +1,46 @@
+"""telemetry rollups
+
+Revision ID: 0007_telemetry_rollups
+Revises: 0006_raw_payloads
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007_telemetry_rollups"
+down_revision = "0006_raw_payloads"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "telemetry_rollups",
+        sa.Column("ups_device_id", sa.Integer(), sa.ForeignKey("ups_devices.id"), primary_key=True),
+        sa.Column("resolution_seconds", sa.Integer(), primary_key=True),
+        sa.Column("bucket_start", sa.DateTime(timezone=True), primary_key=True),
+        sa.Column("sample_count", sa.Integer(), nullable=False),
+        sa.Column("battery_charge_min", sa.Float(), nullable=True),
+        sa.Column("battery_charge_avg", sa.Float(), nullable=True),
+        sa.Column("battery_charge_max", sa.Float(), nullable=True),
+        sa.Column("runtime_seconds_min", sa.Float(), nullable=True),
+        sa.Column("runtime_seconds_avg", sa.Float(), nullable=True),
+        sa.Column("runtime_seconds_max", sa.Float(), nullable=True),
+        sa.Column("input_voltage_min", sa.Float(), nullable=True),
+        sa.Column("input_voltage_avg", sa.Float(), nullable=True),
+        sa.Column("input_voltage_max", sa.Float(), nullable=True),
+        sa.Column("output_voltage_min", sa.Float(), nullable=True),
+        sa.Column("output_voltage_avg", sa.Float(), nullable=True),
+        sa.Column("output_voltage_max", sa.Float(), nullable=True),
+        sa.Column("load_percent_min", sa.Float(), nullable=True),
+        sa.Column("load_percent_avg", sa.Float(), nullable=True),
+        sa.Column("load_percent_max", sa.Float(), nullable=True),
+    )
+    op.create_index("ix_telemetry_samples_payload", "telemetry_samples", ["payload_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_telemetry_samples_payload", table_name="telemetry_samples")
+    op.drop_table("telemetry_rollups")
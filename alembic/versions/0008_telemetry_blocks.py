@@ -0,0 +1,34 @@
+"""compressed telemetry blocks
+
+Revision ID: 0008_telemetry_blocks
+Revises: 0007_telemetry_rollups
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0008_telemetry_blocks"
+down_revision = "0007_telemetry_rollups"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "telemetry_blocks",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("ups_device_id", sa.Integer(), sa.ForeignKey("ups_devices.id"), nullable=False),
+        sa.Column("start_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("end_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("sample_count", sa.Integer(), nullable=False),
+        sa.Column("encoding", sa.Integer(), nullable=False),
+        sa.Column("data", sa.LargeBinary(), nullable=False),
+    )
+    op.create_index("ix_telemetry_blocks_device_start", "telemetry_blocks", ["ups_device_id", "start_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_telemetry_blocks_device_start", table_name="telemetry_blocks")
+    op.drop_table("telemetry_blocks")
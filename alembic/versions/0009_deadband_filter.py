@@ -0,0 +1,37 @@
+"""deadband telemetry filter
+
+Revision ID: 0009_deadband_filter
+Revises: 0008_telemetry_blocks
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0009_deadband_filter"
+down_revision = "0008_telemetry_blocks"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "ups_devices",
+        sa.Column("deadband_enabled", sa.Boolean(), nullable=False, server_default=sa.text("0")),
+    )
+    op.add_column(
+        "ups_devices",
+        sa.Column("deadband_percent", sa.Float(), nullable=False, server_default="1"),
+    )
+    op.add_column(
+        "ups_devices",
+        sa.Column("deadband_heartbeat_seconds", sa.Float(), nullable=False, server_default="300"),
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("ups_devices") as batch_op:
+        batch_op.drop_column("deadband_heartbeat_seconds")
+        batch_op.drop_column("deadband_percent")
+        batch_op.drop_column("deadband_enabled")
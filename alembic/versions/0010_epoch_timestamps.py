@@ -0,0 +1,44 @@
+"""integer epoch timestamps for telemetry and alert events
+
+Revision ID: 0010_epoch_timestamps
+Revises: 0009_deadband_filter
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+from powersnitch_app.partitions import is_partition
+
+
+revision = "0010_epoch_timestamps"
+down_revision = "0009_deadband_filter"
+branch_labels = None
+depends_on = None
+
+
+def _columns() -> list[tuple[str, str]]:
+    tables = sa.inspect(op.get_bind()).get_table_names()
+    columns = [("telemetry_samples", "observed_at"), ("alert_events", "occurred_at")]
+    # Monthly partitions are created at runtime and never seen by autogenerate.
+    columns.extend((name, "observed_at") for name in sorted(tables) if is_partition(name))
+    return columns
+
+
+def upgrade() -> None:
+    for table, column in _columns():
+        op.execute(
+            f"UPDATE {table} SET {column} = CAST(strftime('%s', {column}) AS INTEGER) WHERE typeof({column}) = 'text'"
+        )
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(column, type_=sa.Integer(), existing_type=sa.DateTime(timezone=True))
+
+
+def downgrade() -> None:
+    for table, column in _columns():
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(column, type_=sa.DateTime(timezone=True), existing_type=sa.Integer())
+        op.execute(
+            f"UPDATE {table} SET {column} = strftime('%Y-%m-%d %H:%M:%S.000000', {column}, 'unixepoch') "
+            f"WHERE typeof({column}) = 'integer'"
+        )
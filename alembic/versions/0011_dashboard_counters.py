@@ -0,0 +1,33 @@
+"""incrementally maintained dashboard counters
+
+Revision ID: 0011_dashboard_counters
+Revises: 0010_epoch_timestamps
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0011_dashboard_counters"
+down_revision = "0010_epoch_timestamps"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "dashboard_counters",
+        sa.Column("name", sa.String(), primary_key=True),
+        sa.Column("value", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.execute(
+        "INSERT INTO dashboard_counters (name, value) VALUES "
+        "('devices', (SELECT COUNT(*) FROM ups_devices)), "
+        "('enabled_devices', (SELECT COUNT(*) FROM ups_devices WHERE enabled = 1)), "
+        "('failed_alerts', (SELECT COUNT(*) FROM alert_events WHERE success = 0))"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("dashboard_counters")
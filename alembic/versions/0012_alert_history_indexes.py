@@ -0,0 +1,32 @@
+"""alert history filter indexes
+
+Revision ID: 0012_alert_history_indexes
+Revises: 0011_dashboard_counters
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+
+revision = "0012_alert_history_indexes"
+down_revision = "0011_dashboard_counters"
+branch_labels = None
+depends_on = None
+
+
+INDEXES = {
+    "ix_alert_events_device_occurred": ["ups_device_id", "occurred_at"],
+    "ix_alert_events_channel_occurred": ["channel_id", "occurred_at"],
+    "ix_alert_events_condition_occurred": ["condition_key", "occurred_at"],
+    "ix_alert_events_provider_occurred": ["provider", "occurred_at"],
+}
+
+
+def upgrade() -> None:
+    for name, columns in INDEXES.items():
+        op.create_index(name, "alert_events", columns)
+
+
+def downgrade() -> None:
+    for name in reversed(INDEXES):
+        op.drop_index(name, table_name="alert_events")
@@ -0,0 +1,146 @@
+"""Deep alert history pages: OFFSET versus the ``(occurred_at, id)`` cursor.
+
+Fills ``alert_events`` with a million rows over twenty UPS devices, then
+times fetching a 100 row page at increasing depths, once with ``OFFSET`` and
+once with ``list_alert_history`` and the cursor of the row just before it,
+unfiltered and filtered to one device. Run from the repository root::
+
+    python -m benchmarks.alert_history
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import desc, insert, select
+
+from powersnitch_app.bootstrap import ensure_bootstrap
+from powersnitch_app.config import Settings
+from powersnitch_app.db import Database
+from powersnitch_app.db_models import AlertEvent, NotificationChannel, UPSDevice
+from powersnitch_app.storage import Repository
+
+
+DEVICES = 20
+ROWS = 1_000_000
+CHUNK = 50_000
+PAGE = 100
+REPEATS = 20
+DEPTHS = (0, 10_000, 40_000, 100_000, 900_000)
+START = datetime(2026, 1, 1, tzinfo=UTC)
+
+
+async def populate(database: Database, repository: Repository) -> list[int]:
+    device_ids = [await repository.upsert_device(f"ups{index}", f"UPS {index}", {}) for index in range(DEVICES)]
+    async with database.engine.begin() as connection:
+        for offset in range(0, ROWS, CHUNK):
+            await connection.execute(
+                insert(AlertEvent),
+                [
+                    {
+                        # Two events per second, so pages split same-second ties.
+                        "occurred_at": START + timedelta(seconds=index // 2),
+                        "ups_device_id": device_ids[index % DEVICES],
+                        "condition_key": "on_battery",
+                        "condition_state": "active",
+                        "provider": "webhook",
+                        "target": "http://localhost",
+                        "success": index % 10 != 0,
+                        "payload_json": "{}",
+                    }
+                    for index in range(offset, offset + CHUNK)
+                ],
+            )
+        await connection.exec_driver_sql("ANALYZE")
+    return device_ids
+
+
+async def cursor_at(database: Database, depth: int, device_id: int | None) -> tuple[datetime, int] | None:
+    if depth == 0:
+        return None
+    query = select(AlertEvent.occurred_at, AlertEvent.id)
+    if device_id is not None:
+        query = query.where(AlertEvent.ups_device_id == device_id)
+    async with database.read_session() as session:
+        row = (
+            await session.execute(
+                query.order_by(desc(AlertEvent.occurred_at), desc(AlertEvent.id)).offset(depth - 1).limit(1)
+            )
+        ).one()
+    return row.occurred_at, row.id
+
+
+async def offset_page(database: Database, depth: int, device_id: int | None) -> int:
+    query = (
+        select(*AlertEvent.__table__.columns, UPSDevice.display_name, NotificationChannel.name.label("channel_name"))
+        .outerjoin(UPSDevice, UPSDevice.id == AlertEvent.ups_device_id)
+        .outerjoin(NotificationChannel, NotificationChannel.id == AlertEvent.channel_id)
+    )
+    if device_id is not None:
+        query = query.where(AlertEvent.ups_device_id == device_id)
+    async with database.read_session() as session:
+        rows = await session.execute(
+            query.order_by(desc(AlertEvent.occurred_at), desc(AlertEvent.id)).offset(depth).limit(PAGE)
+        )
+        return len([row._asdict() for row in rows])
+
+
+async def timed(call: Callable[[], Awaitable[Any]]) -> float:
+    await call()
+    started = time.perf_counter()
+    for _ in range(REPEATS):
+        await call()
+    return (time.perf_counter() - started) / REPEATS
+
+
+async def run() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        data_dir = Path(directory)
+        settings = Settings(
+            data_dir=data_dir,
+            sqlite_path=data_dir / "powersnitch.db",
+            initial_password_file=data_dir / "initial_admin_password.txt",
+            session_secret="benchmark",
+        )
+        database = Database(settings)
+        repository = Repository(database)
+        await ensure_bootstrap(settings)
+        device_ids = await populate(database, repository)
+        results = []
+        for label, device_id in (("all", None), ("one device", device_ids[3])):
+            for depth in DEPTHS:
+                if device_id is not None and depth >= ROWS // DEVICES:
+                    continue
+                before = await cursor_at(database, depth, device_id)
+                results.append(
+                    (
+                        label,
+                        depth,
+                        await timed(lambda: offset_page(database, depth, device_id)),
+                        await timed(lambda: repository.list_alert_history(PAGE, before=before, device_id=device_id)),
+                    )
+                )
+        await database.dispose()
+
+    print(f"alert events   {ROWS} over {DEVICES} devices, {PAGE} row pages")
+    for label, depth, offset_seconds, cursor_seconds in results:
+        print(
+            f"{label:10} depth {depth:7}  offset {offset_seconds * 1000:8.2f} ms"
+            f"  cursor {cursor_seconds * 1000:6.2f} ms"
+        )
+
+
+def main() -> None:
+    logging.disable(logging.INFO)
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Compare full condition evaluation with the compiled per-device evaluator.
+
+Run from the repository root::
+
+    python -m benchmarks.condition_evaluation
+"""
+
+from __future__ import annotations
+
+import timeit
+
+from powersnitch_app.core.conditions import compile_conditions, evaluate_conditions
+from powersnitch_app.integrations.nut import snapshot_from_status
+
+
+SNAPSHOT = snapshot_from_status(
+    "ups@localhost",
+    {"ups.status": "OL CHRG", "battery.charge": "100", "battery.runtime": "1800", "input.voltage": "121"},
+)
+NUMBER = 100_000
+
+
+def main() -> None:
+    one_rule = compile_conditions(["on_battery"], 25, 300)
+    every_rule = compile_conditions(None, 25, 300)
+    cases = {
+        "evaluate_conditions (all 10)": lambda: evaluate_conditions(SNAPSHOT, 25, 300),
+        "compiled, 1 rule": lambda: one_rule.evaluate(SNAPSHOT),
+        "compiled, all 10": lambda: every_rule.evaluate(SNAPSHOT),
+    }
+    baseline = None
+    for name, case in cases.items():
+        seconds = min(timeit.repeat(case, number=NUMBER, repeat=5))
+        per_call = seconds / NUMBER * 1e6
+        baseline = baseline or per_call
+        print(f"{name:<30} {per_call:8.3f} us/call  {baseline / per_call:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
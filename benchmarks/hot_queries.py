@@ -0,0 +1,173 @@
+"""ORM hydration versus the Core fast paths of the hottest list queries.
+
+Fills a database with a million telemetry samples and a million alert
+events spread over twenty UPS devices, then times ``list_devices``,
+``list_recent_alerts(200)`` and ``recent_samples_for_device(96)`` against
+the ORM queries they used to run. Run from the repository root::
+
+    python -m benchmarks.hot_queries
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import desc, insert, select
+
+from powersnitch_app.bootstrap import ensure_bootstrap
+from powersnitch_app.config import Settings
+from powersnitch_app.db import Database
+from powersnitch_app.db_models import AlertEvent, NotificationChannel, TelemetrySample, UPSDevice
+from powersnitch_app.models import TELEMETRY_METRICS
+from powersnitch_app.storage import Repository
+
+
+DEVICES = 20
+ROWS = 1_000_000
+CHUNK = 50_000
+REPEATS = 200
+START = datetime(2026, 1, 1, tzinfo=UTC)
+
+
+async def populate(database: Database, repository: Repository) -> list[int]:
+    device_ids = [await repository.upsert_device(f"ups{index}", f"UPS {index}", {}) for index in range(DEVICES)]
+    async with database.engine.begin() as connection:
+        for offset in range(0, ROWS, CHUNK):
+            await connection.execute(
+                insert(TelemetrySample),
+                [
+                    {
+                        "ups_device_id": device_ids[index % DEVICES],
+                        "observed_at": START + timedelta(seconds=15 * (index // DEVICES)),
+                        "status_flags": "OL",
+                        "battery_charge": 100.0,
+                        "runtime_seconds": 1800.0,
+                        "input_voltage": 230.0,
+                        "output_voltage": 230.0,
+                        "load_percent": 20.0,
+                    }
+                    for index in range(offset, offset + CHUNK)
+                ],
+            )
+            await connection.execute(
+                insert(AlertEvent),
+                [
+                    {
+                        "occurred_at": START + timedelta(seconds=index),
+                        "ups_device_id": device_ids[index % DEVICES],
+                        "condition_key": "on_battery",
+                        "condition_state": "active",
+                        "provider": "webhook",
+                        "target": "http://localhost",
+                        "success": index % 10 != 0,
+                        "payload_json": "{}",
+                    }
+                    for index in range(offset, offset + CHUNK)
+                ],
+            )
+    return device_ids
+
+
+async def orm_devices(database: Database, repository: Repository) -> int:
+    async with database.session() as session:
+        rows = (await session.scalars(select(UPSDevice).order_by(UPSDevice.display_name))).all()
+        return len([repository._device_to_dict(row) for row in rows])
+
+
+async def orm_alerts(database: Database) -> int:
+    async with database.session() as session:
+        rows = await session.execute(
+            select(AlertEvent, UPSDevice.display_name, NotificationChannel.name)
+            .outerjoin(UPSDevice, UPSDevice.id == AlertEvent.ups_device_id)
+            .outerjoin(NotificationChannel, NotificationChannel.id == AlertEvent.channel_id)
+            .order_by(desc(AlertEvent.occurred_at))
+            .limit(200)
+        )
+        result = []
+        for event, display_name, channel_name in rows.all():
+            item = {column.key: getattr(event, column.key) for column in AlertEvent.__table__.columns}
+            item["occurred_at"] = event.occurred_at.isoformat()
+            item["display_name"] = display_name
+            item["channel_name"] = channel_name
+            result.append(item)
+        return len(result)
+
+
+async def orm_samples(database: Database, device_id: int) -> int:
+    async with database.session() as session:
+        rows = await session.scalars(
+            select(TelemetrySample)
+            .where(TelemetrySample.ups_device_id == device_id)
+            .order_by(desc(TelemetrySample.observed_at))
+            .limit(96)
+        )
+        return len(
+            [
+                {"observed_at": row.observed_at.isoformat(), **{metric: getattr(row, metric) for metric in TELEMETRY_METRICS}}
+                for row in rows.all()
+            ]
+        )
+
+
+async def timed(call: Callable[[], Awaitable[Any]]) -> float:
+    await call()
+    started = time.perf_counter()
+    for _ in range(REPEATS):
+        await call()
+    return (time.perf_counter() - started) / REPEATS
+
+
+async def run() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        data_dir = Path(directory)
+        settings = Settings(
+            data_dir=data_dir,
+            sqlite_path=data_dir / "powersnitch.db",
+            initial_password_file=data_dir / "initial_admin_password.txt",
+            session_secret="benchmark",
+        )
+        database = Database(settings)
+        repository = Repository(database)
+        await ensure_bootstrap(settings)
+        device_ids = await populate(database, repository)
+        results = [
+            (
+                "list_devices",
+                await timed(lambda: orm_devices(database, repository)),
+                await timed(repository.list_devices),
+            ),
+            (
+                "list_recent_alerts",
+                await timed(lambda: orm_alerts(database)),
+                await timed(lambda: repository.list_recent_alerts(200)),
+            ),
+            (
+                "recent_samples",
+                await timed(lambda: orm_samples(database, device_ids[0])),
+                await timed(lambda: repository.recent_samples_for_device(device_ids[0])),
+            ),
+        ]
+        await database.dispose()
+
+    print(f"rows           {ROWS} samples, {ROWS} alert events, {DEVICES} devices")
+    for name, orm_seconds, core_seconds in results:
+        print(
+            f"{name:18} orm {orm_seconds * 1000:7.2f} ms  core {core_seconds * 1000:7.2f} ms"
+            f"  {orm_seconds / core_seconds:4.1f}x"
+        )
+
+
+def main() -> None:
+    logging.disable(logging.INFO)
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
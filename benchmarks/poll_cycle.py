@@ -0,0 +1,92 @@
+"""Per-poll latency of rule bookkeeping with and without a unit of work.
+
+Each simulated poll flips a UPS between on-battery and online, so every
+poll alerts on or recovers from three conditions, each routed to two
+channels: six outbox rows plus three condition writes, the busiest a real
+poll gets. The same cycle runs once with a session and commit per call and
+once inside ``Repository.unit_of_work``. Run from the repository root::
+
+    python -m benchmarks.poll_cycle
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from powersnitch_app.bootstrap import ensure_bootstrap
+from powersnitch_app.config import Settings
+from powersnitch_app.db import Database
+from powersnitch_app.storage import Repository
+
+
+POLLS = 300
+CONDITIONS = ("on_battery", "battery_low_pct", "runtime_low")
+CHANNELS = 2
+
+
+async def cycle(repository: Repository, device_id: int, alerting: bool) -> None:
+    active = {row["condition_key"] for row in await repository.list_active_conditions_for_device(device_id)}
+    for key in CONDITIONS:
+        state = "active" if alerting else "recovered"
+        for channel in range(CHANNELS):
+            await repository.enqueue_notification(
+                device_id, None, key, state, f"{key} {state}", f"channel {channel}", {"channel": channel}
+            )
+        if alerting:
+            await repository.open_or_update_active_condition(device_id, key, True, key, mark_alerted=True)
+        elif key in active:
+            await repository.clear_active_condition(device_id, key)
+
+
+async def measure(repository: Repository, device_id: int, unit_of_work: bool) -> list[float]:
+    timings = []
+    for index in range(POLLS):
+        started = time.perf_counter()
+        scope = repository.unit_of_work() if unit_of_work else contextlib.nullcontext()
+        async with scope:
+            await cycle(repository, device_id, index % 2 == 0)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def report(label: str, timings: list[float]) -> None:
+    ordered = sorted(timings)
+    p95 = ordered[int(len(ordered) * 0.95)]
+    print(f"{label:16} mean {statistics.mean(timings) * 1000:7.2f} ms  p95 {p95 * 1000:7.2f} ms")
+
+
+async def run() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        data_dir = Path(directory)
+        settings = Settings(
+            data_dir=data_dir,
+            sqlite_path=data_dir / "powersnitch.db",
+            initial_password_file=data_dir / "initial_admin_password.txt",
+            session_secret="benchmark",
+        )
+        database = Database(settings)
+        repository = Repository(database)
+        await ensure_bootstrap(settings)
+        device_id = await repository.upsert_device("ups", "Bench", {})
+        per_call = await measure(repository, device_id, unit_of_work=False)
+        per_poll = await measure(repository, device_id, unit_of_work=True)
+        await database.dispose()
+
+    print(f"polls           {POLLS} ({len(CONDITIONS)} conditions x {CHANNELS} channels)")
+    report("per call", per_call)
+    report("unit of work", per_poll)
+
+
+def main() -> None:
+    logging.disable(logging.INFO)
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
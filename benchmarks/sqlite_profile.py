@@ -0,0 +1,78 @@
+"""Concurrent read/write throughput with and without the SQLite pragma profile.
+
+One task writes a snapshot per commit, as the monitor does on every poll,
+while several tasks read recent samples and dashboard counts, as the web UI
+does. Run from the repository root::
+
+    python -m benchmarks.sqlite_profile
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+from powersnitch_app.bootstrap import ensure_bootstrap
+from powersnitch_app.config import Settings
+from powersnitch_app.db import Database
+from powersnitch_app.integrations.nut import snapshot_from_status
+from powersnitch_app.storage import Repository
+
+
+DURATION_SECONDS = 3.0
+READERS = 4
+BASELINE = {
+    "sqlite_journal_mode": "delete",
+    "sqlite_synchronous": "full",
+    "sqlite_mmap_size_bytes": 0,
+    "sqlite_cache_size_kib": 2000,
+    "sqlite_temp_store": "default",
+}
+SNAPSHOT = snapshot_from_status("ups", {"ups.status": "OL", "battery.charge": "100", "battery.runtime": "1800"})
+
+
+async def run(profile: dict[str, object]) -> tuple[float, float]:
+    with tempfile.TemporaryDirectory() as directory:
+        data_dir = Path(directory)
+        settings = Settings(
+            data_dir=data_dir,
+            sqlite_path=data_dir / "powersnitch.db",
+            initial_password_file=data_dir / "initial_admin_password.txt",
+            session_secret="benchmark",
+            **profile,
+        )
+        database = Database(settings)
+        repository = Repository(database)
+        await ensure_bootstrap(settings)
+        device_id = await repository.upsert_device("ups", "Bench", {})
+        deadline = time.perf_counter() + DURATION_SECONDS
+        counts = {"writes": 0, "reads": 0}
+
+        async def writer() -> None:
+            while time.perf_counter() < deadline:
+                await repository.save_snapshot(device_id, SNAPSHOT)
+                counts["writes"] += 1
+
+        async def reader() -> None:
+            while time.perf_counter() < deadline:
+                await repository.recent_samples_for_device(device_id)
+                await repository.dashboard_counts()
+                counts["reads"] += 1
+
+        await asyncio.gather(writer(), *(reader() for _ in range(READERS)))
+        await database.dispose()
+        return counts["writes"] / DURATION_SECONDS, counts["reads"] / DURATION_SECONDS
+
+
+def main() -> None:
+    logging.disable(logging.INFO)
+    for name, profile in (("sqlite defaults", BASELINE), ("pragma profile", {})):
+        writes, reads = asyncio.run(run(profile))
+        print(f"{name:<16} {writes:8.1f} writes/s  {reads:8.1f} reads/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Bootstrap cost on every start once the schema is already at head.
+
+Migrates a fresh database once, then times repeated starts two ways: the
+old path, which ran ``alembic upgrade head`` and built a second
+``Database`` for ``initialize_defaults`` every time, and ``ensure_bootstrap``
+given the app's ``Database``, which only reads the stored revision. Each
+is timed warm in this process and, including imports, in a new interpreter.
+Run from the repository root::
+
+    python -m benchmarks.startup
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from powersnitch_app.bootstrap import ensure_bootstrap, upgrade_schema
+from powersnitch_app.config import Settings
+from powersnitch_app.db import Database
+from powersnitch_app.storage import Repository
+
+
+REPEATS = 20
+PROCESS_REPEATS = 5
+FRESH_START = """
+import asyncio, logging, sys, time
+started = time.perf_counter()
+from benchmarks.startup import settings_for, start_once
+logging.disable(logging.INFO)
+asyncio.run(start_once(settings_for(sys.argv[1]), sys.argv[2] == "fast"))
+print(time.perf_counter() - started, "alembic" in sys.modules)
+"""
+
+
+def settings_for(directory: str) -> Settings:
+    data_dir = Path(directory)
+    return Settings(
+        data_dir=data_dir,
+        sqlite_path=data_dir / "powersnitch.db",
+        initial_password_file=data_dir / "initial_admin_password.txt",
+        session_secret="benchmark",
+    )
+
+
+async def migrate_every_start(settings: Settings) -> None:
+    upgrade_schema(settings)
+    database = Database(settings)
+    await Repository(database).initialize_defaults(settings.initial_password, settings.initial_password_file)
+    await database.dispose()
+
+
+async def start_once(settings: Settings, fast: bool, database: Database | None = None) -> None:
+    if not fast:
+        await migrate_every_start(settings)
+        return
+    owned = database is None
+    database = database or Database(settings)
+    await ensure_bootstrap(settings, database)
+    if owned:
+        await database.dispose()
+
+
+async def timed_starts(settings: Settings, fast: bool) -> list[float]:
+    database = Database(settings)
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        await start_once(settings, fast, database)
+        timings.append(time.perf_counter() - started)
+    await database.dispose()
+    return timings
+
+
+def process_starts(directory: str, fast: bool) -> tuple[list[float], bool]:
+    timings = []
+    imported = False
+    for _ in range(PROCESS_REPEATS):
+        output = subprocess.run(
+            [sys.executable, "-c", FRESH_START, directory, "fast" if fast else "migrate"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.split()
+        timings.append(float(output[0]))
+        imported = output[1] == "True"
+    return timings, imported
+
+
+async def run() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        settings = settings_for(directory)
+        await ensure_bootstrap(settings)
+        results = {
+            fast: (await timed_starts(settings, fast), *process_starts(directory, fast)) for fast in (False, True)
+        }
+
+    print(f"bootstrap at head   warm: median of {REPEATS}   new process: median of {PROCESS_REPEATS}, with imports")
+    for fast, label in ((False, "alembic every start"), (True, "revision check")):
+        warm, fresh, imported = results[fast]
+        print(
+            f"{label:20} warm {statistics.median(warm) * 1000:7.2f} ms"
+            f"  new process {statistics.median(fresh) * 1000:7.2f} ms"
+            f"  alembic imported: {'yes' if imported else 'no'}"
+        )
+
+
+def main() -> None:
+    logging.disable(logging.INFO)
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
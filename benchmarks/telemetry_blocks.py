@@ -0,0 +1,121 @@
+"""Bytes per sample and read speed of row storage versus compressed blocks.
+
+Writes a week of 15 second polls for one UPS, measures the database file
+after ``VACUUM``, packs every closed hour into blocks and measures again,
+then times streaming all samples back and decoding the blocks alone. Run
+from the repository root::
+
+    python -m benchmarks.telemetry_blocks
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import tempfile
+import time
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import select, text
+
+from powersnitch_app.blocks import decode_block
+from powersnitch_app.bootstrap import ensure_bootstrap
+from powersnitch_app.config import Settings
+from powersnitch_app.db import Database
+from powersnitch_app.db_models import TelemetryBlock
+from powersnitch_app.integrations.nut import snapshot_from_status
+from powersnitch_app.storage import Repository
+
+
+DAYS = 7
+INTERVAL_SECONDS = 15
+START = datetime(2026, 1, 1, tzinfo=UTC)
+
+
+def samples(device_id: int):
+    rng = random.Random(7)
+    count = DAYS * 86400 // INTERVAL_SECONDS
+    for index in range(count):
+        snapshot = snapshot_from_status(
+            "ups",
+            {
+                "ups.status": "OL",
+                "battery.charge": "100",
+                "battery.runtime": str(1800 - (index // 2000) * 30),
+                "input.voltage": f"{230 + rng.choice((-0.4, 0.0, 0.0, 0.4)):.1f}",
+                "output.voltage": "230.0",
+                "ups.load": str(22 + rng.choice((0, 0, 0, 1))),
+            },
+        )
+        snapshot.observed_at = START + timedelta(seconds=index * INTERVAL_SECONDS)
+        yield device_id, snapshot
+
+
+async def database_bytes(database: Database) -> int:
+    async with database.engine.connect() as connection:
+        await connection.exec_driver_sql("VACUUM")
+        page_count = await connection.scalar(text("PRAGMA page_count"))
+        page_size = await connection.scalar(text("PRAGMA page_size"))
+    return page_count * page_size
+
+
+async def stream_seconds(repository: Repository, device_id: int) -> tuple[float, int]:
+    started = time.perf_counter()
+    count = 0
+    async for _sample in repository.iter_samples(device_id):
+        count += 1
+    return time.perf_counter() - started, count
+
+
+async def run() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        data_dir = Path(directory)
+        settings = Settings(
+            data_dir=data_dir,
+            sqlite_path=data_dir / "powersnitch.db",
+            initial_password_file=data_dir / "initial_admin_password.txt",
+            session_secret="benchmark",
+            telemetry_storage="blocks",
+        )
+        database = Database(settings)
+        repository = Repository(database)
+        await ensure_bootstrap(settings)
+        device_id = await repository.upsert_device("ups", "Bench", {})
+        empty = await database_bytes(database)
+        batch = list(samples(device_id))
+        for offset in range(0, len(batch), 1000):
+            await repository.save_snapshots(batch[offset : offset + 1000])
+        # Includes the deduplicated raw payloads, which packing releases.
+        row_bytes = await database_bytes(database) - empty
+        row_seconds, _ = await stream_seconds(repository, device_id)
+
+        while await repository.pack_telemetry_blocks(START + timedelta(days=DAYS)):
+            pass
+        while await repository.prune_raw_payloads(1000):
+            pass
+        block_bytes = await database_bytes(database) - empty
+        block_seconds, streamed = await stream_seconds(repository, device_id)
+
+        async with database.session() as session:
+            blobs = list(await session.scalars(select(TelemetryBlock.data)))
+        started = time.perf_counter()
+        decoded = sum(1 for blob in blobs for _sample in decode_block(blob))
+        decode_seconds = time.perf_counter() - started
+        await database.dispose()
+
+    blob_bytes = sum(len(blob) for blob in blobs)
+    print(f"samples       {len(batch)} ({DAYS} days at {INTERVAL_SECONDS}s)")
+    print(f"rows          {row_bytes / len(batch):8.1f} bytes/sample  {len(batch) / row_seconds:9.0f} samples/s streamed")
+    print(f"blocks        {block_bytes / streamed:8.1f} bytes/sample  {streamed / block_seconds:9.0f} samples/s streamed")
+    print(f"block decode  {blob_bytes / decoded:8.1f} bytes/sample  {decoded / decode_seconds:9.0f} samples/s")
+
+
+def main() -> None:
+    logging.disable(logging.INFO)
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
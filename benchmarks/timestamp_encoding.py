@@ -0,0 +1,146 @@
+"""Text ``DateTime`` versus integer ``EpochSeconds`` telemetry timestamps.
+
+Builds the same million samples (twenty UPS devices at 15 second polls)
+twice: once with ``observed_at`` stored as SQLite ``DateTime`` text, as
+before migration 0010, and once as integer epoch seconds. Reports table and
+index size from ``dbstat`` and the time to fetch and format one device's
+samples for an hour, a day and a week, both decoding epochs in Python and
+formatting them in SQL as the repository does. Run from the repository
+root::
+
+    python -m benchmarks.timestamp_encoding
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import tempfile
+import time
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import Column, DateTime, Float, Index, Integer, MetaData, Table, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from powersnitch_app.db import sqlite_url_from_path
+from powersnitch_app.db_models import EpochSeconds
+from powersnitch_app.models import TELEMETRY_METRICS
+
+
+DEVICES = 20
+ROWS = 1_000_000
+CHUNK = 50_000
+REPEATS = 20
+INTERVAL_SECONDS = 15
+START = datetime(2026, 1, 1, tzinfo=UTC)
+WINDOWS = {"1 hour": timedelta(hours=1), "1 day": timedelta(days=1), "7 days": timedelta(days=7)}
+
+
+def samples_table(column_type) -> Table:
+    return Table(
+        "samples",
+        MetaData(),
+        Column("id", Integer, primary_key=True),
+        Column("ups_device_id", Integer, nullable=False),
+        Column("observed_at", column_type, nullable=False),
+        *(Column(metric, Float) for metric in TELEMETRY_METRICS),
+        Index("ix_samples_device_observed", "ups_device_id", "observed_at"),
+    )
+
+
+async def populate(engine: AsyncEngine, table: Table) -> None:
+    async with engine.begin() as connection:
+        await connection.run_sync(table.metadata.create_all)
+        for offset in range(0, ROWS, CHUNK):
+            await connection.execute(
+                insert(table),
+                [
+                    {
+                        "ups_device_id": index % DEVICES,
+                        "observed_at": START + timedelta(seconds=INTERVAL_SECONDS * (index // DEVICES)),
+                        **{metric: 230.0 for metric in TELEMETRY_METRICS},
+                    }
+                    for index in range(offset, offset + CHUNK)
+                ],
+            )
+        await connection.exec_driver_sql("ANALYZE")
+
+
+async def sizes(engine: AsyncEngine) -> dict[str, int]:
+    async with engine.connect() as connection:
+        await connection.exec_driver_sql("VACUUM")
+        rows = await connection.execute(text("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name"))
+        return dict(rows.all())
+
+
+async def range_seconds(
+    engine: AsyncEngine, table: Table, window: timedelta, in_sql: bool = False
+) -> tuple[float, int]:
+    start = START + timedelta(days=3)
+    observed_at = table.c.observed_at
+    if in_sql:
+        observed_at = func.strftime("%Y-%m-%dT%H:%M:%S", observed_at, "unixepoch")
+    query = select(observed_at, *(table.c[metric] for metric in TELEMETRY_METRICS)).where(
+        table.c.ups_device_id == 7,
+        table.c.observed_at >= start,
+        table.c.observed_at < start + window,
+    )
+    count = 0
+    started = time.perf_counter()
+    async with engine.connect() as connection:
+        for _ in range(REPEATS):
+            rows = await connection.execute(query)
+            if in_sql:
+                samples = [{"observed_at": moment, "values": values} for moment, *values in rows]
+            else:
+                samples = [{"observed_at": moment.isoformat(), "values": values} for moment, *values in rows]
+            count = len(samples)
+    return (time.perf_counter() - started) / REPEATS, count
+
+
+async def measure(
+    directory: Path, name: str, column_type, in_sql: bool = False
+) -> tuple[dict[str, int], dict[str, tuple[float, int]]]:
+    engine = create_async_engine(sqlite_url_from_path(str(directory / f"{name}.db")))
+    table = samples_table(column_type)
+    await populate(engine, table)
+    storage = await sizes(engine)
+    timings = {label: await range_seconds(engine, table, window, in_sql) for label, window in WINDOWS.items()}
+    await engine.dispose()
+    return storage, timings
+
+
+async def run() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        results = {
+            "text": await measure(Path(directory), "text", DateTime(timezone=True)),
+            "epoch": await measure(Path(directory), "epoch", EpochSeconds()),
+            "epoch (sql)": await measure(Path(directory), "epoch_sql", EpochSeconds(), in_sql=True),
+        }
+
+    print(f"samples        {ROWS} ({DEVICES} devices at {INTERVAL_SECONDS}s)")
+    for name in ("text", "epoch"):
+        storage = results[name][0]
+        print(
+            f"{name:6} table {storage['samples'] / ROWS:5.1f} bytes/row"
+            f"  index {storage['ix_samples_device_observed'] / ROWS:5.1f} bytes/row"
+        )
+    for label in WINDOWS:
+        text_seconds, count = results["text"][1][label]
+        epoch_seconds, _ = results["epoch"][1][label]
+        sql_seconds, _ = results["epoch (sql)"][1][label]
+        print(
+            f"{label:7} ({count:5} rows)  text {text_seconds * 1000:7.2f} ms"
+            f"  epoch {epoch_seconds * 1000:7.2f} ms  epoch (sql) {sql_seconds * 1000:7.2f} ms"
+            f"  {text_seconds / sql_seconds:4.1f}x"
+        )
+
+
+def main() -> None:
+    logging.disable(logging.INFO)
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Page latency under concurrent polling, with and without the read pool.
+
+Seeds a day of 15 second samples for twenty UPS devices, then keeps a
+simulated monitor committing a batch of snapshots and an alert event every
+50 ms while eight clients load the dashboard, history and graphs pages.
+Runs once with a four connection read pool and once with
+``sqlite_read_pool_size=0`` (pages and polls share one pool) and prints
+p50/p99 page latency and how many polls were committed. Run from the
+repository root::
+
+    python -m benchmarks.web_load
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import statistics
+import tempfile
+import time
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+import httpx
+from sqlalchemy import insert
+
+from powersnitch_app.bootstrap import ensure_bootstrap
+from powersnitch_app.config import Settings
+from powersnitch_app.db_models import TelemetrySample
+from powersnitch_app.integrations.nut import snapshot_from_status
+from powersnitch_app.storage import Repository
+from powersnitch_app.web.app import create_app
+
+
+DEVICES = 20
+SEED_HOURS = 24
+CLIENTS = 8
+REQUESTS_PER_CLIENT = 40
+POLL_SECONDS = 0.05
+READ_POOL_SIZE = 4
+PAGES = ("/dashboard", "/history", "/graphs?range=24h")
+
+
+async def seed(repository: Repository) -> list[int]:
+    device_ids = [await repository.upsert_device(f"ups{index}", f"UPS {index}", {}) for index in range(DEVICES)]
+    now = datetime.now(UTC).replace(microsecond=0)
+    moments = [now - timedelta(seconds=15 * step) for step in range(SEED_HOURS * 240)]
+    async with repository.db.engine.begin() as connection:
+        await connection.execute(
+            insert(TelemetrySample),
+            [
+                {
+                    "ups_device_id": device_id,
+                    "observed_at": moment,
+                    "status_flags": "OL",
+                    "battery_charge": 100.0,
+                    "runtime_seconds": 1800.0,
+                    "input_voltage": 230.0,
+                    "output_voltage": 230.0,
+                    "load_percent": 20.0,
+                }
+                for device_id in device_ids
+                for moment in moments
+            ],
+        )
+    return device_ids
+
+
+async def poll(repository: Repository, device_ids: list[int], stop: asyncio.Event) -> int:
+    polls = 0
+    while not stop.is_set():
+        snapshot = snapshot_from_status("ups", {"ups.status": "OL", "battery.charge": str(90 + polls % 10)})
+        await repository.save_snapshots([(device_id, snapshot) for device_id in device_ids])
+        await repository.log_alert_event(device_ids[0], None, "on_battery", "active", "webhook", "hook", True, {})
+        polls += 1
+        await asyncio.sleep(POLL_SECONDS)
+    return polls
+
+
+async def browse(client: httpx.AsyncClient, index: int) -> list[float]:
+    timings = []
+    for request in range(REQUESTS_PER_CLIENT):
+        started = time.perf_counter()
+        response = await client.get(PAGES[(index + request) % len(PAGES)])
+        response.raise_for_status()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+async def measure(read_pool_size: int) -> tuple[list[float], int]:
+    with tempfile.TemporaryDirectory() as directory:
+        data_dir = Path(directory)
+        settings = Settings(
+            data_dir=data_dir,
+            sqlite_path=data_dir / "powersnitch.db",
+            initial_password_file=data_dir / "initial_admin_password.txt",
+            session_secret="benchmark",
+            sqlite_read_pool_size=read_pool_size,
+        )
+        app = create_app(settings)
+        repository: Repository = app.state.repository
+        await ensure_bootstrap(settings)
+        device_ids = await seed(repository)
+        password = settings.initial_password_file.read_text(encoding="utf-8").strip()
+        transport = httpx.ASGITransport(app=app)
+        clients = [httpx.AsyncClient(transport=transport, base_url="http://bench") for _ in range(CLIENTS)]
+        for client in clients:
+            await client.post("/login", data={"username": "admin", "password": password})
+        stop = asyncio.Event()
+        poller = asyncio.create_task(poll(repository, device_ids, stop))
+        results = await asyncio.gather(*(browse(client, index) for index, client in enumerate(clients)))
+        stop.set()
+        polls = await poller
+        for client in clients:
+            await client.aclose()
+        await repository.db.dispose()
+    return [timing for timings in results for timing in timings], polls
+
+
+def report(label: str, timings: list[float], polls: int) -> None:
+    ordered = sorted(timings)
+    p99 = ordered[min(int(len(ordered) * 0.99), len(ordered) - 1)]
+    print(
+        f"{label:22} p50 {statistics.median(timings) * 1000:7.1f} ms  p99 {p99 * 1000:7.1f} ms"
+        f"  {polls} polls committed"
+    )
+
+
+async def run() -> None:
+    shared = await measure(0)
+    split = await measure(READ_POOL_SIZE)
+    print(f"pages          {CLIENTS} clients x {REQUESTS_PER_CLIENT} loads of {', '.join(PAGES)}")
+    report("shared pool", *shared)
+    report("read pool + 1 writer", *split)
+
+
+def main() -> None:
+    logging.disable(logging.INFO)
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
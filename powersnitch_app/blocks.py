@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import struct
+import zlib
+from array import array
+from collections.abc import Iterator, Sequence
+from datetime import UTC, datetime, timedelta
+
+from powersnitch_app.models import TELEMETRY_METRICS
+
+
+BLOCK_ENCODING = 1
+STORAGE_MODES = frozenset({"rows", "blocks"})
+# Samples are packed per device in aligned windows of this length.
+BLOCK_SECONDS = 3600
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+_HEADER = struct.Struct("<BI")
+_SECTION = struct.Struct("<I")
+
+# observed_at, the five metrics in ``TELEMETRY_METRICS`` order, status flags.
+BlockSample = tuple[datetime, float | None, float | None, float | None, float | None, float | None, str]
+
+
+def encode_block(samples: Sequence[BlockSample]) -> bytes:
+    """Pack one device's samples, in time order, into a compressed block."""
+    # Delta-of-delta timestamps and metric bits XORed with the previous value
+    # are mostly zero bytes at a steady poll rate, which zlib squeezes.
+    timestamps = bytearray()
+    previous = previous_delta = 0
+    for index, sample in enumerate(samples):
+        moment = _micros(sample[0])
+        delta = moment - previous
+        _write_varint(timestamps, _zigzag(moment if index == 0 else delta - previous_delta))
+        previous, previous_delta = moment, (0 if index == 0 else delta)
+    sections = [bytes(timestamps)]
+    for column in range(1, len(TELEMETRY_METRICS) + 1):
+        present = bytearray((len(samples) + 7) // 8)
+        xors = array("Q")
+        last = 0
+        for index, sample in enumerate(samples):
+            value = sample[column]
+            if value is None:
+                continue
+            present[index // 8] |= 1 << (index % 8)
+            bits = _float_bits(value)
+            xors.append(bits ^ last)
+            last = bits
+        sections.append(bytes(present))
+        sections.append(xors.tobytes())
+    sections.append("\n".join(sample[-1] for sample in samples).encode())
+    body = bytearray(_HEADER.pack(BLOCK_ENCODING, len(samples)))
+    for section in sections:
+        body += _SECTION.pack(len(section))
+        body += section
+    return zlib.compress(bytes(body))
+
+
+def decode_block(data: bytes) -> Iterator[BlockSample]:
+    """Stream the samples of a block back in time order."""
+    body = memoryview(zlib.decompress(data))
+    version, count = _HEADER.unpack_from(body)
+    if version != BLOCK_ENCODING:
+        raise ValueError(f"Unsupported telemetry block encoding: {version}")
+    offset = _HEADER.size
+    sections = []
+    while offset < len(body):
+        (length,) = _SECTION.unpack_from(body, offset)
+        offset += _SECTION.size
+        sections.append(body[offset : offset + length])
+        offset += length
+    timestamps = _decode_timestamps(sections[0], count)
+    columns = [
+        _decode_metric(sections[1 + 2 * column], sections[2 + 2 * column], count)
+        for column in range(len(TELEMETRY_METRICS))
+    ]
+    flags = bytes(sections[-1]).decode().split("\n") if count else []
+    for index in range(count):
+        yield (timestamps[index], *(column[index] for column in columns), flags[index])
+
+
+def _decode_timestamps(data: memoryview, count: int) -> list[datetime]:
+    moments: list[datetime] = []
+    offset = 0
+    moment = delta = 0
+    for index in range(count):
+        value, offset = _read_varint(data, offset)
+        value = _unzigzag(value)
+        if index == 0:
+            moment = value
+        else:
+            delta += value
+            moment += delta
+        moments.append(_EPOCH + timedelta(microseconds=moment))
+    return moments
+
+
+def _decode_metric(present: memoryview, data: memoryview, count: int) -> list[float | None]:
+    xors = array("Q")
+    xors.frombytes(data)
+    values: list[float | None] = []
+    position = 0
+    bits = 0
+    for index in range(count):
+        if present[index // 8] & (1 << (index % 8)):
+            bits ^= xors[position]
+            position += 1
+            values.append(_bits_float(bits))
+        else:
+            values.append(None)
+    return values
+
+
+def _micros(moment: datetime) -> int:
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=UTC)
+    return (moment - _EPOCH) // timedelta(microseconds=1)
+
+
+def _float_bits(value: float) -> int:
+    return struct.unpack("<Q", struct.pack("<d", value))[0]
+
+
+def _bits_float(bits: int) -> float:
+    return struct.unpack("<d", struct.pack("<Q", bits))[0]
+
+
+def _zigzag(value: int) -> int:
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def _unzigzag(value: int) -> int:
+    return value // 2 if value % 2 == 0 else -(value + 1) // 2
+
+
+def _write_varint(buffer: bytearray, value: int) -> None:
+    while value >= 0x80:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _read_varint(data: memoryview, offset: int) -> tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
@@ -2,25 +2,61 @@ from __future__ import annotations
 
 import asyncio
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from alembic import command
-from alembic.config import Config
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
 
 from powersnitch_app.config import Settings, get_settings
-from powersnitch_app.db import Database
+from powersnitch_app.db import Database, sqlite_pragmas
 from powersnitch_app.storage import Repository
 
+if TYPE_CHECKING:
+    from alembic.config import Config
+
+
+# Newest migration in alembic/versions; tests check it matches Alembic's head.
+SCHEMA_REVISION = "0012_alert_history_indexes"
+
+
+def alembic_config(settings: Settings) -> Config:
+    from alembic.config import Config
 
-async def ensure_bootstrap(settings: Settings | None = None) -> None:
-    settings = settings or get_settings()
     alembic_cfg = Config(str(Path(__file__).resolve().parent.parent / "alembic.ini"))
     alembic_cfg.set_main_option("script_location", str(Path(__file__).resolve().parent.parent / "alembic"))
     alembic_cfg.set_main_option("sqlalchemy.url", f"sqlite:///{settings.sqlite_path}")
-    command.upgrade(alembic_cfg, "head")
+    alembic_cfg.attributes["sqlite_pragmas"] = sqlite_pragmas(settings)
+    return alembic_cfg
+
 
-    db = Database(settings)
-    repo = Repository(db)
-    await repo.initialize_defaults(settings.initial_password, settings.initial_password_file)
+def upgrade_schema(settings: Settings) -> None:
+    from alembic import command
+
+    command.upgrade(alembic_config(settings), "head")
+
+
+async def stored_revision(db: Database) -> str | None:
+    """The Alembic revision recorded in the database, or ``None`` before the first migration."""
+    async with db.engine.connect() as connection:
+        try:
+            return (await connection.execute(text("SELECT version_num FROM alembic_version"))).scalar()
+        except OperationalError:
+            return None
+
+
+async def ensure_bootstrap(settings: Settings | None = None, db: Database | None = None) -> None:
+    """Migrate the schema if needed and create the default settings and admin user."""
+    settings = settings or get_settings()
+    owned = db is None
+    db = db or Database(settings)
+    try:
+        # Alembic is only imported when the schema is behind.
+        if await stored_revision(db) != SCHEMA_REVISION:
+            upgrade_schema(settings)
+        await Repository(db).initialize_defaults(settings.initial_password, settings.initial_password_file)
+    finally:
+        if owned:
+            await db.dispose()
 
 
 def main() -> None:
@@ -13,6 +13,10 @@ def _bool_env(name: str, default: bool) -> bool:
     return value.strip().lower() in {"1", "true", "yes", "on"}
 
 
+def _list_env(name: str) -> list[str]:
+    return [item.strip() for item in os.getenv(name, "").split(",") if item.strip()]
+
+
 @dataclass(slots=True)
 class Settings:
     app_name: str = "Power Snitch"
@@ -23,8 +27,67 @@ class Settings:
     sqlite_path: Path = field(default_factory=lambda: Path(os.getenv("POWERSNITCH_SQLITE_PATH", "")))
     initial_password_file: Path = field(default_factory=lambda: Path(os.getenv("POWERSNITCH_INITIAL_PASSWORD_FILE", "")))
     initial_password: str | None = field(default_factory=lambda: os.getenv("POWERSNITCH_INITIAL_PASSWORD"))
+    sqlite_journal_mode: str = field(default_factory=lambda: os.getenv("POWERSNITCH_SQLITE_JOURNAL_MODE", "wal"))
+    sqlite_synchronous: str = field(default_factory=lambda: os.getenv("POWERSNITCH_SQLITE_SYNCHRONOUS", "normal"))
+    sqlite_mmap_size_bytes: int = field(
+        default_factory=lambda: int(os.getenv("POWERSNITCH_SQLITE_MMAP_SIZE_BYTES", str(256 * 1024 * 1024)))
+    )
+    sqlite_cache_size_kib: int = field(default_factory=lambda: int(os.getenv("POWERSNITCH_SQLITE_CACHE_SIZE_KIB", "16384")))
+    sqlite_busy_timeout_ms: int = field(default_factory=lambda: int(os.getenv("POWERSNITCH_SQLITE_BUSY_TIMEOUT_MS", "5000")))
+    sqlite_temp_store: str = field(default_factory=lambda: os.getenv("POWERSNITCH_SQLITE_TEMP_STORE", "memory"))
+    sqlite_read_pool_size: int = field(default_factory=lambda: int(os.getenv("POWERSNITCH_SQLITE_READ_POOL_SIZE", "4")))
     nut_list_command: str = field(default_factory=lambda: os.getenv("POWERSNITCH_NUT_LIST_COMMAND", "upsc -l"))
     nut_status_command: str = field(default_factory=lambda: os.getenv("POWERSNITCH_NUT_STATUS_COMMAND", "upsc {identifier}"))
+    nut_mode: str = field(default_factory=lambda: os.getenv("POWERSNITCH_NUT_MODE", "network"))
+    nut_host: str = field(default_factory=lambda: os.getenv("POWERSNITCH_NUT_HOST", "127.0.0.1"))
+    nut_port: int = field(default_factory=lambda: int(os.getenv("POWERSNITCH_NUT_PORT", "3493")))
+    nut_timeout_seconds: float = field(default_factory=lambda: float(os.getenv("POWERSNITCH_NUT_TIMEOUT_SECONDS", "5")))
+    nut_extra_hosts: list[str] = field(default_factory=lambda: _list_env("POWERSNITCH_NUT_EXTRA_HOSTS"))
+    nut_pool_size: int = field(default_factory=lambda: int(os.getenv("POWERSNITCH_NUT_POOL_SIZE", "2")))
+    nut_reconnect_backoff_seconds: float = field(
+        default_factory=lambda: float(os.getenv("POWERSNITCH_NUT_RECONNECT_BACKOFF_SECONDS", "1"))
+    )
+    nut_reconnect_backoff_max_seconds: float = field(
+        default_factory=lambda: float(os.getenv("POWERSNITCH_NUT_RECONNECT_BACKOFF_MAX_SECONDS", "60"))
+    )
+    monitor_max_concurrency: int = field(default_factory=lambda: int(os.getenv("POWERSNITCH_MONITOR_MAX_CONCURRENCY", "8")))
+    poll_timeout_seconds: float = field(default_factory=lambda: float(os.getenv("POWERSNITCH_POLL_TIMEOUT_SECONDS", "15")))
+    adaptive_quiet_seconds: float = field(default_factory=lambda: float(os.getenv("POWERSNITCH_ADAPTIVE_QUIET_SECONDS", "300")))
+    alert_workers: int = field(default_factory=lambda: int(os.getenv("POWERSNITCH_ALERT_WORKERS", "4")))
+    alert_queue_size: int = field(default_factory=lambda: int(os.getenv("POWERSNITCH_ALERT_QUEUE_SIZE", "1000")))
+    alert_drain_timeout_seconds: float = field(
+        default_factory=lambda: float(os.getenv("POWERSNITCH_ALERT_DRAIN_TIMEOUT_SECONDS", "30"))
+    )
+    alert_batch_size: int = field(default_factory=lambda: int(os.getenv("POWERSNITCH_ALERT_BATCH_SIZE", "50")))
+    alert_max_attempts: int = field(default_factory=lambda: int(os.getenv("POWERSNITCH_ALERT_MAX_ATTEMPTS", "10")))
+    alert_retry_base_seconds: float = field(
+        default_factory=lambda: float(os.getenv("POWERSNITCH_ALERT_RETRY_BASE_SECONDS", "30"))
+    )
+    alert_retry_max_seconds: float = field(
+        default_factory=lambda: float(os.getenv("POWERSNITCH_ALERT_RETRY_MAX_SECONDS", "3600"))
+    )
+    telemetry_batch_size: int = field(default_factory=lambda: int(os.getenv("POWERSNITCH_TELEMETRY_BATCH_SIZE", "200")))
+    telemetry_flush_interval_seconds: float = field(
+        default_factory=lambda: float(os.getenv("POWERSNITCH_TELEMETRY_FLUSH_INTERVAL_SECONDS", "2"))
+    )
+    telemetry_max_pending: int = field(default_factory=lambda: int(os.getenv("POWERSNITCH_TELEMETRY_MAX_PENDING", "5000")))
+    telemetry_partitioning: str = field(default_factory=lambda: os.getenv("POWERSNITCH_TELEMETRY_PARTITIONING", "none"))
+    telemetry_storage: str = field(default_factory=lambda: os.getenv("POWERSNITCH_TELEMETRY_STORAGE", "rows"))
+    telemetry_raw_retention_days: float = field(
+        default_factory=lambda: float(os.getenv("POWERSNITCH_TELEMETRY_RAW_RETENTION_DAYS", "7"))
+    )
+    telemetry_minute_retention_days: float = field(
+        default_factory=lambda: float(os.getenv("POWERSNITCH_TELEMETRY_MINUTE_RETENTION_DAYS", "90"))
+    )
+    telemetry_hour_retention_days: float = field(
+        default_factory=lambda: float(os.getenv("POWERSNITCH_TELEMETRY_HOUR_RETENTION_DAYS", "730"))
+    )
+    telemetry_prune_batch_size: int = field(
+        default_factory=lambda: int(os.getenv("POWERSNITCH_TELEMETRY_PRUNE_BATCH_SIZE", "500"))
+    )
+    telemetry_maintenance_interval_seconds: float = field(
+        default_factory=lambda: float(os.getenv("POWERSNITCH_TELEMETRY_MAINTENANCE_INTERVAL_SECONDS", "60"))
+    )
     startup_discovery: bool = field(default_factory=lambda: _bool_env("POWERSNITCH_STARTUP_DISCOVERY", True))
     influx_url: str | None = field(default_factory=lambda: os.getenv("POWERSNITCH_INFLUX_URL"))
     influx_org: str | None = field(default_factory=lambda: os.getenv("POWERSNITCH_INFLUX_ORG"))
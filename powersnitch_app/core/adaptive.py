@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Any
+
+from powersnitch_app.models import DeviceSnapshot
+
+
+DEFAULT_POLL_INTERVAL_SECONDS = 15.0
+
+# Conditions that keep polling tight for as long as they last. Others (such
+# as replace_battery) only tighten it when they come on.
+URGENT_CONDITIONS: frozenset[str] = frozenset({"on_battery", "low_battery", "shutdown_imminent"})
+# Conditions that mean the UPS could not be read; polling harder won't help.
+UNREACHABLE_CONDITIONS: frozenset[str] = frozenset({"ups_communication_lost", "unknown_state"})
+
+
+def base_interval(device: dict[str, Any]) -> float:
+    return float(device["poll_interval_seconds"] or DEFAULT_POLL_INTERVAL_SECONDS)
+
+
+def interval_bounds(device: dict[str, Any]) -> tuple[float, float]:
+    minimum = float(device.get("min_poll_interval_seconds") or 1)
+    maximum = float(device.get("max_poll_interval_seconds") or base_interval(device))
+    return minimum, max(minimum, maximum)
+
+
+@dataclass(slots=True)
+class _AdaptiveState:
+    interval: float
+    flags: frozenset[str] | None = None
+    active: frozenset[str] | None = None
+    quiet_since: float = 0.0
+
+
+class AdaptivePollPolicy:
+    """Picks a device's next poll interval from what its last poll saw."""
+
+    def __init__(self, quiet_seconds: float = 300.0):
+        self.quiet_seconds = quiet_seconds
+        self._states: dict[int, _AdaptiveState] = {}
+
+    def interval_for(self, device: dict[str, Any]) -> float:
+        device_id = int(device["id"])
+        if not device.get("adaptive_polling"):
+            self._states.pop(device_id, None)
+            return base_interval(device)
+        minimum, maximum = interval_bounds(device)
+        state = self._states.get(device_id)
+        if state is None:
+            state = _AdaptiveState(interval=base_interval(device))
+            self._states[device_id] = state
+        state.interval = min(max(state.interval, minimum), maximum)
+        return state.interval
+
+    def observe(
+        self,
+        device: dict[str, Any],
+        snapshot: DeviceSnapshot,
+        active: Iterable[str],
+        now: float,
+    ) -> float:
+        interval = self.interval_for(device)
+        state = self._states.get(int(device["id"]))
+        if state is None:
+            return interval
+        minimum, maximum = interval_bounds(device)
+        active = frozenset(active)
+        if active & UNREACHABLE_CONDITIONS:
+            # Keep the last flags and conditions seen, so a change during the
+            # outage still counts once the UPS answers again.
+            state.interval = min(state.interval * 2, maximum)
+            return state.interval
+        flags = frozenset(snapshot.status_flags)
+        changed = state.flags is not None and flags != state.flags
+        raised = state.active is not None and bool(active - state.active)
+        state.flags = flags
+        state.active = active
+        if changed or raised or active & URGENT_CONDITIONS:
+            state.interval = minimum
+            state.quiet_since = now
+        elif now - state.quiet_since >= self.quiet_seconds:
+            state.interval = min(state.interval * 2, maximum)
+        return state.interval
+
+    def retain(self, device_ids: Iterable[int]) -> None:
+        keep = set(device_ids)
+        for device_id in list(self._states):
+            if device_id not in keep:
+                del self._states[device_id]
@@ -1,6 +1,12 @@
 from __future__ import annotations
 
-from powersnitch_app.models import ConditionResult, DeviceSnapshot, STATUS_FLAGS
+from collections.abc import Callable, Iterable, Mapping
+
+from powersnitch_app.core.expressions import Expression
+from powersnitch_app.models import CONDITIONS, CUSTOM_CONDITION_PREFIX, ConditionResult, DeviceSnapshot, STATUS_FLAGS
+
+
+ConditionCheck = Callable[[DeviceSnapshot], bool]
 
 
 def evaluate_conditions(
@@ -53,6 +59,98 @@ def evaluate_conditions(
     return results
 
 
+class CompiledConditions:
+    """Evaluator for a fixed set of condition keys, built once per device."""
+
+    def __init__(
+        self,
+        keys: Iterable[str],
+        battery_low_pct_threshold: float,
+        runtime_low_threshold_seconds: float,
+        custom: Mapping[str, Expression] | None = None,
+    ):
+        self.battery_low_pct_threshold = battery_low_pct_threshold
+        self.runtime_low_threshold_seconds = runtime_low_threshold_seconds
+        self.custom = dict(custom or {})
+        self.keys = tuple(dict.fromkeys(keys))
+        self._checks: dict[str, ConditionCheck] = {key: self._compile(key) for key in self.keys}
+        self._items = tuple(self._checks.items())
+
+    def evaluate(self, snapshot: DeviceSnapshot) -> dict[str, bool]:
+        return {key: check(snapshot) for key, check in self._items}
+
+    def check(self, key: str, snapshot: DeviceSnapshot) -> bool:
+        check = self._checks.get(key)
+        if check is None:
+            check = self._checks[key] = self._compile(key)
+        return check(snapshot)
+
+    def result(self, key: str, snapshot: DeviceSnapshot) -> ConditionResult:
+        active = self.check(key, snapshot)
+        expression = self.custom.get(key)
+        if expression is not None:
+            values = {name: snapshot.raw_data[name] for name in expression.variables if name in snapshot.raw_data}
+            value = ", ".join(f"{name}={raw}" for name, raw in values.items()) or None
+            return ConditionResult(key, active, value, f"{expression.source} is {'true' if active else 'false'}")
+        flag = STATUS_FLAGS.get(key)
+        if flag is not None:
+            return ConditionResult(
+                key=key,
+                active=active,
+                value=flag if active else None,
+                reason=f"UPS status contains {flag}" if active else f"{flag} not present",
+            )
+        if key == "battery_low_pct":
+            return ConditionResult(key, active, snapshot.battery_charge, f"Battery below {self.battery_low_pct_threshold}%")
+        if key == "runtime_low":
+            return ConditionResult(
+                key,
+                active,
+                snapshot.runtime_seconds,
+                f"Runtime below {self.runtime_low_threshold_seconds} seconds",
+            )
+        if key == "ups_communication_lost":
+            return ConditionResult(key, active, None, "UPS polling failed" if active else "UPS reachable")
+        return ConditionResult(key, active, None, "No UPS status flags reported" if active else "UPS flags reported")
+
+    def _compile(self, key: str) -> ConditionCheck:
+        if key.startswith(CUSTOM_CONDITION_PREFIX):
+            expression = self.custom.get(key)
+            if expression is None:
+                # The rule behind this key is gone; let its condition clear.
+                return lambda snapshot: False
+            return lambda snapshot: expression(snapshot.raw_data)
+        flag = STATUS_FLAGS.get(key)
+        if flag is not None:
+            return lambda snapshot: flag in snapshot.status_flags
+        if key == "battery_low_pct":
+            battery_threshold = self.battery_low_pct_threshold
+            return lambda snapshot: snapshot.battery_charge is not None and snapshot.battery_charge < battery_threshold
+        if key == "runtime_low":
+            runtime_threshold = self.runtime_low_threshold_seconds
+            return lambda snapshot: snapshot.runtime_seconds is not None and snapshot.runtime_seconds < runtime_threshold
+        if key == "ups_communication_lost":
+            return lambda snapshot: not snapshot.is_reachable
+        if key == "unknown_state":
+            return lambda snapshot: not snapshot.status_flags
+        raise ValueError(f"Unknown condition key: {key}")
+
+
+def compile_conditions(
+    keys: Iterable[str] | None,
+    battery_low_pct_threshold: float,
+    runtime_low_threshold_seconds: float,
+    custom: Mapping[str, Expression] | None = None,
+) -> CompiledConditions:
+    """Compile ``keys``, or every known and custom condition when ``keys`` is ``None``."""
+    return CompiledConditions(
+        [*CONDITIONS, *(custom or {})] if keys is None else keys,
+        battery_low_pct_threshold,
+        runtime_low_threshold_seconds,
+        custom,
+    )
+
+
 def build_alert_text(
     ups_name: str,
     condition_key: str,
@@ -61,7 +159,8 @@ def build_alert_text(
     extra_text: str = "",
 ) -> tuple[str, str]:
     title_state = "Recovered" if condition_state == "recovered" else "Active"
-    subject = f"{ups_name}: {condition_key.replace('_', ' ')} {title_state.lower()}"
+    label = condition_key.removeprefix(CUSTOM_CONDITION_PREFIX)
+    subject = f"{ups_name}: {label.replace('_', ' ')} {title_state.lower()}"
     lines = [
         f"UPS: {ups_name}",
         f"Condition: {condition_key}",
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+from collections.abc import AsyncIterable, AsyncIterator, Iterable, Mapping
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any
+
+from powersnitch_app.blocks import BlockSample
+from powersnitch_app.models import TELEMETRY_METRICS, DeviceSnapshot
+from powersnitch_app.partitions import as_utc
+
+
+@dataclass(slots=True)
+class _StoredSample:
+    observed_at: datetime
+    flags: frozenset[str]
+    values: tuple[float | None, ...]
+
+
+def outside_deadband(previous: float | None, current: float | None, percent: float) -> bool:
+    """Whether ``current`` moved at least ``percent`` of ``previous`` away from it."""
+    if previous is None or current is None:
+        return (previous is None) != (current is None)
+    if current == previous:
+        return False
+    return abs(current - previous) >= abs(previous) * percent / 100
+
+
+class DeadbandFilter:
+    """Decides which polled snapshots of a device are worth a telemetry row."""
+
+    def __init__(self) -> None:
+        self._last: dict[int, _StoredSample] = {}
+
+    def admit(self, device: dict[str, Any], snapshot: DeviceSnapshot) -> bool:
+        device_id = int(device["id"])
+        if not device.get("deadband_enabled"):
+            self._last.pop(device_id, None)
+            return True
+        flags = frozenset(snapshot.status_flags)
+        values = tuple(getattr(snapshot, metric) for metric in TELEMETRY_METRICS)
+        last = self._last.get(device_id)
+        if last is not None and flags == last.flags:
+            heartbeat = timedelta(seconds=float(device.get("deadband_heartbeat_seconds") or 0))
+            percent = float(device.get("deadband_percent") or 0)
+            if snapshot.observed_at - last.observed_at < heartbeat and not any(
+                outside_deadband(previous, current, percent) for previous, current in zip(last.values, values)
+            ):
+                return False
+        self._last[device_id] = _StoredSample(snapshot.observed_at, flags, values)
+        return True
+
+    def retain(self, device_ids: Iterable[int]) -> None:
+        keep = set(device_ids)
+        for device_id in list(self._last):
+            if device_id not in keep:
+                del self._last[device_id]
+
+
+def hold_interval(device: Mapping[str, Any]) -> float:
+    """Seconds between the polls a deadband device skipped storing."""
+    # Adaptive devices poll at their maximum interval while nothing changes.
+    if device["adaptive_polling"]:
+        return float(device["max_poll_interval_seconds"])
+    return float(device["poll_interval_seconds"])
+
+
+async def step_hold(
+    samples: AsyncIterable[BlockSample],
+    interval_seconds: float,
+    heartbeat_seconds: float,
+    until: datetime | None = None,
+) -> AsyncIterator[BlockSample]:
+    """Re-expand deadband-filtered samples onto the poll grid."""
+    step = timedelta(seconds=interval_seconds)
+    heartbeat = timedelta(seconds=heartbeat_seconds)
+    held: BlockSample | None = None
+    async for sample in samples:
+        if held is not None:
+            yield held
+            if _holds(sample[0] - held[0], step, heartbeat):
+                for moment in _gaps(held[0], sample[0], step):
+                    yield (moment, *held[1:])
+        held = sample
+    if held is not None:
+        yield held
+        if until is not None and _holds(as_utc(until) - held[0], step, heartbeat):
+            for moment in _gaps(held[0], as_utc(until) + step, step):
+                yield (moment, *held[1:])
+
+
+def hold_series(
+    samples: list[dict[str, Any]],
+    previous: dict[str, Any] | None,
+    start: datetime,
+    end: datetime,
+) -> list[dict[str, Any]]:
+    """Extend a filtered series, from ``previous`` on, so it spans ``[start, end]``."""
+    series = list(samples)
+    if previous is not None and (not series or series[0]["observed_at"] > _iso(start)):
+        series.insert(0, {**previous, "observed_at": _iso(start)})
+    if series and series[-1]["observed_at"] < _iso(end):
+        series.append({**series[-1], "observed_at": _iso(end)})
+    return series
+
+
+def _iso(moment: datetime) -> str:
+    return moment.replace(tzinfo=None).isoformat()
+
+
+def _holds(gap: timedelta, step: timedelta, heartbeat: timedelta) -> bool:
+    """Whether a gap between stored samples was filled by suppressed polls."""
+    # The filter stores a sample at least once per heartbeat, so a longer gap
+    # is an outage; one off the step grid was polled at another rate.
+    if gap > heartbeat + step / 2:
+        return False
+    offset = gap % step
+    return min(offset, step - offset) <= step / 4
+
+
+def _gaps(start: datetime, end: datetime, step: timedelta) -> Iterable[datetime]:
+    moment = start + step
+    while end - moment > step / 2:
+        yield moment
+        moment += step
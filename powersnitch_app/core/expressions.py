@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import ast
+import math
+import operator
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+
+MAX_EXPRESSION_LENGTH = 500
+MAX_EXPRESSION_NODES = 100
+
+Values = dict[str, Any]
+Evaluator = Callable[[Values], Any]
+
+_COMPARE: dict[type[ast.cmpop], Callable[[Any, Any], bool]] = {
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.In: lambda left, right: left in right,
+    ast.NotIn: lambda left, right: left not in right,
+}
+_ARITHMETIC: dict[type[ast.operator], Callable[[Any, Any], Any]] = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+}
+
+
+class ExpressionError(ValueError):
+    pass
+
+
+@dataclass(frozen=True, slots=True)
+class Expression:
+    """A condition over NUT variables; it never fires on a variable the UPS does not report."""
+
+    source: str
+    variables: tuple[str, ...]
+    _evaluate: Evaluator
+
+    def __call__(self, raw_data: Values) -> bool:
+        return bool(self._evaluate(raw_data))
+
+
+def compile_expression(source: str) -> Expression:
+    """Parse and compile ``source``; raises ``ExpressionError`` if it is not allowed."""
+    source = source.strip()
+    if not source:
+        raise ExpressionError("Expression is empty")
+    if len(source) > MAX_EXPRESSION_LENGTH:
+        raise ExpressionError(f"Expression is longer than {MAX_EXPRESSION_LENGTH} characters")
+    try:
+        tree = ast.parse(source, mode="eval")
+    except SyntaxError as exc:
+        raise ExpressionError(f"Invalid expression: {exc.msg}") from None
+    if sum(1 for _ in ast.walk(tree)) > MAX_EXPRESSION_NODES:
+        raise ExpressionError("Expression is too complex")
+    variables: list[str] = []
+    evaluate = _compile(tree.body, variables)
+    return Expression(ast.unparse(tree), tuple(dict.fromkeys(variables)), evaluate)
+
+
+def _compile(node: ast.expr, variables: list[str]) -> Evaluator:
+    if isinstance(node, ast.Constant) and isinstance(node.value, (bool, int, float, str)):
+        value = node.value
+        return lambda values: value
+    if isinstance(node, (ast.Name, ast.Attribute)):
+        return _variable(_dotted_name(node), variables)
+    if isinstance(node, ast.Call):
+        return _call(node, variables)
+    if isinstance(node, ast.BoolOp):
+        return _logical(isinstance(node.op, ast.And), tuple(_compile(value, variables) for value in node.values))
+    if isinstance(node, ast.UnaryOp):
+        operand = _compile(node.operand, variables)
+        if isinstance(node.op, ast.Not):
+            return lambda values: _negate(operand(values))
+        if isinstance(node.op, ast.USub):
+            return _arithmetic(operator.neg, operand)
+        if isinstance(node.op, ast.UAdd):
+            return operand
+    if isinstance(node, ast.BinOp) and type(node.op) in _ARITHMETIC:
+        return _arithmetic(
+            _ARITHMETIC[type(node.op)], _compile(node.left, variables), _compile(node.right, variables)
+        )
+    if isinstance(node, ast.Compare):
+        return _compare(node, variables)
+    raise ExpressionError(f"Unsupported syntax: {ast.unparse(node)}")
+
+
+def _compare(node: ast.Compare, variables: list[str]) -> Evaluator:
+    operands = [_compile(node.left, variables), *(_compile(item, variables) for item in node.comparators)]
+    steps = []
+    for index, op in enumerate(node.ops):
+        if type(op) not in _COMPARE:
+            raise ExpressionError(f"Unsupported comparison: {ast.unparse(node)}")
+        steps.append((_COMPARE[type(op)], operands[index], operands[index + 1]))
+
+    def evaluate(values: Values) -> bool | None:
+        for compare, left, right in steps:
+            left_value = left(values)
+            right_value = right(values)
+            if left_value is None or right_value is None:
+                return None
+            try:
+                if not compare(left_value, right_value):
+                    return False
+            except TypeError:
+                return None
+        return True
+
+    return evaluate
+
+
+def _logical(conjunction: bool, parts: tuple[Evaluator, ...]) -> Evaluator:
+    """``and``/``or`` where ``None`` means unknown: it decides nothing and stays unknown."""
+
+    def evaluate(values: Values) -> bool | None:
+        unknown = False
+        for part in parts:
+            value = part(values)
+            if value is None:
+                unknown = True
+            elif bool(value) != conjunction:
+                return not conjunction
+        return None if unknown else conjunction
+
+    return evaluate
+
+
+def _negate(value: Any) -> bool | None:
+    return None if value is None else not value
+
+
+def _call(node: ast.Call, variables: list[str]) -> Evaluator:
+    name = node.func.id if isinstance(node.func, ast.Name) else None
+    if node.keywords or len(node.args) != 1:
+        raise ExpressionError(f"Unsupported call: {ast.unparse(node)}")
+    argument = node.args[0]
+    if name == "var":
+        if not isinstance(argument, ast.Constant) or not isinstance(argument.value, str):
+            raise ExpressionError("var() takes a quoted variable name")
+        return _variable(argument.value, variables)
+    if name == "abs":
+        return _arithmetic(abs, _compile(argument, variables))
+    raise ExpressionError(f"Unsupported call: {ast.unparse(node)}")
+
+
+def _variable(name: str, variables: list[str]) -> Evaluator:
+    variables.append(name)
+
+    def evaluate(values: Values) -> Any:
+        value = values.get(name)
+        if isinstance(value, str):
+            try:
+                return float(value)
+            except ValueError:
+                return value
+        return value
+
+    return evaluate
+
+
+def _dotted_name(node: ast.expr) -> str:
+    parts: list[str] = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if not isinstance(node, ast.Name):
+        raise ExpressionError(f"Unsupported syntax: {ast.unparse(node)}")
+    parts.append(node.id)
+    return ".".join(reversed(parts))
+
+
+def _arithmetic(apply: Callable[..., Any], *operands: Evaluator) -> Evaluator:
+    """``apply`` to the operands when all are numbers; otherwise, or on overflow, ``None``."""
+
+    def evaluate(values: Values) -> Any:
+        arguments = [operand(values) for operand in operands]
+        if not all(_is_number(argument) for argument in arguments):
+            return None
+        try:
+            result = apply(*arguments)
+        except (ZeroDivisionError, OverflowError):
+            return None
+        if isinstance(result, float) and not math.isfinite(result):
+            return None
+        return result
+
+    return evaluate
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
@@ -2,53 +2,126 @@ from __future__ import annotations
 
 import asyncio
 import contextlib
+import logging
 from datetime import UTC, datetime, timedelta
 from typing import Any
 
-from powersnitch_app.core.conditions import build_alert_text, evaluate_conditions
+from powersnitch_app.core.adaptive import AdaptivePollPolicy
+from powersnitch_app.core.conditions import build_alert_text
+from powersnitch_app.core.deadband import DeadbandFilter
+from powersnitch_app.core.outbox import AlertJob, AlertOutbox
+from powersnitch_app.core.rollups import TelemetryMaintenance
+from powersnitch_app.core.rules import RuleStateEngine
+from powersnitch_app.core.scheduler import PollScheduler
+from powersnitch_app.core.tasks import cancel_and_wait
+from powersnitch_app.core.telemetry_writer import TelemetryWriter
 from powersnitch_app.integrations.influx import InfluxTelemetryMirror
 from powersnitch_app.integrations.notifications import NotificationDispatcher
-from powersnitch_app.integrations.nut import NutClient, metadata_from_status
+from powersnitch_app.integrations.nut import NutClient, UpsdClient, metadata_from_status, snapshot_from_status
 from powersnitch_app.models import DeviceSnapshot
 from powersnitch_app.storage import Repository
 
 
+IDLE_WAKE_SECONDS = 1.0
+
+logger = logging.getLogger(__name__)
+
+
 class MonitorService:
     def __init__(
         self,
         repository: Repository,
-        nut_client: NutClient,
+        nut_client: NutClient | UpsdClient,
         notifier: NotificationDispatcher,
         telemetry: InfluxTelemetryMirror,
+        max_concurrency: int = 8,
+        poll_timeout_seconds: float = 15.0,
+        adaptive_quiet_seconds: float = 300.0,
+        alert_workers: int = 4,
+        alert_queue_size: int = 1000,
+        alert_drain_timeout_seconds: float = 30.0,
+        alert_batch_size: int = 50,
+        alert_max_attempts: int = 10,
+        alert_retry_base_seconds: float = 30.0,
+        alert_retry_max_seconds: float = 3600.0,
+        telemetry_batch_size: int = 200,
+        telemetry_flush_interval_seconds: float = 2.0,
+        telemetry_max_pending: int = 5000,
+        telemetry_raw_retention_days: float = 7,
+        telemetry_minute_retention_days: float = 90,
+        telemetry_hour_retention_days: float = 730,
+        telemetry_prune_batch_size: int = 500,
+        telemetry_maintenance_interval_seconds: float = 60.0,
     ):
         self.repository = repository
         self.nut_client = nut_client
         self.notifier = notifier
         self.telemetry = telemetry
+        self.poll_timeout_seconds = poll_timeout_seconds
+        self.alert_drain_timeout_seconds = alert_drain_timeout_seconds
+        self.outbox = AlertOutbox(
+            repository,
+            notifier,
+            workers=alert_workers,
+            queue_size=alert_queue_size,
+            batch_size=alert_batch_size,
+            max_attempts=alert_max_attempts,
+            retry_base_seconds=alert_retry_base_seconds,
+            retry_max_seconds=alert_retry_max_seconds,
+        )
+        self.writer = TelemetryWriter(
+            repository,
+            batch_size=telemetry_batch_size,
+            flush_interval=telemetry_flush_interval_seconds,
+            max_pending=telemetry_max_pending,
+        )
+        self.maintenance = TelemetryMaintenance(
+            repository,
+            raw_retention_days=telemetry_raw_retention_days,
+            minute_retention_days=telemetry_minute_retention_days,
+            hour_retention_days=telemetry_hour_retention_days,
+            batch_size=telemetry_prune_batch_size,
+            interval_seconds=telemetry_maintenance_interval_seconds,
+        )
+        self.scheduler = PollScheduler()
+        self.adaptive = AdaptivePollPolicy(adaptive_quiet_seconds)
+        self.deadband = DeadbandFilter()
+        self.rules = RuleStateEngine(repository)
+        self._poll_slots = asyncio.Semaphore(max(max_concurrency, 1))
+        self._polls: set[asyncio.Task[None]] = set()
+        self._devices: dict[int, dict[str, Any]] = {}
+        self._devices_generation: int | None = None
         self._task: asyncio.Task[Any] | None = None
         self._stop = asyncio.Event()
+        self._wake = asyncio.Event()
 
     async def startup(self, discover: bool = True) -> None:
         if discover:
             await self.discover_devices()
         self._stop.clear()
+        self.outbox.start()
+        self.writer.start()
+        self.maintenance.start()
         self._task = asyncio.create_task(self._run())
 
     async def shutdown(self) -> None:
         self._stop.set()
+        self._wake.set()
         if self._task:
-            self._task.cancel()
-            with contextlib.suppress(asyncio.CancelledError):
-                await self._task
+            await cancel_and_wait(self._task)
+        await cancel_and_wait(*self._polls)
+        await self.maintenance.shutdown()
+        await self.writer.shutdown()
+        await self.outbox.shutdown(self.alert_drain_timeout_seconds)
+        await self.nut_client.close()
 
     async def discover_devices(self) -> list[dict[str, Any]]:
         discovered: list[dict[str, Any]] = []
-        for identifier in await self.nut_client.discover():
-            try:
-                status = await self.nut_client.fetch_status(identifier)
-            except Exception:
-                status = {}
-            metadata = metadata_from_status(status)
+        identifiers = await self.nut_client.discover()
+        statuses = await self.nut_client.fetch_many(identifiers)
+        for identifier in identifiers:
+            status = statuses.get(identifier)
+            metadata = metadata_from_status(status if isinstance(status, dict) else {})
             name = metadata.get("model") or identifier
             device_id = await self.repository.upsert_device(identifier, name.strip(), metadata)
             device = await self.repository.get_device(device_id)
@@ -57,82 +130,168 @@ class MonitorService:
         return discovered
 
     async def run_once(self) -> None:
-        for device in await self.repository.list_devices():
-            if not device["enabled"]:
-                continue
-            await self._poll_device(device)
+        devices = [device for device in await self.repository.list_devices() if device["enabled"]]
+        await self._poll_batch(devices)
+
+    def schedule_status(self) -> list[dict[str, Any]]:
+        now = asyncio.get_running_loop().time()
+        wall_now = datetime.now(UTC)
+        status: list[dict[str, Any]] = []
+        for entry in self.scheduler.entries():
+            device = self._devices.get(entry.device_id, {})
+            due_in = 0.0 if entry.in_flight else max(entry.next_due - now, 0.0)
+            status.append(
+                {
+                    "device_id": entry.device_id,
+                    "display_name": device.get("display_name"),
+                    "interval_seconds": entry.interval,
+                    "polling": entry.in_flight,
+                    "next_due_in_seconds": round(due_in, 1),
+                    "next_due_at": (wall_now + timedelta(seconds=due_in)).replace(microsecond=0).isoformat(),
+                    "last_drift_seconds": round(entry.last_drift, 3),
+                    "max_drift_seconds": round(entry.max_drift, 3),
+                    "last_duration_seconds": round(entry.last_duration, 3),
+                    "missed_deadlines": entry.missed,
+                    "timeouts": entry.timeouts,
+                    "polls": entry.polls,
+                }
+            )
+        return status
 
     async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
         while not self._stop.is_set():
-            await self.run_once()
-            await asyncio.sleep(10)
+            await self._sync_schedule()
+            if self._stop.is_set():
+                return
+            for device_id in self.scheduler.pop_due(loop.time()):
+                task = asyncio.create_task(self._run_scheduled_poll(self._devices[device_id]))
+                self._polls.add(task)
+                task.add_done_callback(self._polls.discard)
+            delay = self.scheduler.next_due_in(loop.time())
+            wait = IDLE_WAKE_SECONDS if delay is None else min(delay, IDLE_WAKE_SECONDS)
+            self._wake.clear()
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wake.wait(), wait)
 
-    async def _poll_device(self, device: dict[str, Any]) -> None:
+    async def _run_scheduled_poll(self, device: dict[str, Any]) -> None:
+        timed_out = False
         try:
-            snapshot = await self.nut_client.snapshot(device["identifier"])
-            await self.repository.save_snapshot(device["id"], snapshot)
-            await self.telemetry.write_snapshot(device["display_name"], snapshot)
+            timed_out = not await self._poll_bounded(device)
         except Exception:
-            snapshot = DeviceSnapshot(
-                identifier=device["identifier"],
-                observed_at=datetime.now(UTC).replace(microsecond=0),
-                status_flags=set(),
-                battery_charge=None,
-                runtime_seconds=None,
-                input_voltage=None,
-                output_voltage=None,
-                load_percent=None,
-                raw_data={},
-                is_reachable=False,
-            )
-        await self._evaluate_device_rules(device, snapshot)
-
-    async def _evaluate_device_rules(self, device: dict[str, Any], snapshot: DeviceSnapshot) -> None:
-        results = {
-            result.key: result
-            for result in evaluate_conditions(
-                snapshot,
-                float(device["battery_low_pct_threshold"]),
-                float(device["runtime_low_threshold_seconds"]),
+            logger.exception("polling %s failed", device["identifier"])
+        finally:
+            self.scheduler.complete(int(device["id"]), asyncio.get_running_loop().time(), timed_out=timed_out)
+            self._wake.set()
+
+    async def _sync_schedule(self) -> None:
+        generation = self.repository.generation("devices")
+        if generation == self._devices_generation:
+            return
+        devices = await self.repository.list_devices()
+        self._devices = {int(device["id"]): device for device in devices if device["enabled"]}
+        self._devices_generation = generation
+        self.adaptive.retain(self._devices)
+        self.deadband.retain(self._devices)
+        self.scheduler.sync(
+            {device_id: self.adaptive.interval_for(device) for device_id, device in self._devices.items()},
+            asyncio.get_running_loop().time(),
+        )
+
+    async def _poll_batch(self, devices: list[dict[str, Any]]) -> None:
+        await asyncio.gather(*(self._poll_bounded(device) for device in devices))
+
+    async def _poll_bounded(self, device: dict[str, Any]) -> bool:
+        async with self._poll_slots:
+            return await self._poll_device(device)
+
+    async def _poll_device(self, device: dict[str, Any]) -> bool:
+        """Poll one device; returns ``False`` if the NUT fetch hit its deadline."""
+        timed_out = False
+        try:
+            status = await asyncio.wait_for(
+                self.nut_client.fetch_status(device["identifier"]),
+                self.poll_timeout_seconds,
             )
-        }
-        rules = await self.repository.get_rules_for_device(int(device["id"]))
-        for rule in rules:
-            result = results.get(rule["condition_key"])
-            if not result:
-                continue
-            active = await self.repository.get_active_condition(device["id"], rule["condition_key"])
-            should_send_active = False
-            should_send_recovery = False
-            if result.active and not active:
-                await self.repository.open_or_update_active_condition(
-                    device["id"],
-                    result.key,
-                    result.value,
-                    result.reason,
-                )
-                should_send_active = True
-            elif result.active and active:
-                await self.repository.open_or_update_active_condition(
-                    device["id"],
-                    result.key,
-                    result.value,
-                    result.reason,
+        except asyncio.TimeoutError:
+            timed_out = True
+            status = {}
+        except Exception:
+            status = {}
+        try:
+            snapshot = snapshot_from_status(device["identifier"], status)
+            if snapshot.is_reachable:
+                await self.writer.submit(
+                    int(device["id"]), snapshot, store_sample=self.deadband.admit(device, snapshot)
                 )
-                last_alerted = active["last_alerted_at"]
-                if self._interval_due(last_alerted, int(rule["repeat_interval_seconds"] or 0)):
-                    should_send_active = True
-            elif not result.active and active:
-                should_send_recovery = bool(rule["send_recovery"])
+                await self.telemetry.write_snapshot(device["display_name"], snapshot)
+        except Exception:
+            snapshot = self._unreachable_snapshot(device)
+        try:
+            # Condition changes and the alerts they queue commit together.
+            async with self.repository.unit_of_work():
+                active = await self._evaluate_device_rules(device, snapshot)
+        except Exception:
+            self.rules.forget(int(device["id"]))
+            raise
+        now = asyncio.get_running_loop().time()
+        self.scheduler.set_interval(int(device["id"]), self.adaptive.observe(device, snapshot, active, now), now)
+        return not timed_out
+
+    def _unreachable_snapshot(self, device: dict[str, Any]) -> DeviceSnapshot:
+        return DeviceSnapshot(
+            identifier=device["identifier"],
+            observed_at=datetime.now(UTC).replace(microsecond=0),
+            status_flags=set(),
+            battery_charge=None,
+            runtime_seconds=None,
+            input_voltage=None,
+            output_voltage=None,
+            load_percent=None,
+            raw_data={},
+            is_reachable=False,
+        )
 
-            if should_send_active:
+    async def _evaluate_device_rules(
+        self,
+        device: dict[str, Any],
+        snapshot: DeviceSnapshot,
+    ) -> list[str]:
+        """Apply the device's rules to ``snapshot``; returns the active condition keys."""
+        device_id = int(device["id"])
+        evaluator = await self.rules.evaluator_for(device)
+        states = evaluator.evaluate(snapshot)
+        active_keys = [key for key, active in states.items() if active]
+        rules = await self.rules.rules_for(device_id)
+        if not rules:
+            return active_keys
+        active_conditions = await self.rules.active_conditions(device_id)
+        # Decide every rule against the state as it stood before this poll, so
+        # several channels on one condition all see the same transition.
+        previous = dict(active_conditions)
+        alerted: set[str] = set()
+        for rule in rules:
+            key = rule["condition_key"]
+            if key not in states:
+                continue
+            active = previous.get(key)
+            if states[key] and not active:
                 await self._send_rule_alert(device, rule, snapshot, "active")
-                await self.repository.mark_condition_alerted(device["id"], result.key)
-            elif should_send_recovery:
+                alerted.add(key)
+            elif states[key] and active:
+                if self._interval_due(active["last_alerted_at"], int(rule["repeat_interval_seconds"] or 0)):
+                    await self._send_rule_alert(device, rule, snapshot, "active")
+                    alerted.add(key)
+            elif not states[key] and active and rule["send_recovery"]:
                 await self._send_rule_alert(device, rule, snapshot, "recovered")
-                await self.repository.clear_active_condition(device["id"], result.key)
-            elif not result.active and active and not should_send_recovery:
-                await self.repository.clear_active_condition(device["id"], result.key)
+        for key in alerted:
+            result = evaluator.result(key, snapshot)
+            await self.rules.record_alert(device_id, key, result.value, result.reason)
+        for key in previous:
+            active = states[key] if key in states else evaluator.check(key, snapshot)
+            if not active:
+                await self.rules.clear(device_id, key)
+        return active_keys
 
     def _interval_due(self, last_alerted_at: str | None, seconds: int) -> bool:
         if not seconds:
@@ -140,6 +299,8 @@ class MonitorService:
         if not last_alerted_at:
             return True
         last_time = datetime.fromisoformat(last_alerted_at)
+        if last_time.tzinfo is None:
+            last_time = last_time.replace(tzinfo=UTC)
         return datetime.now(UTC) >= last_time + timedelta(seconds=seconds)
 
     async def _send_rule_alert(
@@ -156,13 +317,6 @@ class MonitorService:
             snapshot,
             rule.get("extra_text", ""),
         )
-        result = await self.notifier.deliver(
-            rule["service_type"],
-            rule["service_config"],
-            rule["target"],
-            subject,
-            body,
-        )
         payload = {
             "subject": subject,
             "body": body,
@@ -170,15 +324,14 @@ class MonitorService:
             "service_name": rule["service_name"],
             "channel_name": rule["channel_name"],
         }
-        await self.repository.log_alert_event(
-            device["id"],
-            rule["channel_id"],
-            rule["condition_key"],
-            state,
-            result.provider,
-            result.target,
-            result.success,
-            payload,
-            result.response_code,
-            result.error_message,
+        await self.outbox.enqueue(
+            AlertJob(
+                device_id=device["id"],
+                channel_id=rule["channel_id"],
+                condition_key=rule["condition_key"],
+                condition_state=state,
+                subject=subject,
+                body=body,
+                payload=payload,
+            )
         )
@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from powersnitch_app.core.tasks import cancel_and_wait
+from powersnitch_app.integrations.notifications import NotificationDispatcher
+from powersnitch_app.storage import Repository, utcnow
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class AlertJob:
+    device_id: int | None
+    channel_id: int | None
+    condition_key: str
+    condition_state: str
+    subject: str
+    body: str
+    payload: dict[str, Any]
+    outbox_id: int | None = None
+    attempts: int = 0
+    created_at: datetime | None = None
+    service_type: str = ""
+    service_config: dict[str, Any] = field(default_factory=dict)
+    target: dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_outbox(cls, row: dict[str, Any]) -> AlertJob:
+        created_at = datetime.fromisoformat(row["created_at"])
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=UTC)
+        return cls(
+            device_id=row["ups_device_id"],
+            channel_id=row["channel_id"],
+            condition_key=row["condition_key"],
+            condition_state=row["condition_state"],
+            subject=row["subject"],
+            body=row["body"],
+            payload=row["payload"],
+            outbox_id=row["id"],
+            attempts=row["attempts"],
+            created_at=created_at,
+            service_type=row["service_type"],
+            service_config=row["service_config"],
+            target=row["target"],
+        )
+
+
+@dataclass(slots=True)
+class OutboxMetrics:
+    enqueued: int = 0
+    started: int = 0
+    delivered: int = 0
+    failed: int = 0
+    retried: int = 0
+    dead: int = 0
+    pending: int = 0
+    total_wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+    last_wait_seconds: float = 0.0
+
+
+class AlertOutbox:
+    """Durable alert delivery backed by the ``notification_outbox`` table."""
+
+    def __init__(
+        self,
+        repository: Repository,
+        notifier: NotificationDispatcher,
+        workers: int = 4,
+        queue_size: int = 1000,
+        batch_size: int = 50,
+        max_attempts: int = 10,
+        retry_base_seconds: float = 30.0,
+        retry_max_seconds: float = 3600.0,
+        idle_poll_seconds: float = 5.0,
+    ):
+        self.repository = repository
+        self.notifier = notifier
+        self.worker_count = max(workers, 1)
+        self.batch_size = max(batch_size, 1)
+        self.max_attempts = max(max_attempts, 1)
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.idle_poll_seconds = idle_poll_seconds
+        self.metrics = OutboxMetrics()
+        self._queue: asyncio.Queue[AlertJob] = asyncio.Queue(maxsize=max(queue_size, 1))
+        self._in_flight: set[int] = set()
+        self._wake = asyncio.Event()
+        self._dispatcher: asyncio.Task[None] | None = None
+        self._workers: list[asyncio.Task[None]] = []
+        self._closed = False
+        self._stopping = False
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def start(self) -> None:
+        self._closed = False
+        self._stopping = False
+        if self._dispatcher is None:
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._work()) for _ in range(self.worker_count)]
+
+    async def enqueue(self, job: AlertJob) -> int:
+        outbox_id = await self.repository.enqueue_notification(
+            job.device_id,
+            job.channel_id,
+            job.condition_key,
+            job.condition_state,
+            job.subject,
+            job.body,
+            job.payload,
+        )
+        self.metrics.enqueued += 1
+        # Inside a unit of work the row is not visible to the dispatcher
+        # until the poll's transaction commits.
+        self.repository.after_commit(self._notify)
+        return outbox_id
+
+    def _notify(self) -> None:
+        if not self._closed:
+            self.start()
+            self._wake.set()
+
+    async def join(self) -> None:
+        """Wait until every row that is due right now has been attempted."""
+        while True:
+            self._wake.set()
+            await asyncio.sleep(0)
+            await self._queue.join()
+            if not self._in_flight and not await self.repository.due_notifications(1):
+                return
+
+    async def shutdown(self, drain_timeout: float = 30.0) -> None:
+        """Give due alerts up to ``drain_timeout`` to go out; the rest wait for the next start."""
+        self._closed = True
+        if self._workers:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self.join(), drain_timeout)
+        self._stopping = True
+        self._wake.set()
+        if self._dispatcher is not None:
+            await cancel_and_wait(self._dispatcher)
+            self._dispatcher = None
+        await cancel_and_wait(*self._workers)
+        self._workers.clear()
+
+    def snapshot(self) -> dict[str, Any]:
+        metrics = self.metrics
+        return {
+            "depth": self.depth,
+            "capacity": self._queue.maxsize,
+            "workers": len(self._workers),
+            "pending": metrics.pending,
+            "enqueued": metrics.enqueued,
+            "delivered": metrics.delivered,
+            "failed": metrics.failed,
+            "retried": metrics.retried,
+            "dead": metrics.dead,
+            "avg_wait_seconds": round(metrics.total_wait_seconds / metrics.started, 3) if metrics.started else 0.0,
+            "max_wait_seconds": round(metrics.max_wait_seconds, 3),
+            "last_wait_seconds": round(metrics.last_wait_seconds, 3),
+        }
+
+    def retry_delay(self, attempts: int) -> float:
+        return min(self.retry_base_seconds * 2 ** max(attempts - 1, 0), self.retry_max_seconds)
+
+    async def _dispatch(self) -> None:
+        while not self._stopping:
+            self._wake.clear()
+            try:
+                rows = await self.repository.due_notifications(self.batch_size, exclude=self._in_flight)
+                counts = await self.repository.notification_outbox_counts()
+                self.metrics.pending = counts.get("pending", 0)
+            except Exception:
+                logger.exception("reading the notification outbox failed")
+                rows = []
+            if self._stopping:
+                return
+            for row in rows:
+                job = AlertJob.from_outbox(row)
+                self._in_flight.add(row["id"])
+                await self._queue.put(job)
+            if len(rows) == self.batch_size:
+                continue
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wake.wait(), self.idle_poll_seconds)
+
+    async def _work(self) -> None:
+        while not self._stopping:
+            job = await self._queue.get()
+            try:
+                await self._deliver(job)
+            except Exception:
+                logger.exception("alert delivery for %s failed", job.condition_key)
+            finally:
+                if job.outbox_id is not None:
+                    self._in_flight.discard(job.outbox_id)
+                self._queue.task_done()
+
+    async def _deliver(self, job: AlertJob) -> None:
+        now = datetime.now(UTC)
+        if job.created_at is not None:
+            wait = max((now - job.created_at).total_seconds(), 0.0)
+            self.metrics.started += 1
+            self.metrics.total_wait_seconds += wait
+            self.metrics.last_wait_seconds = wait
+            self.metrics.max_wait_seconds = max(self.metrics.max_wait_seconds, wait)
+        result = await self.notifier.deliver(
+            job.service_type,
+            job.service_config,
+            job.target,
+            job.subject,
+            job.body,
+        )
+        retry_at: datetime | None = None
+        if result.success:
+            self.metrics.delivered += 1
+        else:
+            self.metrics.failed += 1
+            attempts = job.attempts + 1
+            if attempts < self.max_attempts:
+                retry_at = utcnow() + timedelta(seconds=self.retry_delay(attempts))
+                self.metrics.retried += 1
+            else:
+                self.metrics.dead += 1
+        assert job.outbox_id is not None
+        await self.repository.record_notification_attempt(job.outbox_id, result, retry_at)
+        if retry_at is not None:
+            self._wake.set()
@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any
+
+from powersnitch_app.blocks import BLOCK_SECONDS
+from powersnitch_app.core.tasks import cancel_and_wait
+from powersnitch_app.storage import Repository, bucket_start, utcnow
+
+
+MINUTE = 60
+HOUR = 3600
+# Finest first; ``None`` is the raw sample table.
+RESOLUTIONS: tuple[int | None, ...] = (None, MINUTE, HOUR)
+# Largest window rolled up per transaction, so catching up after downtime
+# never holds the write lock for long.
+ROLLUP_WINDOWS = {MINUTE: timedelta(hours=6), HOUR: timedelta(days=7)}
+# Raw samples keep arriving for a moment after a bucket ends (writer batching,
+# slow polls), so minute buckets are only closed once this has passed.
+ROLLUP_GRACE = timedelta(seconds=120)
+
+logger = logging.getLogger(__name__)
+
+
+def choose_resolution(
+    start: datetime,
+    end: datetime,
+    now: datetime,
+    retention_days: dict[int | None, float],
+    target_points: int = 200,
+) -> int | None:
+    """Pick the coarsest retained resolution that still draws ``target_points`` for the range."""
+    span = (end - start).total_seconds()
+    covered = [
+        resolution
+        for resolution in RESOLUTIONS
+        if not retention_days.get(resolution) or start >= now - timedelta(days=retention_days[resolution])
+    ]
+    if not covered:
+        return RESOLUTIONS[-1]
+    for resolution in reversed(covered):
+        if resolution is not None and span / resolution >= target_points:
+            return resolution
+    return covered[0]
+
+
+@dataclass(slots=True)
+class MaintenanceMetrics:
+    runs: int = 0
+    failures: int = 0
+    buckets_written: int = 0
+    samples_packed: int = 0
+    samples_pruned: int = 0
+    rollups_pruned: int = 0
+    payloads_pruned: int = 0
+    last_run_at: datetime | None = None
+    last_run_seconds: float = 0.0
+
+
+class TelemetryMaintenance:
+    """Background job that rolls raw telemetry up and enforces retention."""
+
+    def __init__(
+        self,
+        repository: Repository,
+        raw_retention_days: float = 7,
+        minute_retention_days: float = 90,
+        hour_retention_days: float = 730,
+        batch_size: int = 500,
+        interval_seconds: float = 60.0,
+    ):
+        self.repository = repository
+        self.retention_days: dict[int | None, float] = {
+            None: raw_retention_days,
+            MINUTE: minute_retention_days,
+            HOUR: hour_retention_days,
+        }
+        self.batch_size = max(batch_size, 1)
+        self.interval_seconds = interval_seconds
+        self.metrics = MaintenanceMetrics()
+        self._task: asyncio.Task[None] | None = None
+        self._stopping = False
+
+    def start(self) -> None:
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def shutdown(self) -> None:
+        if self._task is not None:
+            self._stopping = True
+            await cancel_and_wait(self._task)
+            self._task = None
+
+    async def run_once(self, now: datetime | None = None) -> None:
+        now = now or utcnow()
+        started = time.perf_counter()
+        minute_until = await self._rollup(MINUTE, None, bucket_start(now - ROLLUP_GRACE, MINUTE))
+        hour_until = None
+        if minute_until is not None:
+            hour_until = await self._rollup(HOUR, MINUTE, bucket_start(minute_until, HOUR))
+            if self.repository.telemetry_storage == "blocks":
+                pack_until = bucket_start(minute_until, BLOCK_SECONDS)
+                while packed := await self.repository.pack_telemetry_blocks(pack_until):
+                    self.metrics.samples_packed += packed
+                    await asyncio.sleep(0)
+        # Keep rows the next resolution has not consumed yet, whatever their age.
+        self.metrics.samples_pruned += await self._prune(None, now, minute_until)
+        self.metrics.rollups_pruned += await self._prune(MINUTE, now, hour_until)
+        self.metrics.rollups_pruned += await self._prune(HOUR, now, None)
+        while pruned := await self.repository.prune_raw_payloads(self.batch_size):
+            self.metrics.payloads_pruned += pruned
+            await asyncio.sleep(0)
+        self.metrics.runs += 1
+        self.metrics.last_run_at = now
+        self.metrics.last_run_seconds = time.perf_counter() - started
+
+    def snapshot(self) -> dict[str, Any]:
+        metrics = self.metrics
+        return {
+            "runs": metrics.runs,
+            "failures": metrics.failures,
+            "buckets_written": metrics.buckets_written,
+            "samples_packed": metrics.samples_packed,
+            "samples_pruned": metrics.samples_pruned,
+            "rollups_pruned": metrics.rollups_pruned,
+            "payloads_pruned": metrics.payloads_pruned,
+            "last_run_at": metrics.last_run_at.isoformat() if metrics.last_run_at else None,
+            "last_run_ms": round(metrics.last_run_seconds * 1000, 1),
+        }
+
+    async def _rollup(self, resolution: int, source: int | None, until: datetime) -> datetime | None:
+        """Roll ``source`` rows up to ``until``; returns the new watermark, if any."""
+        key = f"telemetry_rollup_{resolution}_until"
+        stored = await self.repository.get_setting(key)
+        if stored:
+            watermark = datetime.fromisoformat(stored)
+        else:
+            earliest = await self.repository.earliest_telemetry_at(source)
+            if earliest is None:
+                return None
+            watermark = bucket_start(earliest, resolution)
+        while watermark < until:
+            window_end = min(until, watermark + ROLLUP_WINDOWS[resolution])
+            self.metrics.buckets_written += await self.repository.rollup_telemetry(
+                resolution, source, watermark, window_end
+            )
+            watermark = window_end
+            await self.repository.set_setting(key, watermark.isoformat())
+            await asyncio.sleep(0)
+        return watermark
+
+    async def _prune(self, resolution: int | None, now: datetime, consumed_until: datetime | None) -> int:
+        days = self.retention_days[resolution]
+        if not days:
+            return 0
+        cutoff = now - timedelta(days=days)
+        if resolution != HOUR:
+            if consumed_until is None:
+                return 0
+            cutoff = min(cutoff, consumed_until)
+        total = 0
+        while deleted := await self.repository.prune_telemetry(resolution, cutoff, self.batch_size):
+            total += deleted
+            await asyncio.sleep(0)
+        return total
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.metrics.failures += 1
+                logger.exception("telemetry maintenance failed")
+            if not self._stopping:
+                await asyncio.sleep(self.interval_seconds)
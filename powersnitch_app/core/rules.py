@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from typing import Any
+
+from powersnitch_app.core.conditions import CompiledConditions, compile_conditions
+from powersnitch_app.core.expressions import Expression, compile_expression
+from powersnitch_app.storage import Repository
+
+
+class RuleStateEngine:
+    """In-memory copy of each device's enabled rules and active conditions."""
+
+    def __init__(self, repository: Repository):
+        self.repository = repository
+        self._rules: dict[int, list[dict[str, Any]]] = {}
+        self._active: dict[int, dict[str, dict[str, Any]]] = {}
+        self._rules_generation: int | None = None
+        self._evaluators: dict[int, tuple[tuple[Any, ...], CompiledConditions]] = {}
+        self._expressions: dict[str, Expression] = {}
+
+    async def rules_for(self, device_id: int) -> list[dict[str, Any]]:
+        generation = self.repository.generation("rules")
+        if generation != self._rules_generation:
+            self._rules.clear()
+            self._evaluators.clear()
+            self._expressions.clear()
+            self._rules_generation = generation
+        rules = self._rules.get(device_id)
+        if rules is None:
+            rules = await self.repository.get_rules_for_device(device_id)
+            self._rules[device_id] = rules
+        return rules
+
+    async def evaluator_for(self, device: dict[str, Any]) -> CompiledConditions:
+        device_id = int(device["id"])
+        rules = await self.rules_for(device_id)
+        config = (
+            float(device["battery_low_pct_threshold"]),
+            float(device["runtime_low_threshold_seconds"]),
+            bool(device.get("adaptive_polling")),
+        )
+        cached = self._evaluators.get(device_id)
+        if cached is not None and cached[0] == config:
+            return cached[1]
+        custom = {rule["condition_key"]: self._expression(rule["expression"]) for rule in rules if rule.get("expression")}
+        keys = None if config[2] else [rule["condition_key"] for rule in rules]
+        evaluator = compile_conditions(keys, config[0], config[1], custom)
+        self._evaluators[device_id] = (config, evaluator)
+        return evaluator
+
+    def _expression(self, source: str) -> Expression:
+        expression = self._expressions.get(source)
+        if expression is None:
+            expression = self._expressions[source] = compile_expression(source)
+        return expression
+
+    async def active_conditions(self, device_id: int) -> dict[str, dict[str, Any]]:
+        # Only the monitor writes active conditions, through this engine, so
+        # they are read once per device and then kept current here.
+        active = self._active.get(device_id)
+        if active is None:
+            rows = await self.repository.list_active_conditions_for_device(device_id)
+            active = {row["condition_key"]: row for row in rows}
+            self._active[device_id] = active
+        return active
+
+    async def record_alert(self, device_id: int, condition_key: str, value: Any, reason: str) -> None:
+        row = await self.repository.open_or_update_active_condition(
+            device_id,
+            condition_key,
+            value,
+            reason,
+            mark_alerted=True,
+        )
+        (await self.active_conditions(device_id))[condition_key] = row
+
+    async def clear(self, device_id: int, condition_key: str) -> None:
+        await self.repository.clear_active_condition(device_id, condition_key)
+        (await self.active_conditions(device_id)).pop(condition_key, None)
+
+    def forget(self, device_id: int) -> None:
+        """Drop the device's active conditions so the next poll re-reads them."""
+        self._active.pop(device_id, None)
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import heapq
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class ScheduleEntry:
+    device_id: int
+    interval: float
+    next_due: float
+    version: int = 0
+    in_flight: bool = False
+    last_started: float | None = None
+    last_duration: float = 0.0
+    last_drift: float = 0.0
+    max_drift: float = 0.0
+    polls: int = 0
+    missed: int = 0
+    timeouts: int = 0
+
+
+class PollScheduler:
+    """Deadline-ordered poll schedule for a set of devices."""
+
+    def __init__(self) -> None:
+        self._heap: list[tuple[float, int, int]] = []
+        self._entries: dict[int, ScheduleEntry] = {}
+
+    def sync(self, intervals: dict[int, float], now: float) -> None:
+        for device_id in list(self._entries):
+            if device_id not in intervals:
+                del self._entries[device_id]
+        for device_id, interval in intervals.items():
+            entry = self._entries.get(device_id)
+            if entry is None:
+                entry = ScheduleEntry(device_id=device_id, interval=interval, next_due=now)
+                self._entries[device_id] = entry
+                self._push(entry)
+            elif entry.interval != interval:
+                self.set_interval(device_id, interval, now)
+
+    def set_interval(self, device_id: int, interval: float, now: float) -> None:
+        entry = self._entries.get(device_id)
+        if entry is None or entry.interval == interval:
+            return
+        entry.interval = interval
+        if entry.in_flight:
+            # Count the next deadline from now rather than from a deadline set
+            # under the old interval, so a tightened interval is not booked as
+            # a string of missed polls.
+            entry.next_due = now
+            return
+        base = entry.last_started if entry.last_started is not None else now
+        entry.next_due = max(base + interval, now)
+        self._push(entry)
+
+    def pop_due(self, now: float) -> list[int]:
+        due: list[int] = []
+        while self._heap and self._heap[0][0] <= now:
+            deadline, version, device_id = heapq.heappop(self._heap)
+            entry = self._entries.get(device_id)
+            if entry is None or entry.version != version or entry.in_flight:
+                continue
+            entry.in_flight = True
+            entry.last_started = now
+            entry.last_drift = now - deadline
+            entry.max_drift = max(entry.max_drift, entry.last_drift)
+            due.append(device_id)
+        return due
+
+    def complete(self, device_id: int, now: float, timed_out: bool = False) -> None:
+        entry = self._entries.get(device_id)
+        if entry is None or not entry.in_flight:
+            return
+        entry.in_flight = False
+        entry.polls += 1
+        entry.timeouts += int(timed_out)
+        entry.last_duration = now - (entry.last_started or now)
+        next_due = entry.next_due + entry.interval
+        if next_due <= now:
+            skipped = int((now - next_due) // entry.interval) + 1
+            entry.missed += skipped
+            next_due += skipped * entry.interval
+        entry.next_due = next_due
+        self._push(entry)
+
+    def next_due_in(self, now: float) -> float | None:
+        while self._heap:
+            deadline, version, device_id = self._heap[0]
+            entry = self._entries.get(device_id)
+            if entry is None or entry.version != version or entry.in_flight:
+                heapq.heappop(self._heap)
+                continue
+            return max(deadline - now, 0.0)
+        return None
+
+    def entries(self) -> list[ScheduleEntry]:
+        return sorted(self._entries.values(), key=lambda entry: entry.next_due)
+
+    def _push(self, entry: ScheduleEntry) -> None:
+        entry.version += 1
+        heapq.heappush(self._heap, (entry.next_due, entry.version, entry.device_id))
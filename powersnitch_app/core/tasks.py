@@ -0,0 +1,28 @@
+"""Background task helpers."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any
+
+
+logger = logging.getLogger(__name__)
+
+# How long shutdown waits for a cancelled task before giving up on it.
+STOP_TIMEOUT_SECONDS = 5.0
+
+
+async def cancel_and_wait(*tasks: asyncio.Task[Any], timeout: float = STOP_TIMEOUT_SECONDS) -> None:
+    """Cancel ``tasks`` once and wait up to ``timeout`` for them to finish."""
+    if not tasks:
+        return
+    # On Python 3.11 a cancel can be lost inside the SQLAlchemy pool's
+    # wait_for, so loops also check a stop flag of their own. Cancelling again
+    # could cut short the rollback of a session the task holds.
+    for task in tasks:
+        task.cancel()
+    done, pending = await asyncio.wait(tasks, timeout=timeout)
+    for task in pending:
+        logger.warning("%s did not stop within %g s of being cancelled", task.get_name(), timeout)
+    await asyncio.gather(*done, return_exceptions=True)
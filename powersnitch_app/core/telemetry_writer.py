@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from powersnitch_app.models import DeviceSnapshot
+from powersnitch_app.storage import Repository
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class WriterMetrics:
+    submitted: int = 0
+    written: int = 0
+    suppressed: int = 0
+    failed: int = 0
+    batches: int = 0
+    last_batch_size: int = 0
+    max_batch_size: int = 0
+    last_flush_seconds: float = 0.0
+    max_flush_seconds: float = 0.0
+    total_flush_seconds: float = 0.0
+
+
+class TelemetryWriter:
+    """Single writer that group-commits snapshots from every device."""
+
+    def __init__(
+        self,
+        repository: Repository,
+        batch_size: int = 200,
+        flush_interval: float = 2.0,
+        max_pending: int = 5000,
+    ):
+        self.repository = repository
+        self.batch_size = max(batch_size, 1)
+        self.flush_interval = flush_interval
+        self.max_pending = max(max_pending, self.batch_size)
+        self.metrics = WriterMetrics()
+        self._buffer: list[tuple[int, DeviceSnapshot, bool]] = []
+        self._wake = asyncio.Event()
+        self._flushed = asyncio.Condition()
+        self._task: asyncio.Task[None] | None = None
+        self._closing = False
+
+    @property
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._closing = False
+            self._task = asyncio.create_task(self._run())
+
+    async def submit(self, device_id: int, snapshot: DeviceSnapshot, store_sample: bool = True) -> None:
+        self.start()
+        async with self._flushed:
+            while len(self._buffer) >= self.max_pending:
+                self._wake.set()
+                await self._flushed.wait()
+        self._buffer.append((device_id, snapshot, store_sample))
+        self.metrics.submitted += 1
+        if len(self._buffer) == 1 or len(self._buffer) >= self.batch_size:
+            self._wake.set()
+
+    async def flush(self) -> None:
+        while self._buffer:
+            batch = self._buffer[: self.batch_size]
+            del self._buffer[: len(batch)]
+            started = time.perf_counter()
+            try:
+                await self.repository.save_snapshots(
+                    [(device_id, snapshot) for device_id, snapshot, _store in batch],
+                    store=[store for _device_id, _snapshot, store in batch],
+                )
+            except Exception:
+                self.metrics.failed += len(batch)
+                logger.exception("writing %d telemetry samples failed", len(batch))
+            else:
+                suppressed = sum(1 for _device_id, _snapshot, store in batch if not store)
+                self.metrics.written += len(batch) - suppressed
+                self.metrics.suppressed += suppressed
+            elapsed = time.perf_counter() - started
+            metrics = self.metrics
+            metrics.batches += 1
+            metrics.last_batch_size = len(batch)
+            metrics.max_batch_size = max(metrics.max_batch_size, len(batch))
+            metrics.last_flush_seconds = elapsed
+            metrics.max_flush_seconds = max(metrics.max_flush_seconds, elapsed)
+            metrics.total_flush_seconds += elapsed
+            async with self._flushed:
+                self._flushed.notify_all()
+
+    async def shutdown(self) -> None:
+        """Write everything still buffered, then stop the writer task."""
+        if self._task is not None:
+            self._closing = True
+            self._wake.set()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    def snapshot(self) -> dict[str, Any]:
+        metrics = self.metrics
+        return {
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "written": metrics.written,
+            "failed": metrics.failed,
+            "batches": metrics.batches,
+            "suppressed": metrics.suppressed,
+            "avg_batch_size": (
+                round((metrics.written + metrics.suppressed + metrics.failed) / metrics.batches, 1)
+                if metrics.batches
+                else 0.0
+            ),
+            "last_batch_size": metrics.last_batch_size,
+            "max_batch_size": metrics.max_batch_size,
+            "avg_flush_ms": round(metrics.total_flush_seconds / metrics.batches * 1000, 1) if metrics.batches else 0.0,
+            "last_flush_ms": round(metrics.last_flush_seconds * 1000, 1),
+            "max_flush_ms": round(metrics.max_flush_seconds * 1000, 1),
+        }
+
+    async def _run(self) -> None:
+        while True:
+            await self._wake.wait()
+            if not self._closing and len(self._buffer) < self.batch_size:
+                # Give other devices polled around the same time a chance to
+                # join this batch.
+                with contextlib.suppress(asyncio.TimeoutError):
+                    self._wake.clear()
+                    await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            self._wake.clear()
+            await self.flush()
+            if self._closing:
+                return
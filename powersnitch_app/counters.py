@@ -0,0 +1,31 @@
+"""Check the dashboard counters against the tables they count and rebuild them."""
+
+from __future__ import annotations
+
+import asyncio
+
+from powersnitch_app.config import Settings, get_settings
+from powersnitch_app.db import Database
+from powersnitch_app.storage import Repository
+
+
+async def rebuild_counters(settings: Settings | None = None) -> dict[str, tuple[int, int]]:
+    db = Database(settings or get_settings())
+    try:
+        return await Repository(db).rebuild_dashboard_counts()
+    finally:
+        await db.dispose()
+
+
+def main() -> None:
+    counts = asyncio.run(rebuild_counters())
+    drifted = False
+    for name, (stored, counted) in counts.items():
+        status = "ok" if stored == counted else "rebuilt"
+        drifted = drifted or stored != counted
+        print(f"{name}: stored={stored} counted={counted} {status}")
+    raise SystemExit(1 if drifted else 0)
+
+
+if __name__ == "__main__":
+    main()
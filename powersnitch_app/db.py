@@ -1,30 +1,103 @@
 from __future__ import annotations
 
+from collections.abc import Sequence
 from contextlib import asynccontextmanager
 
+from sqlalchemy import Engine, event
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 
 from powersnitch_app.config import Settings
 
 
+JOURNAL_MODES = frozenset({"delete", "truncate", "persist", "memory", "wal", "off"})
+SYNCHRONOUS_MODES = frozenset({"off", "normal", "full", "extra"})
+TEMP_STORES = frozenset({"default", "file", "memory"})
+
+
 def sqlite_url_from_path(path: str) -> str:
     return f"sqlite+aiosqlite:///{path}"
 
 
+def sqlite_pragmas(settings: Settings) -> list[str]:
+    """Connection pragmas for the configured SQLite performance profile."""
+    journal_mode = settings.sqlite_journal_mode.strip().lower()
+    synchronous = settings.sqlite_synchronous.strip().lower()
+    temp_store = settings.sqlite_temp_store.strip().lower()
+    if journal_mode not in JOURNAL_MODES:
+        raise ValueError(f"Unsupported SQLite journal mode: {settings.sqlite_journal_mode}")
+    if synchronous not in SYNCHRONOUS_MODES:
+        raise ValueError(f"Unsupported SQLite synchronous mode: {settings.sqlite_synchronous}")
+    if temp_store not in TEMP_STORES:
+        raise ValueError(f"Unsupported SQLite temp store: {settings.sqlite_temp_store}")
+    return [
+        f"PRAGMA journal_mode={journal_mode}",
+        f"PRAGMA synchronous={synchronous}",
+        f"PRAGMA mmap_size={int(settings.sqlite_mmap_size_bytes)}",
+        f"PRAGMA cache_size={-abs(int(settings.sqlite_cache_size_kib))}",
+        f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}",
+        f"PRAGMA temp_store={temp_store}",
+    ]
+
+
+def install_sqlite_pragmas(engine: Engine, pragmas: Sequence[str]) -> None:
+    """Run ``pragmas`` on every new DBAPI connection ``engine`` opens."""
+
+    def apply(dbapi_connection, _connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+    event.listen(engine, "connect", apply)
+
+
 class Database:
+    """Engines for the application database."""
+
     def __init__(self, settings: Settings):
         self.settings = settings
         self.settings.sqlite_path.parent.mkdir(parents=True, exist_ok=True)
         self.url = sqlite_url_from_path(str(self.settings.sqlite_path))
-        self.engine: AsyncEngine = create_async_engine(self.url, future=True)
+        pragmas = sqlite_pragmas(settings)
+        read_pool_size = max(int(settings.sqlite_read_pool_size), 0)
+        pool_timeout = max(settings.sqlite_busy_timeout_ms / 1000, 1.0)
+        if read_pool_size:
+            # One writer connection, so writers queue in the pool instead of
+            # spinning on SQLite's busy handler; readers get query_only ones.
+            self.engine: AsyncEngine = create_async_engine(
+                self.url, future=True, pool_size=1, max_overflow=0, pool_timeout=pool_timeout
+            )
+            self.read_engine: AsyncEngine = create_async_engine(
+                self.url, future=True, pool_size=read_pool_size, max_overflow=0, pool_timeout=pool_timeout
+            )
+            install_sqlite_pragmas(self.read_engine.sync_engine, [*pragmas, "PRAGMA query_only=1"])
+        else:
+            self.engine = self.read_engine = create_async_engine(self.url, future=True)
+        install_sqlite_pragmas(self.engine.sync_engine, pragmas)
         self.session_factory = async_sessionmaker(
             self.engine,
             expire_on_commit=False,
             class_=AsyncSession,
         )
+        self.read_session_factory = async_sessionmaker(
+            self.read_engine,
+            expire_on_commit=False,
+            class_=AsyncSession,
+        )
 
     @asynccontextmanager
     async def session(self):
         async with self.session_factory() as session:
             yield session
 
+    @asynccontextmanager
+    async def read_session(self):
+        async with self.read_session_factory() as session:
+            yield session
+
+    async def dispose(self) -> None:
+        await self.engine.dispose()
+        if self.read_engine is not self.engine:
+            await self.read_engine.dispose()
@@ -1,11 +1,47 @@
 from __future__ import annotations
 
-from datetime import datetime
-
-from sqlalchemy import Boolean, DateTime, Float, ForeignKey, Integer, String, Text, UniqueConstraint
+import math
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from sqlalchemy import (
+    Boolean,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+    Text,
+    TypeDecorator,
+    UniqueConstraint,
+    text,
+)
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
+_EPOCH = datetime(1970, 1, 1)
+
+
+class EpochSeconds(TypeDecorator[datetime]):
+    """A UTC datetime stored as integer Unix seconds."""
+
+    impl = Integer
+    cache_ok = True
+
+    def process_bind_param(self, value: datetime | None, dialect: Any) -> int | None:
+        if value is None:
+            return None
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=UTC)
+        # Round up, so a bound with microseconds selects the same whole-second rows as before.
+        return math.ceil(value.timestamp())
+
+    def process_result_value(self, value: int | None, dialect: Any) -> datetime | None:
+        return None if value is None else _EPOCH + timedelta(seconds=value)
+
+
 class Base(DeclarativeBase):
     pass
 
@@ -29,6 +65,15 @@ class AppSetting(Base):
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
 
 
+class DashboardCounter(Base):
+    """Running totals shown on the dashboard, kept in step with the rows they count."""
+
+    __tablename__ = "dashboard_counters"
+
+    name: Mapped[str] = mapped_column(String, primary_key=True)
+    value: Mapped[int] = mapped_column(Integer, default=0)
+
+
 class UPSDevice(Base):
     __tablename__ = "ups_devices"
 
@@ -37,17 +82,25 @@ class UPSDevice(Base):
     display_name: Mapped[str] = mapped_column(String)
     enabled: Mapped[bool] = mapped_column(Boolean, default=False)
     poll_interval_seconds: Mapped[int] = mapped_column(Integer, default=15)
+    adaptive_polling: Mapped[bool] = mapped_column(Boolean, default=False)
+    min_poll_interval_seconds: Mapped[float] = mapped_column(Float, default=1)
+    max_poll_interval_seconds: Mapped[float] = mapped_column(Float, default=60)
     battery_low_pct_threshold: Mapped[float] = mapped_column(Float, default=25)
     runtime_low_threshold_seconds: Mapped[float] = mapped_column(Float, default=300)
+    deadband_enabled: Mapped[bool] = mapped_column(Boolean, default=False)
+    deadband_percent: Mapped[float] = mapped_column(Float, default=1)
+    deadband_heartbeat_seconds: Mapped[float] = mapped_column(Float, default=300)
     vendor: Mapped[str | None] = mapped_column(String, nullable=True)
     model: Mapped[str | None] = mapped_column(String, nullable=True)
     serial: Mapped[str | None] = mapped_column(String, nullable=True)
     last_seen_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     last_snapshot_json: Mapped[str | None] = mapped_column(Text, nullable=True)
+    last_payload_id: Mapped[int | None] = mapped_column(ForeignKey("raw_payloads.id"), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
 
     rules: Mapped[list["AlertRule"]] = relationship(back_populates="device")
+    last_payload: Mapped["RawPayload | None"] = relationship(lazy="joined")
 
 
 class NotificationService(Base):
@@ -88,6 +141,7 @@ class AlertRule(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     ups_device_id: Mapped[int] = mapped_column(ForeignKey("ups_devices.id"))
     condition_key: Mapped[str] = mapped_column(String)
+    expression: Mapped[str | None] = mapped_column(Text, nullable=True)
     channel_id: Mapped[int] = mapped_column(ForeignKey("notification_channels.id"))
     repeat_interval_seconds: Mapped[int] = mapped_column(Integer, default=900)
     send_recovery: Mapped[bool] = mapped_column(Boolean, default=True)
@@ -103,6 +157,7 @@ class ActiveCondition(Base):
     __tablename__ = "active_conditions"
     __table_args__ = (
         UniqueConstraint("ups_device_id", "condition_key", name="uq_active_condition"),
+        Index("ix_active_conditions_active_since", "active_since"),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
@@ -116,9 +171,18 @@ class ActiveCondition(Base):
 
 class AlertEvent(Base):
     __tablename__ = "alert_events"
+    __table_args__ = (
+        Index("ix_alert_events_occurred_at", "occurred_at"),
+        Index("ix_alert_events_failed", "occurred_at", sqlite_where=text("success = 0")),
+        # History filters; each index also orders by (occurred_at, id) via the rowid.
+        Index("ix_alert_events_device_occurred", "ups_device_id", "occurred_at"),
+        Index("ix_alert_events_channel_occurred", "channel_id", "occurred_at"),
+        Index("ix_alert_events_condition_occurred", "condition_key", "occurred_at"),
+        Index("ix_alert_events_provider_occurred", "provider", "occurred_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    occurred_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    occurred_at: Mapped[datetime] = mapped_column(EpochSeconds)
     ups_device_id: Mapped[int | None] = mapped_column(ForeignKey("ups_devices.id"), nullable=True)
     channel_id: Mapped[int | None] = mapped_column(ForeignKey("notification_channels.id"), nullable=True)
     condition_key: Mapped[str] = mapped_column(String)
@@ -133,15 +197,89 @@ class AlertEvent(Base):
 
 class TelemetrySample(Base):
     __tablename__ = "telemetry_samples"
+    __table_args__ = (
+        Index("ix_telemetry_samples_device_observed", "ups_device_id", "observed_at"),
+        Index("ix_telemetry_samples_payload", "payload_id"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     ups_device_id: Mapped[int] = mapped_column(ForeignKey("ups_devices.id"))
-    observed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    observed_at: Mapped[datetime] = mapped_column(EpochSeconds)
     battery_charge: Mapped[float | None] = mapped_column(Float, nullable=True)
     runtime_seconds: Mapped[float | None] = mapped_column(Float, nullable=True)
     input_voltage: Mapped[float | None] = mapped_column(Float, nullable=True)
     output_voltage: Mapped[float | None] = mapped_column(Float, nullable=True)
     load_percent: Mapped[float | None] = mapped_column(Float, nullable=True)
     status_flags: Mapped[str | None] = mapped_column(Text, nullable=True)
-    raw_json: Mapped[str] = mapped_column(Text)
+    raw_json: Mapped[str | None] = mapped_column(Text, nullable=True)
+    payload_id: Mapped[int | None] = mapped_column(ForeignKey("raw_payloads.id"), nullable=True)
+
+
+class TelemetryRollup(Base):
+    __tablename__ = "telemetry_rollups"
+
+    ups_device_id: Mapped[int] = mapped_column(ForeignKey("ups_devices.id"), primary_key=True)
+    resolution_seconds: Mapped[int] = mapped_column(Integer, primary_key=True)
+    bucket_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    sample_count: Mapped[int] = mapped_column(Integer)
+    battery_charge_min: Mapped[float | None] = mapped_column(Float, nullable=True)
+    battery_charge_avg: Mapped[float | None] = mapped_column(Float, nullable=True)
+    battery_charge_max: Mapped[float | None] = mapped_column(Float, nullable=True)
+    runtime_seconds_min: Mapped[float | None] = mapped_column(Float, nullable=True)
+    runtime_seconds_avg: Mapped[float | None] = mapped_column(Float, nullable=True)
+    runtime_seconds_max: Mapped[float | None] = mapped_column(Float, nullable=True)
+    input_voltage_min: Mapped[float | None] = mapped_column(Float, nullable=True)
+    input_voltage_avg: Mapped[float | None] = mapped_column(Float, nullable=True)
+    input_voltage_max: Mapped[float | None] = mapped_column(Float, nullable=True)
+    output_voltage_min: Mapped[float | None] = mapped_column(Float, nullable=True)
+    output_voltage_avg: Mapped[float | None] = mapped_column(Float, nullable=True)
+    output_voltage_max: Mapped[float | None] = mapped_column(Float, nullable=True)
+    load_percent_min: Mapped[float | None] = mapped_column(Float, nullable=True)
+    load_percent_avg: Mapped[float | None] = mapped_column(Float, nullable=True)
+    load_percent_max: Mapped[float | None] = mapped_column(Float, nullable=True)
+
+
+class TelemetryBlock(Base):
+    __tablename__ = "telemetry_blocks"
+    __table_args__ = (
+        Index("ix_telemetry_blocks_device_start", "ups_device_id", "start_at"),
+    )
 
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    ups_device_id: Mapped[int] = mapped_column(ForeignKey("ups_devices.id"))
+    start_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    end_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    sample_count: Mapped[int] = mapped_column(Integer)
+    encoding: Mapped[int] = mapped_column(Integer)
+    data: Mapped[bytes] = mapped_column(LargeBinary)
+
+
+class RawPayload(Base):
+    __tablename__ = "raw_payloads"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    digest: Mapped[str] = mapped_column(String, unique=True)
+    payload_json: Mapped[str] = mapped_column(Text)
+    first_seen_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+
+
+class NotificationOutbox(Base):
+    __tablename__ = "notification_outbox"
+    __table_args__ = (
+        Index("ix_notification_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    ups_device_id: Mapped[int | None] = mapped_column(ForeignKey("ups_devices.id"), nullable=True)
+    channel_id: Mapped[int | None] = mapped_column(ForeignKey("notification_channels.id"), nullable=True)
+    condition_key: Mapped[str] = mapped_column(String)
+    condition_state: Mapped[str] = mapped_column(String)
+    subject: Mapped[str] = mapped_column(Text)
+    body: Mapped[str] = mapped_column(Text)
+    payload_json: Mapped[str] = mapped_column(Text)
+    status: Mapped[str] = mapped_column(String, default="pending")
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    last_attempt_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
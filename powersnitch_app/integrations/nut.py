@@ -5,13 +5,22 @@ import shlex
 from datetime import UTC, datetime
 from typing import Any
 
+from powersnitch_app.config import Settings
 from powersnitch_app.models import DeviceSnapshot
 
 
+NUT_DEFAULT_PORT = 3493
+
+
+class NutProtocolError(RuntimeError):
+    """upsd answered a command with an ``ERR`` line."""
+
+
 class NutClient:
-    def __init__(self, list_command: str, status_command_template: str):
+    def __init__(self, list_command: str, status_command_template: str, timeout: float | None = None):
         self.list_command = list_command
         self.status_command_template = status_command_template
+        self.timeout = timeout
 
     async def discover(self) -> list[str]:
         try:
@@ -22,7 +31,10 @@ class NutClient:
             )
         except FileNotFoundError:
             return []
-        stdout, _stderr = await process.communicate()
+        try:
+            stdout, _stderr = await self._communicate(process)
+        except asyncio.TimeoutError:
+            return []
         if process.returncode != 0:
             return []
         return [line.strip() for line in stdout.decode().splitlines() if line.strip()]
@@ -37,15 +49,343 @@ class NutClient:
             )
         except FileNotFoundError as exc:
             raise RuntimeError("NUT command not found") from exc
-        stdout, stderr = await process.communicate()
+        stdout, stderr = await self._communicate(process)
         if process.returncode != 0:
             raise RuntimeError(stderr.decode().strip() or f"failed to fetch {identifier}")
         return parse_upsc(stdout.decode())
 
+    async def _communicate(self, process: asyncio.subprocess.Process) -> tuple[bytes, bytes]:
+        # A hung upsc must not outlive the poll that started it, whether the
+        # deadline is ours or the caller cancelled us.
+        try:
+            return await asyncio.wait_for(process.communicate(), self.timeout)
+        except BaseException:
+            if process.returncode is None:
+                try:
+                    process.kill()
+                except ProcessLookupError:
+                    pass
+                await asyncio.shield(process.wait())
+            raise
+
+    async def fetch_many(self, identifiers: list[str]) -> dict[str, dict[str, str] | Exception]:
+        results: dict[str, dict[str, str] | Exception] = {}
+        for identifier in identifiers:
+            try:
+                results[identifier] = await self.fetch_status(identifier)
+            except Exception as exc:
+                results[identifier] = exc
+        return results
+
     async def snapshot(self, identifier: str) -> DeviceSnapshot:
         data = await self.fetch_status(identifier)
         return snapshot_from_status(identifier, data)
 
+    async def close(self) -> None:
+        return None
+
+
+class UpsdConnection:
+    """A single persistent session with an upsd server."""
+
+    def __init__(self, host: str, port: int, timeout: float):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def request(self, command: str) -> list[list[str]]:
+        reply = (await self.request_many([command]))[0]
+        if isinstance(reply, NutProtocolError):
+            raise reply
+        return reply
+
+    async def request_many(self, commands: list[str]) -> list[list[list[str]] | NutProtocolError]:
+        async with self._lock:
+            reused = self.connected
+            try:
+                return await self._exchange(commands)
+            except ConnectionError:
+                if not reused:
+                    raise
+            # upsd drops idle clients, so a stale socket gets one fresh retry.
+            return await self._exchange(commands)
+
+    async def close(self) -> None:
+        writer, self._reader, self._writer = self._writer, None, None
+        if writer is None:
+            return
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except (OSError, asyncio.CancelledError):
+            pass
+
+    async def _exchange(self, commands: list[str]) -> list[list[list[str]] | NutProtocolError]:
+        try:
+            if not self.connected:
+                self._reader, self._writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.port),
+                    self.timeout,
+                )
+            assert self._writer is not None
+            self._writer.write("".join(f"{command}\n" for command in commands).encode())
+            await self._writer.drain()
+            replies: list[list[list[str]] | NutProtocolError] = []
+            for _command in commands:
+                try:
+                    replies.append(await self._read_response())
+                except NutProtocolError as exc:
+                    replies.append(exc)
+            return replies
+        except BaseException:
+            # A partially read reply leaves the stream out of sync.
+            await self.close()
+            raise
+
+    async def _read_response(self) -> list[list[str]]:
+        first = await self._read_line()
+        if first[:1] != ["BEGIN"]:
+            return [first]
+        end = ["END", *first[1:]]
+        lines: list[list[str]] = []
+        while True:
+            words = await self._read_line()
+            if words == end:
+                return lines
+            lines.append(words)
+
+    async def _read_line(self) -> list[str]:
+        assert self._reader is not None
+        raw = await asyncio.wait_for(self._reader.readline(), self.timeout)
+        if not raw:
+            raise ConnectionError(f"upsd at {self.host}:{self.port} closed the connection")
+        words = split_upsd_line(raw.decode())
+        if words[:1] == ["ERR"]:
+            raise NutProtocolError(" ".join(words[1:]) or "unknown upsd error")
+        return words
+
+
+class UpsdHostPool:
+    """Bounded set of long-lived connections to one upsd server."""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        timeout: float,
+        size: int = 2,
+        backoff_seconds: float = 1.0,
+        max_backoff_seconds: float = 60.0,
+    ):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self._slots = asyncio.Semaphore(max(size, 1))
+        self._idle: list[UpsdConnection] = []
+        self._pending: list[tuple[str, asyncio.Future[list[list[str]]]]] = []
+        self._flushes: set[asyncio.Task[None]] = set()
+        self._failures = 0
+        self._retry_at = 0.0
+
+    async def list_var(self, name: str) -> list[list[str]]:
+        future: asyncio.Future[list[list[str]]] = asyncio.get_running_loop().create_future()
+        self._pending.append((f"LIST VAR {name}", future))
+        if len(self._pending) == 1:
+            task = asyncio.create_task(self._flush())
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+        return await future
+
+    async def request(self, command: str) -> list[list[str]]:
+        reply = (await self._pipeline([command]))[0]
+        if isinstance(reply, NutProtocolError):
+            raise reply
+        return reply
+
+    async def close(self) -> None:
+        for task in list(self._flushes):
+            task.cancel()
+        idle, self._idle = self._idle, []
+        for connection in idle:
+            await connection.close()
+
+    async def _flush(self) -> None:
+        # Yield once so every request issued in the same tick joins the batch.
+        await asyncio.sleep(0)
+        batch, self._pending = self._pending, []
+        try:
+            replies = await self._pipeline([command for command, _future in batch])
+        except asyncio.CancelledError:
+            for _command, future in batch:
+                future.cancel()
+            raise
+        except Exception as exc:
+            for _command, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_command, future), reply in zip(batch, replies):
+            if future.done():
+                continue
+            if isinstance(reply, NutProtocolError):
+                future.set_exception(reply)
+            else:
+                future.set_result(reply)
+
+    async def _pipeline(self, commands: list[str]) -> list[list[list[str]] | NutProtocolError]:
+        loop = asyncio.get_running_loop()
+        if loop.time() < self._retry_at:
+            raise ConnectionError(
+                f"upsd at {self.host}:{self.port} unavailable, retrying in {self._retry_at - loop.time():.0f}s"
+            )
+        async with self._slots:
+            connection = self._idle.pop() if self._idle else UpsdConnection(self.host, self.port, self.timeout)
+            try:
+                replies = await connection.request_many(commands)
+            except (OSError, asyncio.TimeoutError):
+                self._failures += 1
+                delay = min(self.backoff_seconds * 2 ** (self._failures - 1), self.max_backoff_seconds)
+                self._retry_at = loop.time() + delay
+                raise
+            self._failures = 0
+            self._retry_at = 0.0
+            self._idle.append(connection)
+            return replies
+
+
+class UpsdClient:
+    """Talks the upsd TCP protocol directly instead of spawning ``upsc``."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = NUT_DEFAULT_PORT,
+        timeout: float = 5.0,
+        extra_hosts: list[str] | None = None,
+        pool_size: int = 2,
+        backoff_seconds: float = 1.0,
+        max_backoff_seconds: float = 60.0,
+    ):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.extra_hosts = extra_hosts or []
+        self.pool_size = pool_size
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self._pools: dict[tuple[str, int], UpsdHostPool] = {}
+
+    async def discover(self) -> list[str]:
+        servers = [(self.host, self.port)]
+        for location in self.extra_hosts:
+            _name, host, port = parse_ups_identifier(f"@{location}", self.host, self.port)
+            if (host, port) not in servers:
+                servers.append((host, port))
+        identifiers: list[str] = []
+        for host, port in servers:
+            try:
+                lines = await self._pool(host, port).request("LIST UPS")
+            except (OSError, RuntimeError, asyncio.TimeoutError):
+                continue
+            for words in lines:
+                if words[:1] != ["UPS"] or len(words) < 2:
+                    continue
+                if (host, port) == (self.host, self.port):
+                    identifiers.append(words[1])
+                elif port == NUT_DEFAULT_PORT:
+                    identifiers.append(f"{words[1]}@{host}")
+                else:
+                    identifiers.append(f"{words[1]}@{host}:{port}")
+        return identifiers
+
+    async def fetch_status(self, identifier: str) -> dict[str, str]:
+        name, host, port = parse_ups_identifier(identifier, self.host, self.port)
+        try:
+            lines = await self._pool(host, port).list_var(name)
+        except NutProtocolError as exc:
+            raise RuntimeError(f"{identifier}: {exc}") from exc
+        except (OSError, asyncio.TimeoutError) as exc:
+            raise RuntimeError(f"failed to fetch {identifier}: {exc}") from exc
+        return parse_list_var(lines)
+
+    async def fetch_many(self, identifiers: list[str]) -> dict[str, dict[str, str] | Exception]:
+        unique = list(dict.fromkeys(identifiers))
+        replies = await asyncio.gather(*(self.fetch_status(identifier) for identifier in unique), return_exceptions=True)
+        return dict(zip(unique, replies))
+
+    async def get_var(self, identifier: str, variable: str) -> str:
+        name, host, port = parse_ups_identifier(identifier, self.host, self.port)
+        lines = await self._pool(host, port).request(f"GET VAR {name} {variable}")
+        words = lines[0] if lines else []
+        if words[:1] != ["VAR"] or len(words) < 4:
+            raise NutProtocolError(f"unexpected reply to GET VAR: {' '.join(words)}")
+        return words[3]
+
+    async def snapshot(self, identifier: str) -> DeviceSnapshot:
+        data = await self.fetch_status(identifier)
+        return snapshot_from_status(identifier, data)
+
+    async def close(self) -> None:
+        pools = list(self._pools.values())
+        self._pools.clear()
+        for pool in pools:
+            await pool.close()
+
+    def _pool(self, host: str, port: int) -> UpsdHostPool:
+        pool = self._pools.get((host, port))
+        if pool is None:
+            pool = UpsdHostPool(
+                host,
+                port,
+                self.timeout,
+                size=self.pool_size,
+                backoff_seconds=self.backoff_seconds,
+                max_backoff_seconds=self.max_backoff_seconds,
+            )
+            self._pools[(host, port)] = pool
+        return pool
+
+
+def create_nut_client(settings: Settings) -> NutClient | UpsdClient:
+    if settings.nut_mode == "subprocess":
+        return NutClient(settings.nut_list_command, settings.nut_status_command, settings.nut_timeout_seconds)
+    return UpsdClient(
+        settings.nut_host,
+        settings.nut_port,
+        settings.nut_timeout_seconds,
+        extra_hosts=settings.nut_extra_hosts,
+        pool_size=settings.nut_pool_size,
+        backoff_seconds=settings.nut_reconnect_backoff_seconds,
+        max_backoff_seconds=settings.nut_reconnect_backoff_max_seconds,
+    )
+
+
+def parse_ups_identifier(identifier: str, default_host: str, default_port: int) -> tuple[str, str, int]:
+    name, _, location = identifier.partition("@")
+    if not location:
+        return name, default_host, default_port
+    host, separator, port = location.rpartition(":")
+    if separator and port.isdigit():
+        return name, host, int(port)
+    return name, location, default_port
+
+
+def split_upsd_line(line: str) -> list[str]:
+    return shlex.split(line.strip())
+
+
+def parse_list_var(lines: list[list[str]]) -> dict[str, str]:
+    return {words[2]: words[3] for words in lines if words[:1] == ["VAR"] and len(words) >= 4}
+
 
 def parse_upsc(raw_output: str) -> dict[str, str]:
     result: dict[str, str] = {}
@@ -18,6 +18,10 @@ CONDITIONS: tuple[str, ...] = (
     "unknown_state",
 )
 
+# Prefix of the condition key of a rule driven by a user expression.
+CUSTOM_CONDITION_PREFIX = "custom:"
+TELEMETRY_METRICS = ("battery_charge", "runtime_seconds", "input_voltage", "output_voltage", "load_percent")
+
 STATUS_FLAGS: dict[str, str] = {
     "on_battery": "OB",
     "on_line": "OL",
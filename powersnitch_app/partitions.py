@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import re
+from collections.abc import Iterable
+from datetime import UTC, datetime
+
+from sqlalchemy import Column, Float, Index, Integer, MetaData, Table, Text
+
+from powersnitch_app.db_models import EpochSeconds, TelemetrySample
+from powersnitch_app.models import TELEMETRY_METRICS
+
+
+PARTITION_MODES = frozenset({"none", "monthly"})
+PARTITION_PREFIX = "telemetry_samples_"
+PARTITION_PATTERN = re.compile(r"^telemetry_samples_(\d{4})_(\d{2})$")
+
+# Partition tables are created on demand and never go through Alembic, so they
+# live in their own metadata rather than ``Base.metadata``.
+partition_metadata = MetaData()
+
+
+def as_utc(moment: datetime) -> datetime:
+    """SQLite hands timestamps back naive; they are always UTC."""
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=UTC)
+    return moment.astimezone(UTC)
+
+
+def month_start(moment: datetime) -> datetime:
+    moment = as_utc(moment)
+    return datetime(moment.year, moment.month, 1, tzinfo=UTC)
+
+
+def next_month(moment: datetime) -> datetime:
+    start = month_start(moment)
+    if start.month == 12:
+        return start.replace(year=start.year + 1, month=1)
+    return start.replace(month=start.month + 1)
+
+
+def partition_name(moment: datetime) -> str:
+    start = month_start(moment)
+    return f"{PARTITION_PREFIX}{start.year:04d}_{start.month:02d}"
+
+
+def is_partition(name: str) -> bool:
+    return PARTITION_PATTERN.match(name) is not None
+
+
+def partition_bounds(name: str) -> tuple[datetime, datetime]:
+    """``[start, end)`` of the month a partition table holds."""
+    match = PARTITION_PATTERN.match(name)
+    if match is None:
+        raise ValueError(f"Not a telemetry partition: {name}")
+    start = datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=UTC)
+    return start, next_month(start)
+
+
+def partitions_between(names: Iterable[str], start: datetime | None, end: datetime | None) -> list[str]:
+    """Partitions overlapping ``[start, end)``, oldest first; ``None`` leaves a side open."""
+    selected = []
+    for name in sorted(names):
+        lower, upper = partition_bounds(name)
+        if (start is None or upper > as_utc(start)) and (end is None or lower < as_utc(end)):
+            selected.append(name)
+    return selected
+
+
+def partition_table(name: str) -> Table:
+    """Core table for one month of samples, shaped like ``telemetry_samples``."""
+    table = partition_metadata.tables.get(name)
+    if table is not None:
+        return table
+    if not is_partition(name):
+        raise ValueError(f"Not a telemetry partition: {name}")
+    return Table(
+        name,
+        partition_metadata,
+        Column("id", Integer, primary_key=True, autoincrement=True),
+        Column("ups_device_id", Integer, nullable=False),
+        Column("observed_at", EpochSeconds, nullable=False),
+        *(Column(metric, Float, nullable=True) for metric in TELEMETRY_METRICS),
+        Column("status_flags", Text, nullable=True),
+        Column("raw_json", Text, nullable=True),
+        Column("payload_id", Integer, nullable=True),
+        Index(f"ix_{name}_device_observed", "ups_device_id", "observed_at"),
+        Index(f"ix_{name}_payload", "payload_id"),
+    )
+
+
+def forget_partition(name: str) -> None:
+    table = partition_metadata.tables.get(name)
+    if table is not None:
+        partition_metadata.remove(table)
+
+
+def sample_table() -> Table:
+    """The unpartitioned table; still read so rows written before partitioning stay visible."""
+    return TelemetrySample.__table__
+
@@ -1,38 +1,197 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import json
 import secrets
-from datetime import UTC, datetime
+from collections.abc import AsyncIterator, Callable, Collection, Iterable, Mapping, Sequence
+from contextlib import aclosing, asynccontextmanager
+from contextvars import ContextVar
+from datetime import UTC, datetime, timedelta
 from pathlib import Path
 from typing import Any
 
-from sqlalchemy import delete, desc, func, select
+from sqlalchemy import (
+    String,
+    Table,
+    delete,
+    desc,
+    false,
+    func,
+    insert,
+    literal_column,
+    select,
+    text,
+    tuple_,
+    type_coerce,
+    update,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ColumnElement
 from sqlalchemy.orm import joinedload
 
+from powersnitch_app.blocks import BLOCK_ENCODING, BLOCK_SECONDS, STORAGE_MODES, BlockSample, decode_block, encode_block
+from powersnitch_app.core.deadband import hold_interval, step_hold
+from powersnitch_app.core.expressions import compile_expression
 from powersnitch_app.db import Database
 from powersnitch_app.db_models import (
     ActiveCondition,
     AlertEvent,
     AlertRule,
     AppSetting,
+    DashboardCounter,
     NotificationChannel,
+    NotificationOutbox,
     NotificationService,
+    RawPayload,
+    TelemetryBlock,
+    TelemetryRollup,
     TelemetrySample,
     UPSDevice,
     User,
 )
-from powersnitch_app.models import CONDITIONS, DeviceSnapshot
+from powersnitch_app.models import (
+    CONDITIONS,
+    CUSTOM_CONDITION_PREFIX,
+    TELEMETRY_METRICS,
+    DeliveryResult,
+    DeviceSnapshot,
+)
+from powersnitch_app.partitions import (
+    PARTITION_MODES,
+    as_utc,
+    forget_partition,
+    is_partition,
+    partition_bounds,
+    partition_name,
+    partition_table,
+    partitions_between,
+    sample_table,
+)
 from powersnitch_app.security import hash_password
 
 
+PAYLOAD_CACHE_SIZE = 1024
+EXPORT_PAGE_SIZE = 1000
+
+
 def utcnow() -> datetime:
     return datetime.now(UTC).replace(microsecond=0)
 
 
+def bucket_start(moment: datetime, resolution_seconds: int) -> datetime:
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=UTC)
+    epoch = int(moment.timestamp())
+    return datetime.fromtimestamp(epoch - epoch % resolution_seconds, UTC)
+
+
+class _UnitOfWork:
+    """One session and transaction shared by repository calls in a single task."""
+
+    def __init__(self, repository: Repository):
+        self.repository = repository
+        self.task = asyncio.current_task()
+        self.session: AsyncSession | None = None
+        self.callbacks: list[Callable[[], None]] = []
+        self.closed = False
+
+    def owns(self, repository: Repository) -> bool:
+        # Tasks started inside the block inherit the context variable but must
+        # not share the session with it.
+        return not self.closed and repository is self.repository and asyncio.current_task() is self.task
+
+    async def begin(self) -> AsyncSession:
+        if self.session is None:
+            self.session = self.repository.db.session_factory()
+            # Take the write lock up front; upgrading a WAL read transaction
+            # to a write can fail with SQLITE_BUSY instead of waiting.
+            await self.session.execute(text("BEGIN IMMEDIATE"))
+        return self.session
+
+
+_current_unit: ContextVar[_UnitOfWork | None] = ContextVar("powersnitch_unit_of_work", default=None)
+
+
+def payload_digest(raw_data: dict[str, Any]) -> tuple[str, str]:
+    """Canonical JSON for a raw NUT payload and its SHA-256 hex digest."""
+    payload_json = json.dumps(raw_data, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload_json.encode()).hexdigest(), payload_json
+
+
 class Repository:
     def __init__(self, db: Database):
         self.db = db
+        self._generations: dict[str, int] = {}
+        self._payload_cache: dict[str, int] = {}
+        self.partitioning = db.settings.telemetry_partitioning.strip().lower()
+        if self.partitioning not in PARTITION_MODES:
+            raise ValueError(f"Unsupported telemetry partitioning: {db.settings.telemetry_partitioning}")
+        self._partitions: set[str] | None = None
+        self.telemetry_storage = db.settings.telemetry_storage.strip().lower()
+        if self.telemetry_storage not in STORAGE_MODES:
+            raise ValueError(f"Unsupported telemetry storage: {db.settings.telemetry_storage}")
+
+    def generation(self, topic: str) -> int:
+        """Edit counter for ``topic``; in-process caches compare it to know when to reload."""
+        return self._generations.get(topic, 0)
+
+    def _bump(self, topic: str) -> None:
+        self._generations[topic] = self._generations.get(topic, 0) + 1
+
+    @asynccontextmanager
+    async def unit_of_work(self) -> AsyncIterator[None]:
+        """Run every repository call made in the block in one transaction."""
+        current = _current_unit.get()
+        if current is not None and current.owns(self):
+            yield
+            return
+        unit = _UnitOfWork(self)
+        token = _current_unit.set(unit)
+        try:
+            yield
+            if unit.session is not None:
+                await unit.session.commit()
+        except BaseException:
+            if unit.session is not None:
+                await unit.session.rollback()
+            # The partition cache may now name tables that were never committed.
+            self._partitions = None
+            raise
+        finally:
+            unit.closed = True
+            _current_unit.reset(token)
+            if unit.session is not None:
+                await unit.session.close()
+        for callback in unit.callbacks:
+            callback()
+
+    def after_commit(self, callback: Callable[[], None]) -> None:
+        """Call ``callback`` once the current unit of work commits, or right away outside one."""
+        unit = _current_unit.get()
+        if unit is not None and unit.owns(self):
+            unit.callbacks.append(callback)
+        else:
+            callback()
+
+    @asynccontextmanager
+    async def _session(self, read: bool = False) -> AsyncIterator[AsyncSession]:
+        unit = _current_unit.get()
+        if unit is not None and unit.owns(self):
+            # Reads inside a unit of work see its uncommitted writes.
+            yield await unit.begin()
+            return
+        async with self.db.read_session() if read else self.db.session() as session:
+            yield session
+
+    async def _commit(self, session: AsyncSession) -> None:
+        unit = _current_unit.get()
+        if unit is not None and unit.session is session:
+            await session.flush()
+        else:
+            await session.commit()
 
     async def initialize_defaults(self, initial_password: str | None, password_file: Path) -> str:
         defaults = {
@@ -40,7 +199,7 @@ class Repository:
             "bootstrap_complete": "1",
             "graphs_backend": "sqlite",
         }
-        async with self.db.session() as session:
+        async with self._session() as session:
             for key, value in defaults.items():
                 existing = await session.get(AppSetting, key)
                 if not existing:
@@ -59,7 +218,7 @@ class Repository:
                         updated_at=utcnow(),
                     )
                 )
-            await session.commit()
+            await self._commit(session)
 
         if generated_password:
             password_file.parent.mkdir(parents=True, exist_ok=True)
@@ -67,32 +226,40 @@ class Repository:
         return generated_password
 
     async def get_admin(self) -> dict[str, Any] | None:
-        async with self.db.session() as session:
+        async with self._session(read=True) as session:
             user = await session.scalar(select(User).where(User.username == "admin"))
             return self._user_to_dict(user) if user else None
 
     async def update_password(self, password_hash: str) -> None:
-        async with self.db.session() as session:
+        async with self._session() as session:
             user = await session.scalar(select(User).where(User.username == "admin"))
             if not user:
                 return
             user.password_hash = password_hash
             user.password_changed = True
             user.updated_at = utcnow()
-            await session.commit()
+            await self._commit(session)
 
     async def list_devices(self) -> list[dict[str, Any]]:
-        async with self.db.session() as session:
-            rows = await session.scalars(select(UPSDevice).order_by(UPSDevice.display_name))
-            return [self._device_to_dict(row) for row in rows.all()]
+        async with self._session(read=True) as session:
+            connection = await session.connection()
+            rows = await connection.execute(
+                select(
+                    *(_iso_column(column) if column.key in _DEVICE_TIMESTAMPS else column for column in _DEVICE_COLUMNS),
+                    func.coalesce(RawPayload.payload_json, UPSDevice.last_snapshot_json).label("last_snapshot_json"),
+                )
+                .outerjoin(RawPayload, RawPayload.id == UPSDevice.last_payload_id)
+                .order_by(UPSDevice.display_name)
+            )
+            return [_device_row_to_dict(row) for row in rows]
 
     async def get_device(self, device_id: int) -> dict[str, Any] | None:
-        async with self.db.session() as session:
+        async with self._session(read=True) as session:
             device = await session.get(UPSDevice, device_id)
             return self._device_to_dict(device) if device else None
 
     async def upsert_device(self, identifier: str, display_name: str, metadata: dict[str, Any]) -> int:
-        async with self.db.session() as session:
+        async with self._session() as session:
             existing = await session.scalar(select(UPSDevice).where(UPSDevice.identifier == identifier))
             now = utcnow()
             if existing:
@@ -101,7 +268,8 @@ class Repository:
                 existing.model = metadata.get("model")
                 existing.serial = metadata.get("serial")
                 existing.updated_at = now
-                await session.commit()
+                await self._commit(session)
+                self._bump("devices")
                 return int(existing.id)
             device = UPSDevice(
                 identifier=identifier,
@@ -113,8 +281,10 @@ class Repository:
                 updated_at=now,
             )
             session.add(device)
-            await session.commit()
+            await self._add_to_counters(session, devices=1, enabled_devices=int(bool(device.enabled)))
+            await self._commit(session)
             await session.refresh(device)
+            self._bump("devices")
             return int(device.id)
 
     async def update_device_settings(
@@ -125,60 +295,182 @@ class Repository:
         poll_interval_seconds: int,
         battery_low_pct_threshold: float,
         runtime_low_threshold_seconds: float,
+        adaptive_polling: bool = False,
+        min_poll_interval_seconds: float = 1,
+        max_poll_interval_seconds: float = 60,
+        deadband_enabled: bool = False,
+        deadband_percent: float = 1,
+        deadband_heartbeat_seconds: float = 300,
     ) -> None:
-        async with self.db.session() as session:
+        async with self._session() as session:
             device = await session.get(UPSDevice, device_id)
             if not device:
                 return
+            await self._add_to_counters(session, enabled_devices=int(enabled) - int(device.enabled))
             device.display_name = display_name
             device.enabled = enabled
             device.poll_interval_seconds = poll_interval_seconds
             device.battery_low_pct_threshold = battery_low_pct_threshold
             device.runtime_low_threshold_seconds = runtime_low_threshold_seconds
+            device.adaptive_polling = adaptive_polling
+            device.min_poll_interval_seconds = min_poll_interval_seconds
+            device.max_poll_interval_seconds = max(min_poll_interval_seconds, max_poll_interval_seconds)
+            device.deadband_enabled = deadband_enabled
+            device.deadband_percent = max(deadband_percent, 0)
+            device.deadband_heartbeat_seconds = max(deadband_heartbeat_seconds, 0)
             device.updated_at = utcnow()
-            await session.commit()
+            await self._commit(session)
+        self._bump("devices")
 
     async def set_device_enabled(self, device_id: int, enabled: bool) -> None:
-        async with self.db.session() as session:
+        async with self._session() as session:
             device = await session.get(UPSDevice, device_id)
             if not device:
                 return
+            await self._add_to_counters(session, enabled_devices=int(enabled) - int(device.enabled))
             device.enabled = enabled
             device.updated_at = utcnow()
-            await session.commit()
+            await self._commit(session)
+        self._bump("devices")
 
     async def save_snapshot(self, device_id: int, snapshot: DeviceSnapshot) -> None:
-        async with self.db.session() as session:
-            device = await session.get(UPSDevice, device_id)
-            if not device:
-                return
-            device.last_seen_at = snapshot.observed_at
-            device.last_snapshot_json = json.dumps(snapshot.raw_data)
-            device.updated_at = utcnow()
-            session.add(
-                TelemetrySample(
-                    ups_device_id=device_id,
-                    observed_at=snapshot.observed_at,
-                    battery_charge=snapshot.battery_charge,
-                    runtime_seconds=snapshot.runtime_seconds,
-                    input_voltage=snapshot.input_voltage,
-                    output_voltage=snapshot.output_voltage,
-                    load_percent=snapshot.load_percent,
-                    status_flags=",".join(sorted(snapshot.status_flags)),
-                    raw_json=json.dumps(snapshot.raw_data),
+        await self.save_snapshots([(device_id, snapshot)])
+
+    async def save_snapshots(
+        self,
+        snapshots: Sequence[tuple[int, DeviceSnapshot]],
+        store: Sequence[bool] | None = None,
+    ) -> None:
+        """Insert a batch of samples and refresh each device's latest snapshot in one transaction."""
+        if not snapshots:
+            return
+        try:
+            await self._write_snapshots(snapshots, store)
+        except BaseException:
+            self._payload_cache.clear()
+            raise
+
+    async def _write_snapshots(
+        self,
+        snapshots: Sequence[tuple[int, DeviceSnapshot]],
+        store: Sequence[bool] | None,
+    ) -> None:
+        payloads = [payload_digest(snapshot.raw_data) for _device_id, snapshot in snapshots]
+        latest: dict[int, int] = {}
+        for index, (device_id, snapshot) in enumerate(snapshots):
+            current = latest.get(device_id)
+            if current is None or snapshot.observed_at >= snapshots[current][1].observed_at:
+                latest[device_id] = index
+        async with self._session() as session:
+            payload_ids = await self._payload_ids(session, payloads)
+            devices = await session.scalars(select(UPSDevice).where(UPSDevice.id.in_(latest)))
+            known = set()
+            now = utcnow()
+            for device in devices.unique().all():
+                index = latest[device.id]
+                device.last_seen_at = snapshots[index][1].observed_at
+                device.last_payload_id = payload_ids[payloads[index][0]]
+                device.last_snapshot_json = None
+                device.updated_at = now
+                known.add(device.id)
+            rows_by_table: dict[str, list[dict[str, Any]]] = {}
+            for index, ((device_id, snapshot), (digest, _payload_json)) in enumerate(zip(snapshots, payloads)):
+                # Snapshots the deadband filter dropped only refresh their device.
+                if device_id not in known or (store is not None and not store[index]):
+                    continue
+                name = TelemetrySample.__tablename__
+                if self.partitioning == "monthly":
+                    name = partition_name(snapshot.observed_at)
+                rows_by_table.setdefault(name, []).append(
+                    {
+                        "ups_device_id": device_id,
+                        "observed_at": snapshot.observed_at,
+                        "battery_charge": snapshot.battery_charge,
+                        "runtime_seconds": snapshot.runtime_seconds,
+                        "input_voltage": snapshot.input_voltage,
+                        "output_voltage": snapshot.output_voltage,
+                        "load_percent": snapshot.load_percent,
+                        "status_flags": ",".join(sorted(snapshot.status_flags)),
+                        "payload_id": payload_ids[digest],
+                    }
                 )
+            for name, rows in rows_by_table.items():
+                table = await self._ensure_partition(session, name) if is_partition(name) else sample_table()
+                await session.execute(insert(table), rows)
+            await self._commit(session)
+        # Only remember payload ids and new partitions once they have committed.
+        self.after_commit(lambda: self._remember_payloads(payload_ids))
+        if self._partitions is not None:
+            self._partitions.update(name for name in rows_by_table if is_partition(name))
+
+    async def _partition_names(self, session: AsyncSession) -> set[str]:
+        if self._partitions is None:
+            rows = await session.execute(
+                text("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'telemetry_samples_%'")
             )
-            await session.commit()
+            self._partitions = {name for (name,) in rows.all() if is_partition(name)}
+        return self._partitions
+
+    async def _ensure_partition(self, session: AsyncSession, name: str) -> Table:
+        table = partition_table(name)
+        if name not in await self._partition_names(session):
+            await session.run_sync(lambda sync_session: table.create(sync_session.connection(), checkfirst=True))
+        return table
+
+    async def _sample_tables(
+        self,
+        session: AsyncSession,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> list[Table]:
+        """Tables that can hold raw samples in ``[start, end)``, oldest first."""
+        # Always include the unpartitioned table, for samples written while partitioning was off.
+        names = partitions_between(await self._partition_names(session), start, end)
+        return [sample_table(), *(partition_table(name) for name in names)]
+
+    async def _payload_ids(self, session: AsyncSession, payloads: Iterable[tuple[str, str]]) -> dict[str, int]:
+        missing = dict(payloads)
+        cached = {self._payload_cache[digest]: digest for digest in missing if digest in self._payload_cache}
+        ids: dict[str, int] = {}
+        if cached:
+            # A cached id may have been pruned since, and SQLite reuses rowids.
+            rows = await session.execute(
+                select(RawPayload.id, RawPayload.digest).where(RawPayload.id.in_(list(cached)))
+            )
+            for payload_id, digest in rows.all():
+                if cached[payload_id] == digest:
+                    ids[digest] = payload_id
+                    del missing[digest]
+        if missing:
+            now = utcnow()
+            await session.execute(
+                sqlite_insert(RawPayload).on_conflict_do_nothing(index_elements=["digest"]),
+                [
+                    {"digest": digest, "payload_json": payload_json, "first_seen_at": now}
+                    for digest, payload_json in missing.items()
+                ],
+            )
+            rows = await session.execute(
+                select(RawPayload.digest, RawPayload.id).where(RawPayload.digest.in_(list(missing)))
+            )
+            for digest, payload_id in rows.all():
+                ids[digest] = payload_id
+        return ids
+
+    def _remember_payloads(self, payload_ids: dict[str, int]) -> None:
+        self._payload_cache.update(payload_ids)
+        while len(self._payload_cache) > PAYLOAD_CACHE_SIZE:
+            del self._payload_cache[next(iter(self._payload_cache))]
 
     async def list_services(self) -> list[dict[str, Any]]:
-        async with self.db.session() as session:
+        async with self._session(read=True) as session:
             rows = await session.scalars(
                 select(NotificationService).order_by(NotificationService.service_type, NotificationService.name)
             )
             return [self._service_to_dict(row) for row in rows.all()]
 
     async def create_service(self, service_type: str, name: str, config: dict[str, Any]) -> None:
-        async with self.db.session() as session:
+        async with self._session() as session:
             service = NotificationService(
                 service_type=service_type,
                 name=name,
@@ -188,10 +480,11 @@ class Repository:
                 updated_at=utcnow(),
             )
             session.add(service)
-            await session.commit()
+            await self._commit(session)
+        self._bump("rules")
 
     async def list_channels(self) -> list[dict[str, Any]]:
-        async with self.db.session() as session:
+        async with self._session(read=True) as session:
             rows = await session.scalars(
                 select(NotificationChannel)
                 .options(joinedload(NotificationChannel.service))
@@ -206,7 +499,7 @@ class Repository:
         target: dict[str, Any],
         extra_text: str,
     ) -> None:
-        async with self.db.session() as session:
+        async with self._session() as session:
             channel = NotificationChannel(
                 name=name,
                 service_id=service_id,
@@ -217,10 +510,11 @@ class Repository:
                 updated_at=utcnow(),
             )
             session.add(channel)
-            await session.commit()
+            await self._commit(session)
+        self._bump("rules")
 
     async def list_rules(self) -> list[dict[str, Any]]:
-        async with self.db.session() as session:
+        async with self._session(read=True) as session:
             rows = await session.scalars(
                 select(AlertRule)
                 .options(joinedload(AlertRule.device), joinedload(AlertRule.channel))
@@ -235,13 +529,32 @@ class Repository:
         channel_id: int,
         repeat_interval_seconds: int,
         send_recovery: bool,
+        expression: str | None = None,
     ) -> None:
-        if condition_key not in CONDITIONS:
+        if condition_key.startswith(CUSTOM_CONDITION_PREFIX):
+            if not condition_key.removeprefix(CUSTOM_CONDITION_PREFIX).strip():
+                raise ValueError("Custom rules need a label")
+            if expression is None:
+                raise ValueError("Custom rules need an expression")
+            expression = compile_expression(expression).source
+        elif condition_key not in CONDITIONS:
             raise ValueError("Unknown condition key")
-        async with self.db.session() as session:
+        else:
+            expression = None
+        async with self._session() as session:
+            if expression is not None:
+                existing = await session.scalar(
+                    select(AlertRule.expression).where(
+                        AlertRule.ups_device_id == ups_device_id,
+                        AlertRule.condition_key == condition_key,
+                    )
+                )
+                if existing is not None and existing != expression:
+                    raise ValueError("This label is already used with a different expression")
             rule = AlertRule(
                 ups_device_id=ups_device_id,
                 condition_key=condition_key,
+                expression=expression,
                 channel_id=channel_id,
                 repeat_interval_seconds=repeat_interval_seconds,
                 send_recovery=send_recovery,
@@ -249,14 +562,18 @@ class Repository:
                 created_at=utcnow(),
                 updated_at=utcnow(),
             )
-            session.add(rule)
+            # A savepoint, so a duplicate rule rolls back on its own without
+            # taking a surrounding unit of work's writes with it.
             try:
-                await session.commit()
+                async with session.begin_nested():
+                    session.add(rule)
             except IntegrityError:
-                await session.rollback()
+                pass
+            await self._commit(session)
+        self._bump("rules")
 
     async def get_rules_for_device(self, device_id: int) -> list[dict[str, Any]]:
-        async with self.db.session() as session:
+        async with self._session(read=True) as session:
             rows = await session.scalars(
                 select(AlertRule)
                 .options(
@@ -268,7 +585,7 @@ class Repository:
             return [self._rule_detail_to_dict(row) for row in rows.all() if row.channel]
 
     async def get_active_condition(self, device_id: int, condition_key: str) -> dict[str, Any] | None:
-        async with self.db.session() as session:
+        async with self._session(read=True) as session:
             row = await session.scalar(
                 select(ActiveCondition).where(
                     ActiveCondition.ups_device_id == device_id,
@@ -277,6 +594,11 @@ class Repository:
             )
             return self._active_condition_to_dict(row) if row else None
 
+    async def list_active_conditions_for_device(self, device_id: int) -> list[dict[str, Any]]:
+        async with self._session(read=True) as session:
+            rows = await session.scalars(select(ActiveCondition).where(ActiveCondition.ups_device_id == device_id))
+            return [self._active_condition_to_dict(row) for row in rows.all()]
+
     async def open_or_update_active_condition(
         self,
         device_id: int,
@@ -284,8 +606,8 @@ class Repository:
         value: Any,
         reason: str,
         mark_alerted: bool = False,
-    ) -> None:
-        async with self.db.session() as session:
+    ) -> dict[str, Any]:
+        async with self._session() as session:
             row = await session.scalar(
                 select(ActiveCondition).where(
                     ActiveCondition.ups_device_id == device_id,
@@ -308,10 +630,11 @@ class Repository:
                     last_reason=reason,
                 )
                 session.add(row)
-            await session.commit()
+            await self._commit(session)
+            return self._active_condition_to_dict(row)
 
     async def mark_condition_alerted(self, device_id: int, condition_key: str) -> None:
-        async with self.db.session() as session:
+        async with self._session() as session:
             row = await session.scalar(
                 select(ActiveCondition).where(
                     ActiveCondition.ups_device_id == device_id,
@@ -320,20 +643,20 @@ class Repository:
             )
             if row:
                 row.last_alerted_at = utcnow()
-                await session.commit()
+                await self._commit(session)
 
     async def clear_active_condition(self, device_id: int, condition_key: str) -> None:
-        async with self.db.session() as session:
+        async with self._session() as session:
             await session.execute(
                 delete(ActiveCondition).where(
                     ActiveCondition.ups_device_id == device_id,
                     ActiveCondition.condition_key == condition_key,
                 )
             )
-            await session.commit()
+            await self._commit(session)
 
     async def list_active_conditions(self) -> list[dict[str, Any]]:
-        async with self.db.session() as session:
+        async with self._session(read=True) as session:
             rows = await session.execute(
                 select(ActiveCondition, UPSDevice.display_name)
                 .join(UPSDevice, UPSDevice.id == ActiveCondition.ups_device_id)
@@ -360,7 +683,7 @@ class Repository:
         response_code: int | None = None,
         error_message: str | None = None,
     ) -> None:
-        async with self.db.session() as session:
+        async with self._session() as session:
             session.add(
                 AlertEvent(
                     occurred_at=utcnow(),
@@ -376,66 +699,636 @@ class Repository:
                     payload_json=json.dumps(payload),
                 )
             )
-            await session.commit()
+            await self._add_to_counters(session, failed_alerts=int(not success))
+            await self._commit(session)
 
-    async def list_recent_alerts(self, limit: int = 50) -> list[dict[str, Any]]:
-        async with self.db.session() as session:
+    async def enqueue_notification(
+        self,
+        device_id: int | None,
+        channel_id: int | None,
+        condition_key: str,
+        condition_state: str,
+        subject: str,
+        body: str,
+        payload: dict[str, Any],
+    ) -> int:
+        async with self._session() as session:
+            now = utcnow()
+            entry = NotificationOutbox(
+                created_at=now,
+                ups_device_id=device_id,
+                channel_id=channel_id,
+                condition_key=condition_key,
+                condition_state=condition_state,
+                subject=subject,
+                body=body,
+                payload_json=json.dumps(payload),
+                status="pending",
+                attempts=0,
+                next_attempt_at=now,
+            )
+            session.add(entry)
+            await self._commit(session)
+            return int(entry.id)
+
+    async def due_notifications(self, limit: int, exclude: Collection[int] = ()) -> list[dict[str, Any]]:
+        """Due pending outbox rows, with their channel and service as currently configured."""
+        query = (
+            select(NotificationOutbox, NotificationChannel, NotificationService)
+            .outerjoin(NotificationChannel, NotificationChannel.id == NotificationOutbox.channel_id)
+            .outerjoin(NotificationService, NotificationService.id == NotificationChannel.service_id)
+            .where(NotificationOutbox.status == "pending", NotificationOutbox.next_attempt_at <= utcnow())
+            .order_by(NotificationOutbox.next_attempt_at, NotificationOutbox.id)
+            .limit(limit)
+        )
+        if exclude:
+            query = query.where(NotificationOutbox.id.not_in(list(exclude)))
+        async with self._session(read=True) as session:
+            rows = await session.execute(query)
+            return [self._outbox_to_dict(entry, channel, service) for entry, channel, service in rows.all()]
+
+    async def notification_outbox_counts(self) -> dict[str, int]:
+        async with self._session(read=True) as session:
             rows = await session.execute(
-                select(AlertEvent, UPSDevice.display_name, NotificationChannel.name)
-                .outerjoin(UPSDevice, UPSDevice.id == AlertEvent.ups_device_id)
-                .outerjoin(NotificationChannel, NotificationChannel.id == AlertEvent.channel_id)
-                .order_by(desc(AlertEvent.occurred_at))
-                .limit(limit)
+                select(NotificationOutbox.status, func.count()).group_by(NotificationOutbox.status)
             )
-            result = []
-            for event, display_name, channel_name in rows.all():
-                item = self._alert_event_to_dict(event)
-                item["display_name"] = display_name
-                item["channel_name"] = channel_name
-                result.append(item)
-            return result
+            return {status: int(count) for status, count in rows.all()}
 
-    async def recent_samples_for_device(self, device_id: int, limit: int = 96) -> list[dict[str, Any]]:
-        async with self.db.session() as session:
-            rows = await session.scalars(
-                select(TelemetrySample)
-                .where(TelemetrySample.ups_device_id == device_id)
-                .order_by(desc(TelemetrySample.observed_at))
-                .limit(limit)
+    async def record_notification_attempt(
+        self,
+        outbox_id: int,
+        result: DeliveryResult,
+        retry_at: datetime | None,
+    ) -> None:
+        """Log a delivery attempt and settle its outbox row in the same transaction."""
+        async with self._session() as session:
+            entry = await session.get(NotificationOutbox, outbox_id)
+            if not entry:
+                return
+            now = utcnow()
+            session.add(
+                AlertEvent(
+                    occurred_at=now,
+                    ups_device_id=entry.ups_device_id,
+                    channel_id=entry.channel_id,
+                    condition_key=entry.condition_key,
+                    condition_state=entry.condition_state,
+                    provider=result.provider,
+                    target=result.target,
+                    success=result.success,
+                    response_code=result.response_code,
+                    error_message=result.error_message,
+                    payload_json=entry.payload_json,
+                )
             )
-            samples = [self._sample_to_dict(row) for row in rows.all()]
+            await self._add_to_counters(session, failed_alerts=int(not result.success))
+            if result.success:
+                await session.delete(entry)
+            else:
+                entry.attempts += 1
+                entry.last_attempt_at = now
+                entry.last_error = result.error_message or f"response code {result.response_code}"
+                if retry_at is None:
+                    entry.status = "dead"
+                else:
+                    entry.next_attempt_at = retry_at
+            await self._commit(session)
+
+    async def list_recent_alerts(self, limit: int = 50) -> list[dict[str, Any]]:
+        alerts, _cursor = await self.list_alert_history(limit)
+        return alerts
+
+    async def list_alert_history(
+        self,
+        limit: int = 50,
+        before: tuple[datetime, int] | None = None,
+        device_id: int | None = None,
+        condition_key: str | None = None,
+        channel_id: int | None = None,
+        provider: str | None = None,
+        success: bool | None = None,
+    ) -> tuple[list[dict[str, Any]], tuple[datetime, int] | None]:
+        """One page of matching alert events, newest first, and the cursor of the next page."""
+        query = (
+            select(
+                *(_iso_epoch(column) if column.key == "occurred_at" else column for column in _ALERT_EVENT_COLUMNS),
+                UPSDevice.display_name,
+                NotificationChannel.name.label("channel_name"),
+            )
+            .outerjoin(UPSDevice, UPSDevice.id == AlertEvent.ups_device_id)
+            .outerjoin(NotificationChannel, NotificationChannel.id == AlertEvent.channel_id)
+        )
+        if device_id is not None:
+            query = query.where(AlertEvent.ups_device_id == device_id)
+        if condition_key is not None:
+            query = query.where(AlertEvent.condition_key == condition_key)
+        if channel_id is not None:
+            query = query.where(AlertEvent.channel_id == channel_id)
+        if provider is not None:
+            query = query.where(AlertEvent.provider == provider)
+        if success is not None:
+            query = query.where(AlertEvent.success == success)
+        if before is not None:
+            query = query.where(tuple_(AlertEvent.occurred_at, AlertEvent.id) < before)
+        async with self._session(read=True) as session:
+            connection = await session.connection()
+            rows = await connection.execute(
+                query.order_by(desc(AlertEvent.occurred_at), desc(AlertEvent.id)).limit(limit + 1)
+            )
+            alerts = [row._asdict() for row in rows]
+        if len(alerts) <= limit:
+            return alerts, None
+        del alerts[limit:]
+        last = alerts[-1]
+        return alerts, (datetime.fromisoformat(last["occurred_at"]).replace(tzinfo=UTC), last["id"])
+
+    async def recent_samples_for_device(self, device_id: int, limit: int = 96) -> list[dict[str, Any]]:
+        async with self._session(read=True) as session:
+            samples: list[dict[str, Any]] = []
+            connection = await session.connection()
+            for table in reversed(await self._sample_tables(session)):
+                rows = await connection.execute(
+                    select(*_sample_columns(table))
+                    .where(table.c.ups_device_id == device_id)
+                    .order_by(desc(table.c.observed_at))
+                    .limit(limit - len(samples))
+                )
+                samples.extend(self._sample_to_dict(row) for row in rows)
+                if len(samples) >= limit:
+                    break
+            if len(samples) < limit:
+                blocks = await session.stream_scalars(
+                    select(TelemetryBlock.data)
+                    .where(TelemetryBlock.ups_device_id == device_id)
+                    .order_by(desc(TelemetryBlock.start_at))
+                )
+                async for data in blocks:
+                    decoded = [_block_sample_to_dict(sample) for sample in decode_block(data)]
+                    samples.extend(reversed(decoded[-(limit - len(samples)) :]))
+                    if len(samples) >= limit:
+                        break
             samples.reverse()
             return samples
 
-    async def dashboard_counts(self) -> dict[str, int]:
-        async with self.db.session() as session:
-            device_count = await session.scalar(select(func.count()).select_from(UPSDevice))
-            enabled_count = await session.scalar(
-                select(func.count()).select_from(UPSDevice).where(UPSDevice.enabled.is_(True))
+    async def earliest_telemetry_at(self, resolution_seconds: int | None = None) -> datetime | None:
+        """Oldest raw sample (or rollup bucket at ``resolution_seconds``) across all devices."""
+        earliest: datetime | None = None
+        async with self._session(read=True) as session:
+            device_ids = list(await session.scalars(select(UPSDevice.id)))
+            if resolution_seconds is not None:
+                for device_id in device_ids:
+                    value = await session.scalar(
+                        select(func.min(TelemetryRollup.bucket_start)).where(
+                            TelemetryRollup.ups_device_id == device_id,
+                            TelemetryRollup.resolution_seconds == resolution_seconds,
+                        )
+                    )
+                    if value is not None and (earliest is None or value < earliest):
+                        earliest = value
+                return earliest
+            for table in await self._sample_tables(session):
+                for device_id in device_ids:
+                    value = await session.scalar(
+                        select(func.min(table.c.observed_at)).where(table.c.ups_device_id == device_id)
+                    )
+                    if value is not None and (earliest is None or value < earliest):
+                        earliest = value
+                # Partitions come in month order, so the first one with data holds the oldest sample.
+                if earliest is not None and table is not sample_table():
+                    break
+        return earliest
+
+    async def rollup_telemetry(
+        self,
+        resolution_seconds: int,
+        source_resolution_seconds: int | None,
+        start: datetime,
+        end: datetime,
+    ) -> int:
+        """Upsert min/avg/max buckets for ``[start, end)`` from raw samples or finer rollups."""
+        buckets: dict[tuple[int, datetime], dict[str, Any]] = {}
+        async with self._session() as session:
+            devices = (await session.execute(select(*_HOLD_COLUMNS))).all()
+            for device in devices:
+                device_id = device.id
+                if source_resolution_seconds is None:
+                    async with aclosing(self._rollup_samples(session, device._mapping, start, end)) as samples:
+                        async for observed_at, *values, _flags in samples:
+                            bucket = _bucket(buckets, device_id, bucket_start(observed_at, resolution_seconds))
+                            bucket["sample_count"] += 1
+                            for metric, value in zip(TELEMETRY_METRICS, values):
+                                _accumulate(bucket[metric], value, value, value, 1)
+                else:
+                    rows = await session.scalars(
+                        select(TelemetryRollup).where(
+                            TelemetryRollup.ups_device_id == device_id,
+                            TelemetryRollup.resolution_seconds == source_resolution_seconds,
+                            TelemetryRollup.bucket_start >= start,
+                            TelemetryRollup.bucket_start < end,
+                        )
+                    )
+                    for row in rows.all():
+                        bucket = _bucket(buckets, device_id, bucket_start(row.bucket_start, resolution_seconds))
+                        bucket["sample_count"] += row.sample_count
+                        for metric in TELEMETRY_METRICS:
+                            _accumulate(
+                                bucket[metric],
+                                getattr(row, f"{metric}_min"),
+                                getattr(row, f"{metric}_avg"),
+                                getattr(row, f"{metric}_max"),
+                                row.sample_count,
+                            )
+            if not buckets:
+                return 0
+            values = []
+            for (device_id, start_at), bucket in buckets.items():
+                row: dict[str, Any] = {
+                    "ups_device_id": device_id,
+                    "resolution_seconds": resolution_seconds,
+                    "bucket_start": start_at,
+                    "sample_count": bucket["sample_count"],
+                }
+                for metric in TELEMETRY_METRICS:
+                    count, total, minimum, maximum = bucket[metric]
+                    row[f"{metric}_min"] = minimum
+                    row[f"{metric}_avg"] = total / count if count else None
+                    row[f"{metric}_max"] = maximum
+                values.append(row)
+            insert = sqlite_insert(TelemetryRollup)
+            await session.execute(
+                insert.on_conflict_do_update(
+                    index_elements=["ups_device_id", "resolution_seconds", "bucket_start"],
+                    set_={
+                        column: insert.excluded[column]
+                        for column in values[0]
+                        if column not in {"ups_device_id", "resolution_seconds", "bucket_start"}
+                    },
+                ),
+                values,
+            )
+            await self._commit(session)
+            return len(values)
+
+    async def _rollup_samples(
+        self,
+        session: AsyncSession,
+        device: Mapping[str, Any],
+        start: datetime,
+        end: datetime,
+    ) -> AsyncIterator[BlockSample]:
+        if not device["deadband_enabled"]:
+            async for sample in self._stream_samples(session, device["id"], start, end):
+                yield sample
+            return
+        # Hold each stored sample over the polls it stands for, so quiet
+        # minutes get a bucket and averages are weighted by time.
+        interval = hold_interval(device)
+        reach = timedelta(seconds=device["deadband_heartbeat_seconds"] + interval)
+        last_seen = device["last_seen_at"]
+        held = step_hold(
+            self._stream_samples(session, device["id"], start - reach, end + reach),
+            interval,
+            device["deadband_heartbeat_seconds"],
+            as_utc(last_seen) if last_seen else None,
+        )
+        async with aclosing(held):
+            async for sample in held:
+                if sample[0] >= as_utc(end):
+                    return
+                if sample[0] >= as_utc(start):
+                    yield sample
+
+    async def prune_telemetry(self, resolution_seconds: int | None, cutoff: datetime, batch_size: int) -> int:
+        """Delete up to ``batch_size`` rows older than ``cutoff`` per device; returns how many."""
+        deleted = 0
+        if resolution_seconds is None:
+            # Monthly partitions are dropped whole, never trimmed row by row.
+            deleted += await self._drop_partitions(cutoff)
+            deleted += await self._prune_blocks(cutoff, batch_size)
+        async with self._session() as session:
+            device_ids = list(await session.scalars(select(UPSDevice.id)))
+        for device_id in device_ids:
+            async with self._session() as session:
+                if resolution_seconds is None:
+                    doomed = (
+                        select(TelemetrySample.id)
+                        .where(TelemetrySample.ups_device_id == device_id, TelemetrySample.observed_at < cutoff)
+                        .limit(batch_size)
+                    )
+                    result = await session.execute(delete(TelemetrySample).where(TelemetrySample.id.in_(doomed)))
+                else:
+                    rowid = literal_column("rowid")
+                    doomed = (
+                        select(rowid)
+                        .select_from(TelemetryRollup)
+                        .where(
+                            TelemetryRollup.ups_device_id == device_id,
+                            TelemetryRollup.resolution_seconds == resolution_seconds,
+                            TelemetryRollup.bucket_start < cutoff,
+                        )
+                        .limit(batch_size)
+                    )
+                    result = await session.execute(delete(TelemetryRollup).where(rowid.in_(doomed)))
+                await self._commit(session)
+                deleted += result.rowcount or 0
+        return deleted
+
+    async def _prune_blocks(self, cutoff: datetime, batch_size: int) -> int:
+        deleted = 0
+        async with self._session() as session:
+            device_ids = list(await session.scalars(select(UPSDevice.id)))
+        for device_id in device_ids:
+            async with self._session() as session:
+                doomed = (
+                    select(TelemetryBlock.id, TelemetryBlock.sample_count)
+                    .where(
+                        TelemetryBlock.ups_device_id == device_id,
+                        TelemetryBlock.start_at <= cutoff - timedelta(seconds=BLOCK_SECONDS),
+                    )
+                    .limit(batch_size)
+                )
+                rows = (await session.execute(doomed)).all()
+                if not rows:
+                    continue
+                await session.execute(delete(TelemetryBlock).where(TelemetryBlock.id.in_([row.id for row in rows])))
+                await self._commit(session)
+                deleted += sum(row.sample_count for row in rows)
+        return deleted
+
+    async def _drop_partitions(self, cutoff: datetime) -> int:
+        async with self._session() as session:
+            names = partitions_between(await self._partition_names(session), None, cutoff)
+        names = [name for name in names if partition_bounds(name)[1] <= as_utc(cutoff)]
+        dropped = 0
+        for name in names:
+            table = partition_table(name)
+            async with self._session() as session:
+                dropped += await session.scalar(select(func.count()).select_from(table)) or 0
+                await session.run_sync(lambda sync_session: table.drop(sync_session.connection(), checkfirst=True))
+                await self._commit(session)
+            self._partitions.discard(name)
+            forget_partition(name)
+        return dropped
+
+    async def prune_raw_payloads(self, batch_size: int) -> int:
+        """Delete up to ``batch_size`` payloads no sample or device refers to any more."""
+        async with self._session() as session:
+            doomed = (
+                select(RawPayload.id)
+                .where(
+                    *(
+                        ~select(table.c.id).where(table.c.payload_id == RawPayload.id).exists()
+                        for table in await self._sample_tables(session)
+                    ),
+                    ~select(UPSDevice.id).where(UPSDevice.last_payload_id == RawPayload.id).exists(),
+                )
+                .limit(batch_size)
+            )
+            result = await session.execute(delete(RawPayload).where(RawPayload.id.in_(doomed)))
+            await self._commit(session)
+        if result.rowcount:
+            self._payload_cache.clear()
+        return result.rowcount or 0
+
+    async def pack_telemetry_blocks(self, until: datetime, max_windows: int = 24) -> int:
+        """Pack raw samples from closed windows before ``until`` into blocks; returns how many."""
+        packed = 0
+        async with self._session() as session:
+            device_ids = list(await session.scalars(select(UPSDevice.id)))
+        for device_id in device_ids:
+            for _ in range(max_windows):
+                async with self._session() as session:
+                    oldest: datetime | None = None
+                    for table in await self._sample_tables(session, None, until):
+                        value = await session.scalar(
+                            select(func.min(table.c.observed_at)).where(
+                                table.c.ups_device_id == device_id,
+                                table.c.observed_at < until,
+                            )
+                        )
+                        if value is not None and (oldest is None or value < oldest):
+                            oldest = value
+                    if oldest is None:
+                        break
+                    window_start = bucket_start(oldest, BLOCK_SECONDS)
+                    window_end = window_start + timedelta(seconds=BLOCK_SECONDS)
+                    if window_end > as_utc(until):
+                        break
+                    samples: list[BlockSample] = []
+                    for table in await self._sample_tables(session, window_start, window_end):
+                        in_window = (
+                            table.c.ups_device_id == device_id,
+                            table.c.observed_at >= window_start,
+                            table.c.observed_at < window_end,
+                        )
+                        rows = await session.execute(
+                            select(
+                                table.c.observed_at,
+                                *(table.c[metric] for metric in TELEMETRY_METRICS),
+                                table.c.status_flags,
+                            ).where(*in_window)
+                        )
+                        samples.extend(
+                            (as_utc(observed_at), *values, flags or "") for observed_at, *values, flags in rows.all()
+                        )
+                        await session.execute(delete(table).where(*in_window))
+                    samples.sort(key=lambda sample: sample[0])
+                    session.add(
+                        TelemetryBlock(
+                            ups_device_id=device_id,
+                            start_at=window_start,
+                            end_at=window_end,
+                            sample_count=len(samples),
+                            encoding=BLOCK_ENCODING,
+                            data=encode_block(samples),
+                        )
+                    )
+                    await self._commit(session)
+                packed += len(samples)
+        return packed
+
+    async def _block_samples(
+        self,
+        session: AsyncSession,
+        device_id: int,
+        start: datetime | None,
+        end: datetime | None,
+    ) -> AsyncIterator[BlockSample]:
+        query = select(TelemetryBlock.data).where(TelemetryBlock.ups_device_id == device_id)
+        if start is not None:
+            query = query.where(TelemetryBlock.start_at > start - timedelta(seconds=BLOCK_SECONDS))
+        if end is not None:
+            query = query.where(TelemetryBlock.start_at < end)
+        blocks = await session.stream_scalars(query.order_by(TelemetryBlock.start_at))
+        try:
+            async for data in blocks:
+                for sample in decode_block(data):
+                    if (start is None or sample[0] >= as_utc(start)) and (end is None or sample[0] < as_utc(end)):
+                        yield sample
+        finally:
+            await blocks.close()
+
+    async def iter_samples(
+        self,
+        device_id: int,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> AsyncIterator[BlockSample]:
+        """Stream every raw sample of a device in ``[start, end)``, packed or not, oldest first."""
+        async with self._session(read=True) as session:
+            async with aclosing(self._stream_samples(session, device_id, start, end)) as samples:
+                async for sample in samples:
+                    yield sample
+
+    async def _stream_samples(
+        self,
+        session: AsyncSession,
+        device_id: int,
+        start: datetime | None,
+        end: datetime | None,
+    ) -> AsyncIterator[BlockSample]:
+        async with aclosing(self._block_samples(session, device_id, start, end)) as blocks:
+            async for sample in blocks:
+                yield sample
+        for table in await self._sample_tables(session, start, end):
+            last: tuple[datetime, int] | None = None
+            while True:
+                query = select(
+                    table.c.id,
+                    table.c.observed_at,
+                    *(table.c[metric] for metric in TELEMETRY_METRICS),
+                    table.c.status_flags,
+                ).where(table.c.ups_device_id == device_id)
+                if start is not None:
+                    query = query.where(table.c.observed_at >= start)
+                if end is not None:
+                    query = query.where(table.c.observed_at < end)
+                if last is not None:
+                    query = query.where(tuple_(table.c.observed_at, table.c.id) > last)
+                rows = (
+                    await session.execute(query.order_by(table.c.observed_at, table.c.id).limit(EXPORT_PAGE_SIZE))
+                ).all()
+                for _row_id, observed_at, *values, flags in rows:
+                    yield (as_utc(observed_at), *values, flags or "")
+                if len(rows) < EXPORT_PAGE_SIZE:
+                    break
+                last = (rows[-1].observed_at, rows[-1].id)
+
+    async def last_sample_before(self, device_id: int, moment: datetime) -> dict[str, Any] | None:
+        """Newest raw sample strictly before ``moment``, packed or not."""
+        async with self._session(read=True) as session:
+            for table in reversed(await self._sample_tables(session, None, moment)):
+                row = (
+                    await session.execute(
+                        select(*_sample_columns(table))
+                        .where(table.c.ups_device_id == device_id, table.c.observed_at < moment)
+                        .order_by(desc(table.c.observed_at))
+                        .limit(1)
+                    )
+                ).first()
+                if row is not None:
+                    return self._sample_to_dict(row)
+            data = await session.scalar(
+                select(TelemetryBlock.data)
+                .where(TelemetryBlock.ups_device_id == device_id, TelemetryBlock.start_at < moment)
+                .order_by(desc(TelemetryBlock.start_at))
+                .limit(1)
             )
-            alert_count = await session.scalar(
-                select(func.count()).select_from(AlertEvent).where(AlertEvent.success.is_(False))
+            if data is None:
+                return None
+            held = [sample for sample in decode_block(data) if sample[0] < as_utc(moment)]
+            return _block_sample_to_dict(held[-1]) if held else None
+
+    async def telemetry_series(
+        self,
+        device_id: int,
+        start: datetime,
+        end: datetime,
+        resolution_seconds: int | None = None,
+    ) -> list[dict[str, Any]]:
+        """Samples for a time range, either raw or averaged at ``resolution_seconds``."""
+        async with self._session(read=True) as session:
+            if resolution_seconds is None:
+                samples: list[dict[str, Any]] = []
+                for table in await self._sample_tables(session, start, end):
+                    rows = await session.execute(
+                        select(*_sample_columns(table))
+                        .where(
+                            table.c.ups_device_id == device_id,
+                            table.c.observed_at >= start,
+                            table.c.observed_at < end,
+                        )
+                        .order_by(table.c.observed_at)
+                    )
+                    samples.extend(self._sample_to_dict(row) for row in rows.all())
+                samples.extend(
+                    [
+                        _block_sample_to_dict(sample)
+                        async for sample in self._block_samples(session, device_id, start, end)
+                    ]
+                )
+                samples.sort(key=lambda sample: sample["observed_at"])
+                return samples
+            rows = await session.scalars(
+                select(TelemetryRollup)
+                .where(
+                    TelemetryRollup.ups_device_id == device_id,
+                    TelemetryRollup.resolution_seconds == resolution_seconds,
+                    TelemetryRollup.bucket_start >= start,
+                    TelemetryRollup.bucket_start < end,
+                )
+                .order_by(TelemetryRollup.bucket_start)
             )
-            return {
-                "devices": int(device_count or 0),
-                "enabled_devices": int(enabled_count or 0),
-                "failed_alerts": int(alert_count or 0),
-            }
+            return [self._rollup_to_dict(row) for row in rows.all()]
+
+    async def dashboard_counts(self) -> dict[str, int]:
+        """The dashboard totals, read from ``dashboard_counters`` rather than counted."""
+        async with self._session(read=True) as session:
+            rows = await session.execute(select(DashboardCounter.name, DashboardCounter.value))
+            stored = dict(rows.all())
+            return {name: int(stored.get(name) or 0) for name in _DASHBOARD_COUNTS}
+
+    async def rebuild_dashboard_counts(self) -> dict[str, tuple[int, int]]:
+        """Recount every dashboard counter and return ``{name: (stored, counted)}``."""
+        async with self._session() as session:
+            rows = await session.execute(select(DashboardCounter.name, DashboardCounter.value))
+            stored = dict(rows.all())
+            result = {}
+            for name, query in _DASHBOARD_COUNTS.items():
+                counted = int(await session.scalar(query) or 0)
+                result[name] = (int(stored.get(name) or 0), counted)
+                await session.execute(
+                    sqlite_insert(DashboardCounter)
+                    .values(name=name, value=counted)
+                    .on_conflict_do_update(index_elements=["name"], set_={"value": counted})
+                )
+            await self._commit(session)
+            return result
+
+    async def _add_to_counters(self, session: AsyncSession, **deltas: int) -> None:
+        """Move dashboard counters by ``deltas`` in the caller's transaction."""
+        for name, delta in deltas.items():
+            if delta:
+                await session.execute(
+                    update(DashboardCounter)
+                    .where(DashboardCounter.name == name)
+                    .values(value=DashboardCounter.value + delta)
+                )
 
     async def get_setting(self, key: str, default: str | None = None) -> str | None:
-        async with self.db.session() as session:
+        async with self._session(read=True) as session:
             row = await session.get(AppSetting, key)
             return row.value if row else default
 
     async def set_setting(self, key: str, value: str) -> None:
-        async with self.db.session() as session:
+        async with self._session() as session:
             row = await session.get(AppSetting, key)
             if row:
                 row.value = value
                 row.updated_at = utcnow()
             else:
                 session.add(AppSetting(key=key, value=value, updated_at=utcnow()))
-            await session.commit()
+            await self._commit(session)
 
     def _user_to_dict(self, row: User) -> dict[str, Any]:
         return {
@@ -456,13 +1349,19 @@ class Repository:
             "display_name": row.display_name,
             "enabled": row.enabled,
             "poll_interval_seconds": row.poll_interval_seconds,
+            "adaptive_polling": row.adaptive_polling,
+            "min_poll_interval_seconds": row.min_poll_interval_seconds,
+            "max_poll_interval_seconds": row.max_poll_interval_seconds,
+            "deadband_enabled": row.deadband_enabled,
+            "deadband_percent": row.deadband_percent,
+            "deadband_heartbeat_seconds": row.deadband_heartbeat_seconds,
             "battery_low_pct_threshold": row.battery_low_pct_threshold,
             "runtime_low_threshold_seconds": row.runtime_low_threshold_seconds,
             "vendor": row.vendor,
             "model": row.model,
             "serial": row.serial,
             "last_seen_at": row.last_seen_at.isoformat() if row.last_seen_at else None,
-            "last_snapshot_json": row.last_snapshot_json,
+            "last_snapshot_json": row.last_payload.payload_json if row.last_payload else row.last_snapshot_json,
             "created_at": row.created_at.isoformat(),
             "updated_at": row.updated_at.isoformat(),
         }
@@ -500,6 +1399,7 @@ class Repository:
             "ups_device_id": row.ups_device_id,
             "display_name": row.device.display_name if row.device else None,
             "condition_key": row.condition_key,
+            "expression": row.expression,
             "channel_id": row.channel_id,
             "channel_name": row.channel.name if row.channel else None,
             "repeat_interval_seconds": row.repeat_interval_seconds,
@@ -514,6 +1414,7 @@ class Repository:
             "id": row.id,
             "ups_device_id": row.ups_device_id,
             "condition_key": row.condition_key,
+            "expression": row.expression,
             "channel_id": row.channel_id,
             "channel_name": channel.name if channel else None,
             "target": json.loads(channel.target_json) if channel else {},
@@ -538,28 +1439,129 @@ class Repository:
             "last_reason": row.last_reason,
         }
 
-    def _alert_event_to_dict(self, row: AlertEvent) -> dict[str, Any]:
+    def _outbox_to_dict(
+        self,
+        row: NotificationOutbox,
+        channel: NotificationChannel | None,
+        service: NotificationService | None,
+    ) -> dict[str, Any]:
         return {
             "id": row.id,
-            "occurred_at": row.occurred_at.isoformat(),
+            "created_at": row.created_at.isoformat(),
             "ups_device_id": row.ups_device_id,
             "channel_id": row.channel_id,
             "condition_key": row.condition_key,
             "condition_state": row.condition_state,
-            "provider": row.provider,
-            "target": row.target,
-            "success": row.success,
-            "response_code": row.response_code,
-            "error_message": row.error_message,
-            "payload_json": row.payload_json,
+            "subject": row.subject,
+            "body": row.body,
+            "payload": json.loads(row.payload_json),
+            "attempts": row.attempts,
+            "service_type": service.service_type if service else "unknown",
+            "service_config": json.loads(service.config_json) if service else {},
+            "target": json.loads(channel.target_json) if channel else {},
         }
 
-    def _sample_to_dict(self, row: TelemetrySample) -> dict[str, Any]:
+    def _rollup_to_dict(self, row: TelemetryRollup) -> dict[str, Any]:
+        item: dict[str, Any] = {
+            "observed_at": row.bucket_start.isoformat(),
+            "sample_count": row.sample_count,
+        }
+        for metric in TELEMETRY_METRICS:
+            item[metric] = getattr(row, f"{metric}_avg")
+            item[f"{metric}_min"] = getattr(row, f"{metric}_min")
+            item[f"{metric}_max"] = getattr(row, f"{metric}_max")
+        return item
+
+    def _sample_to_dict(self, row: Any) -> dict[str, Any]:
         return {
-            "observed_at": row.observed_at.isoformat(),
+            "observed_at": row.observed_at,
             "battery_charge": row.battery_charge,
             "runtime_seconds": row.runtime_seconds,
             "input_voltage": row.input_voltage,
             "output_voltage": row.output_voltage,
             "load_percent": row.load_percent,
         }
+
+
+def _bucket(buckets: dict[tuple[int, datetime], dict[str, Any]], device_id: int, start: datetime) -> dict[str, Any]:
+    bucket = buckets.get((device_id, start))
+    if bucket is None:
+        bucket = {"sample_count": 0, **{metric: [0, 0.0, None, None] for metric in TELEMETRY_METRICS}}
+        buckets[(device_id, start)] = bucket
+    return bucket
+
+
+def _accumulate(
+    state: list[Any],
+    minimum: float | None,
+    average: float | None,
+    maximum: float | None,
+    weight: int,
+) -> None:
+    if average is None:
+        return
+    state[0] += weight
+    state[1] += average * weight
+    state[2] = minimum if state[2] is None else min(state[2], minimum)
+    state[3] = maximum if state[3] is None else max(state[3], maximum)
+
+
+# Columns of the list pages' Core fast paths; ``_device_row_to_dict`` and
+# ``list_recent_alerts`` build the same dicts as the ORM helpers from them.
+_DEVICE_COLUMNS = tuple(
+    column for column in UPSDevice.__table__.columns if column.key not in {"last_payload_id", "last_snapshot_json"}
+)
+# What ``rollup_telemetry`` needs to know to step-hold a deadband device.
+_HOLD_COLUMNS = (
+    UPSDevice.id,
+    UPSDevice.deadband_enabled,
+    UPSDevice.deadband_heartbeat_seconds,
+    UPSDevice.adaptive_polling,
+    UPSDevice.poll_interval_seconds,
+    UPSDevice.max_poll_interval_seconds,
+    UPSDevice.last_seen_at,
+)
+_DEVICE_TIMESTAMPS = frozenset({"last_seen_at", "created_at", "updated_at"})
+_ALERT_EVENT_COLUMNS = tuple(AlertEvent.__table__.columns)
+# What each dashboard counter counts; used to rebuild them from scratch.
+_DASHBOARD_COUNTS = {
+    "devices": select(func.count()).select_from(UPSDevice),
+    "enabled_devices": select(func.count()).select_from(UPSDevice).where(UPSDevice.enabled.is_(True)),
+    "failed_alerts": select(func.count()).select_from(AlertEvent).where(AlertEvent.success == false()),
+}
+
+
+def _iso_column(column: ColumnElement[Any]) -> ColumnElement[Any]:
+    # Read the stored DATETIME text as is instead of parsing it into a datetime.
+    return type_coerce(column, String).label(column.key)
+
+
+def _iso_epoch(column: ColumnElement[Any]) -> ColumnElement[Any]:
+    # ``EpochSeconds`` formatted by SQLite, so reads never build a datetime.
+    return func.strftime("%Y-%m-%dT%H:%M:%S", column, "unixepoch").label(column.key)
+
+
+def _sample_columns(table: Table) -> tuple[ColumnElement[Any], ...]:
+    return (_iso_epoch(table.c.observed_at), *(table.c[metric] for metric in TELEMETRY_METRICS))
+
+
+def _iso_text(value: str | None) -> str | None:
+    """``isoformat()`` of the datetime SQLite stored as ``value``."""
+    if value is None:
+        return None
+    value = value.replace(" ", "T", 1)
+    return value[:-7] if value.endswith(".000000") else value
+
+
+def _device_row_to_dict(row: Any) -> dict[str, Any]:
+    item = row._asdict()
+    item["reference_identifier"] = item["serial"] or item["identifier"]
+    for key in _DEVICE_TIMESTAMPS:
+        item[key] = _iso_text(item[key])
+    return item
+
+
+def _block_sample_to_dict(sample: BlockSample) -> dict[str, Any]:
+    item: dict[str, Any] = {"observed_at": sample[0].replace(tzinfo=None).isoformat()}
+    item.update(zip(TELEMETRY_METRICS, sample[1:-1]))
+    return item
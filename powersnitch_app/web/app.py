@@ -1,24 +1,47 @@
 from __future__ import annotations
 
+import csv
+import io
 import json
+from collections.abc import Mapping
 from contextlib import asynccontextmanager
+from datetime import UTC, datetime, timedelta
 from typing import Any
+from urllib.parse import urlencode
 
 from fastapi import FastAPI, Form, Request
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from starlette.middleware.sessions import SessionMiddleware
 
 from powersnitch_app.config import Settings
 from powersnitch_app.bootstrap import ensure_bootstrap
+from powersnitch_app.core.deadband import hold_interval, hold_series, step_hold
 from powersnitch_app.core.monitor import MonitorService
+from powersnitch_app.core.rollups import choose_resolution
 from powersnitch_app.db import Database
 from powersnitch_app.integrations.influx import InfluxTelemetryMirror
 from powersnitch_app.integrations.notifications import NotificationDispatcher
-from powersnitch_app.integrations.nut import NutClient
+from powersnitch_app.integrations.nut import create_nut_client
+from powersnitch_app.models import CONDITIONS, CUSTOM_CONDITION_PREFIX, TELEMETRY_METRICS
 from powersnitch_app.security import hash_password, require_admin, verify_password
-from powersnitch_app.storage import Repository
+from powersnitch_app.storage import Repository, utcnow
+
+
+GRAPH_RANGES = {
+    "1h": timedelta(hours=1),
+    "6h": timedelta(hours=6),
+    "24h": timedelta(days=1),
+    "7d": timedelta(days=7),
+    "30d": timedelta(days=30),
+    "1y": timedelta(days=365),
+}
+RESOLUTION_LABELS = {None: "raw samples", 60: "1 minute averages", 3600: "1 hour averages"}
+HISTORY_PAGE_SIZE = 100
+HISTORY_FILTERS = ("device", "condition", "channel", "provider", "result")
+# Largest id SQLite can bind; bigger numbers in a query string match nothing.
+MAX_ROW_ID = 2**63 - 1
 
 
 def service_type_fields(service_type: str) -> list[tuple[str, str]]:
@@ -68,41 +91,113 @@ def parse_channel_target(service_type: str, form: dict[str, Any]) -> dict[str, A
     return target
 
 
-def build_graph_points(samples: list[dict[str, Any]], field: str) -> str:
+def parse_history_filters(params: Mapping[str, str]) -> dict[str, Any]:
+    """Keyword filters for ``Repository.list_alert_history`` from the history page query string."""
+    filters: dict[str, Any] = {}
+    for name, key in (("device", "device_id"), ("channel", "channel_id")):
+        row_id = parse_row_id(params.get(name, ""))
+        if row_id is not None:
+            filters[key] = row_id
+    for name, key in (("condition", "condition_key"), ("provider", "provider")):
+        if params.get(name):
+            filters[key] = params[name]
+    if params.get("result") in {"sent", "failed"}:
+        filters["success"] = params["result"] == "sent"
+    return filters
+
+
+def parse_row_id(value: str) -> int | None:
+    if not value.isdecimal():
+        return None
+    row_id = int(value)
+    return row_id if row_id <= MAX_ROW_ID else None
+
+
+def format_history_cursor(cursor: tuple[datetime, int]) -> str:
+    occurred_at, event_id = cursor
+    return f"{int(occurred_at.timestamp())}-{event_id}"
+
+
+def parse_history_cursor(value: str | None) -> tuple[datetime, int] | None:
+    try:
+        seconds, event_id = (value or "").split("-")
+        occurred_at = datetime.fromtimestamp(int(seconds), UTC)
+    except (ValueError, OverflowError, OSError):
+        return None
+    row_id = parse_row_id(event_id)
+    return None if row_id is None else (occurred_at, row_id)
+
+
+def build_graph_points(
+    samples: list[dict[str, Any]],
+    field: str,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    step: bool = False,
+) -> str:
+    """SVG polyline points; x follows time when ``start``/``end`` are given."""
     values = [sample[field] for sample in samples if sample[field] is not None]
     if len(values) < 2:
         return ""
     maximum = max(values) or 1
+    span = (end - start).total_seconds() if start is not None and end is not None else 0
     points: list[str] = []
+    previous_y: float | None = None
     for index, sample in enumerate(samples):
         value = sample[field]
         if value is None:
             continue
-        x = (index / max(len(samples) - 1, 1)) * 280
+        if span > 0:
+            moment = datetime.fromisoformat(sample["observed_at"]).replace(tzinfo=UTC)
+            x = min(max((moment - start).total_seconds() / span, 0.0), 1.0) * 280
+        else:
+            x = (index / max(len(samples) - 1, 1)) * 280
         y = 80 - (float(value) / maximum) * 70
+        if step and previous_y is not None:
+            points.append(f"{x:.1f},{previous_y:.1f}")
         points.append(f"{x:.1f},{y:.1f}")
+        previous_y = y
     return " ".join(points)
 
 
 def create_app(settings: Settings) -> FastAPI:
     db = Database(settings)
     repository = Repository(db)
-    nut_client = NutClient(settings.nut_list_command, settings.nut_status_command)
+    nut_client = create_nut_client(settings)
     monitor = MonitorService(
         repository=repository,
         nut_client=nut_client,
         notifier=NotificationDispatcher(),
         telemetry=InfluxTelemetryMirror(settings),
+        max_concurrency=settings.monitor_max_concurrency,
+        poll_timeout_seconds=settings.poll_timeout_seconds,
+        adaptive_quiet_seconds=settings.adaptive_quiet_seconds,
+        alert_workers=settings.alert_workers,
+        alert_queue_size=settings.alert_queue_size,
+        alert_drain_timeout_seconds=settings.alert_drain_timeout_seconds,
+        alert_batch_size=settings.alert_batch_size,
+        alert_max_attempts=settings.alert_max_attempts,
+        alert_retry_base_seconds=settings.alert_retry_base_seconds,
+        alert_retry_max_seconds=settings.alert_retry_max_seconds,
+        telemetry_batch_size=settings.telemetry_batch_size,
+        telemetry_flush_interval_seconds=settings.telemetry_flush_interval_seconds,
+        telemetry_max_pending=settings.telemetry_max_pending,
+        telemetry_raw_retention_days=settings.telemetry_raw_retention_days,
+        telemetry_minute_retention_days=settings.telemetry_minute_retention_days,
+        telemetry_hour_retention_days=settings.telemetry_hour_retention_days,
+        telemetry_prune_batch_size=settings.telemetry_prune_batch_size,
+        telemetry_maintenance_interval_seconds=settings.telemetry_maintenance_interval_seconds,
     )
 
     @asynccontextmanager
     async def lifespan(_app: FastAPI):
-        await ensure_bootstrap(settings)
+        await ensure_bootstrap(settings, db)
         await monitor.startup(discover=settings.startup_discovery)
         try:
             yield
         finally:
             await monitor.shutdown()
+            await db.dispose()
 
     app = FastAPI(title=settings.app_name, lifespan=lifespan)
     app.add_middleware(SessionMiddleware, secret_key=settings.session_secret)
@@ -245,10 +340,17 @@ def create_app(settings: Settings) -> FastAPI:
         poll_interval_seconds: int = Form(...),
         battery_low_pct_threshold: float = Form(...),
         runtime_low_threshold_seconds: float = Form(...),
+        adaptive_polling: str | None = Form(None),
+        min_poll_interval_seconds: float = Form(1),
+        max_poll_interval_seconds: float = Form(60),
+        deadband_enabled: str | None = Form(None),
+        deadband_percent: float = Form(1),
+        deadband_heartbeat_seconds: float = Form(300),
     ):
         protected = guard(request)
         if protected:
             return protected
+        device = await repository.get_device(device_id)
         await repository.update_device_settings(
             device_id,
             display_name,
@@ -256,6 +358,12 @@ def create_app(settings: Settings) -> FastAPI:
             poll_interval_seconds,
             battery_low_pct_threshold,
             runtime_low_threshold_seconds,
+            adaptive_polling == "on",
+            min_poll_interval_seconds,
+            max_poll_interval_seconds,
+            deadband_enabled == "on",
+            deadband_percent,
+            deadband_heartbeat_seconds,
         )
         return redirect("/devices")
 
@@ -363,17 +471,36 @@ def create_app(settings: Settings) -> FastAPI:
         channel_id: int = Form(...),
         repeat_interval_seconds: int = Form(900),
         send_recovery: str | None = Form(None),
+        custom_label: str = Form(""),
+        expression: str = Form(""),
     ):
         protected = guard(request)
         if protected:
             return protected
-        await repository.create_rule(
-            ups_device_id,
-            condition_key,
-            channel_id,
-            repeat_interval_seconds,
-            send_recovery == "on",
-        )
+        if condition_key == "custom":
+            condition_key = CUSTOM_CONDITION_PREFIX + custom_label.strip().replace(" ", "_")
+        try:
+            await repository.create_rule(
+                ups_device_id,
+                condition_key,
+                channel_id,
+                repeat_interval_seconds,
+                send_recovery == "on",
+                expression=expression or None,
+            )
+        except ValueError as exc:
+            return templates.TemplateResponse(
+                request,
+                "rules.html",
+                await context(
+                    request,
+                    devices=await repository.list_devices(),
+                    channels=await repository.list_channels(),
+                    rules=await repository.list_rules(),
+                    error=str(exc),
+                ),
+                status_code=400,
+            )
         return redirect("/rules")
 
     @app.get("/history")
@@ -381,35 +508,108 @@ def create_app(settings: Settings) -> FastAPI:
         protected = guard(request)
         if protected:
             return protected
-        alerts = await repository.list_recent_alerts(200)
+        params = request.query_params
+        alerts, cursor = await repository.list_alert_history(
+            HISTORY_PAGE_SIZE,
+            before=parse_history_cursor(params.get("before")),
+            **parse_history_filters(params),
+        )
+        selected = {name: params[name] for name in HISTORY_FILTERS if params.get(name)}
+        # Custom rules alert under their own ``custom:`` keys, so offer every key a rule uses.
+        rule_keys = {rule["condition_key"] for rule in await repository.list_rules()}
+        rule_keys.add(selected.get("condition", CONDITIONS[0]))
+        conditions = [*CONDITIONS, *sorted(rule_keys.difference(CONDITIONS))]
         return templates.TemplateResponse(
             request,
             "history.html",
-            await context(request, alerts=alerts),
+            await context(
+                request,
+                alerts=alerts,
+                devices=await repository.list_devices(),
+                channels=await repository.list_channels(),
+                conditions=conditions,
+                selected=selected,
+                paged="before" in params,
+                newest_url="/history?" + urlencode(selected),
+                older_url="/history?" + urlencode({**selected, "before": format_history_cursor(cursor)})
+                if cursor
+                else None,
+            ),
         )
 
     @app.get("/graphs")
-    async def graphs_page(request: Request):
+    async def graphs_page(request: Request, range: str = "24h"):
         protected = guard(request)
         if protected:
             return protected
+        if range not in GRAPH_RANGES:
+            range = "24h"
+        end = utcnow()
+        start = end - GRAPH_RANGES[range]
+        resolution = choose_resolution(start, end, end, monitor.maintenance.retention_days)
         devices = await repository.list_devices()
         graph_cards: list[dict[str, Any]] = []
         for device in devices:
-            samples = await repository.recent_samples_for_device(device["id"])
+            samples = await repository.telemetry_series(device["id"], start, end, resolution)
+            step = bool(device["deadband_enabled"]) and resolution is None
+            if step:
+                previous = await repository.last_sample_before(device["id"], start)
+                last_seen = datetime.fromisoformat(device["last_seen_at"]) if device["last_seen_at"] else start
+                samples = hold_series(samples, previous, start, min(end, last_seen.replace(tzinfo=UTC)))
             graph_cards.append(
                 {
                     "device": device,
                     "samples": samples,
-                    "battery_points": build_graph_points(samples, "battery_charge"),
-                    "runtime_points": build_graph_points(samples, "runtime_seconds"),
-                    "load_points": build_graph_points(samples, "load_percent"),
+                    "battery_points": build_graph_points(samples, "battery_charge", start, end, step),
+                    "runtime_points": build_graph_points(samples, "runtime_seconds", start, end, step),
+                    "load_points": build_graph_points(samples, "load_percent", start, end, step),
                 }
             )
         return templates.TemplateResponse(
             request,
             "graphs.html",
-            await context(request, graph_cards=graph_cards),
+            await context(
+                request,
+                graph_cards=graph_cards,
+                ranges=list(GRAPH_RANGES),
+                selected_range=range,
+                resolution_label=RESOLUTION_LABELS[resolution],
+            ),
+        )
+
+    @app.get("/graphs/{device_id}/export.csv")
+    async def export_samples(request: Request, device_id: int, range: str = "all"):
+        protected = guard(request)
+        if protected:
+            return protected
+        start = utcnow() - GRAPH_RANGES[range] if range in GRAPH_RANGES else None
+        device = await repository.get_device(device_id)
+        samples = repository.iter_samples(device_id, start=start)
+        if device and device["deadband_enabled"] and device["last_seen_at"]:
+            # Put back the polls the deadband filter did not store.
+            samples = step_hold(
+                samples,
+                hold_interval(device),
+                device["deadband_heartbeat_seconds"],
+                datetime.fromisoformat(device["last_seen_at"]),
+            )
+
+        async def rows():
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(["observed_at", *TELEMETRY_METRICS, "status_flags"])
+            async for sample in samples:
+                writer.writerow([sample[0].isoformat(), *("" if value is None else value for value in sample[1:])])
+                if buffer.tell() > 64 * 1024:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+            yield buffer.getvalue()
+
+        return StreamingResponse(
+            rows(),
+            media_type="text/csv",
+            headers={"Content-Disposition": f'attachment; filename="telemetry-{device_id}.csv"'},
         )
 
     @app.get("/diagnostics")
@@ -422,7 +622,15 @@ def create_app(settings: Settings) -> FastAPI:
         return templates.TemplateResponse(
             request,
             "diagnostics.html",
-            await context(request, services=services, channels=channels),
+            await context(
+                request,
+                services=services,
+                channels=channels,
+                schedule=monitor.schedule_status(),
+                outbox=monitor.outbox.snapshot(),
+                writer=monitor.writer.snapshot(),
+                maintenance=monitor.maintenance.snapshot(),
+            ),
         )
 
     @app.post("/diagnostics/test")
@@ -447,6 +655,10 @@ def create_app(settings: Settings) -> FastAPI:
                 request,
                 services=services,
                 channels=channels,
+                schedule=monitor.schedule_status(),
+                outbox=monitor.outbox.snapshot(),
+                writer=monitor.writer.snapshot(),
+                maintenance=monitor.maintenance.snapshot(),
                 test_result=result,
             ),
         )
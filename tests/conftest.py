@@ -0,0 +1,20 @@
+import pytest
+
+from powersnitch_app.config import Settings
+
+
+@pytest.fixture
+def make_settings(tmp_path):
+    """Build ``Settings`` with everything under ``tmp_path``; keyword arguments override fields."""
+
+    def make(**overrides):
+        data_dir = tmp_path / "data"
+        fields = {
+            "data_dir": data_dir,
+            "sqlite_path": data_dir / "powersnitch.db",
+            "initial_password_file": data_dir / "initial_admin_password.txt",
+            "session_secret": "test-secret",
+        }
+        return Settings(**{**fields, **overrides})
+
+    return make
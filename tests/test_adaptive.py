@@ -0,0 +1,63 @@
+from powersnitch_app.core.adaptive import AdaptivePollPolicy
+from powersnitch_app.core.conditions import compile_conditions
+from powersnitch_app.integrations.nut import snapshot_from_status
+
+
+CONDITIONS = compile_conditions(None, 25, 300)
+
+DEVICE = {
+    "id": 1,
+    "poll_interval_seconds": 15,
+    "adaptive_polling": True,
+    "min_poll_interval_seconds": 0.5,
+    "max_poll_interval_seconds": 120,
+}
+
+
+def _active(snapshot):
+    return [key for key, active in CONDITIONS.evaluate(snapshot).items() if active]
+
+
+def _observe(policy, status, now):
+    snapshot = snapshot_from_status("ups", {"battery.charge": "90", "battery.runtime": "900", **status})
+    return policy.observe(DEVICE, snapshot, _active(snapshot), now)
+
+
+def test_adaptive_policy_tightens_on_battery_and_relaxes_when_quiet():
+    policy = AdaptivePollPolicy(quiet_seconds=60)
+    assert policy.interval_for(DEVICE) == 15
+    assert _observe(policy, {"ups.status": "OL"}, 0.0) == 15
+    assert _observe(policy, {"ups.status": "OB DISCHRG"}, 10.0) == 0.5
+    assert _observe(policy, {"ups.status": "OL CHRG"}, 20.0) == 0.5
+    assert _observe(policy, {"ups.status": "OL CHRG"}, 50.0) == 0.5
+    assert _observe(policy, {"ups.status": "OL CHRG"}, 81.0) == 1.0
+    assert _observe(policy, {"ups.status": "OL CHRG"}, 82.0) == 2.0
+
+
+def test_non_adaptive_devices_keep_their_interval():
+    policy = AdaptivePollPolicy(quiet_seconds=60)
+    device = {**DEVICE, "adaptive_polling": False}
+    snapshot = snapshot_from_status("ups", {"ups.status": "OB"})
+    assert policy.observe(device, snapshot, _active(snapshot), 0.0) == 15
+
+
+def test_unreachable_ups_backs_off_instead_of_polling_fast():
+    policy = AdaptivePollPolicy(quiet_seconds=60)
+    assert _observe(policy, {"ups.status": "OL"}, 0.0) == 15
+    lost = snapshot_from_status("ups", {})
+    intervals = [
+        policy.observe(DEVICE, lost, ["ups_communication_lost", "unknown_state"], now) for now in (10.0, 40.0, 100.0, 220.0)
+    ]
+    assert intervals == [30, 60, 120, 120]
+    assert _observe(policy, {"ups.status": "OL"}, 340.0) == 120
+    assert _observe(policy, {"ups.status": "OB"}, 460.0) == 0.5
+
+
+def test_long_lived_conditions_only_tighten_when_they_come_on():
+    policy = AdaptivePollPolicy(quiet_seconds=60)
+    # Replace battery was already set when polling started.
+    assert [_observe(policy, {"ups.status": "OL RB"}, now) for now in (0.0, 30.0, 61.0, 62.0)] == [15, 15, 30, 60]
+    # Runtime drops below the threshold without a status change.
+    assert _observe(policy, {"ups.status": "OL RB", "battery.runtime": "100"}, 70.0) == 0.5
+    assert _observe(policy, {"ups.status": "OL RB", "battery.runtime": "100"}, 100.0) == 0.5
+    assert _observe(policy, {"ups.status": "OL RB", "battery.runtime": "100"}, 131.0) == 1.0
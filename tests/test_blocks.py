@@ -0,0 +1,71 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import text
+
+from powersnitch_app.blocks import decode_block, encode_block
+from powersnitch_app.bootstrap import ensure_bootstrap
+from powersnitch_app.core.rollups import TelemetryMaintenance
+from powersnitch_app.db import Database
+from powersnitch_app.integrations.nut import snapshot_from_status
+from powersnitch_app.storage import Repository
+
+
+def test_block_round_trip_keeps_gaps_and_irregular_timestamps():
+    start = datetime(2026, 1, 1, tzinfo=UTC)
+    samples = [
+        (
+            start + timedelta(seconds=15 * index + (7 if index == 3 else 0), microseconds=index),
+            100.0 - index / 3,
+            None if index % 5 == 0 else 230.5,
+            231.0,
+            229.5,
+            -0.0,
+            "OL" if index % 4 else "OB LB",
+        )
+        for index in range(50)
+    ]
+    assert list(decode_block(encode_block(samples))) == samples
+    assert list(decode_block(encode_block([]))) == []
+
+
+def test_maintenance_packs_closed_hours_and_reads_stay_the_same(make_settings):
+    settings = make_settings(telemetry_storage="blocks")
+    start = datetime(2026, 3, 1, 9, 0, tzinfo=UTC)
+    now = start + timedelta(hours=2, minutes=30)
+
+    async def scenario():
+        database = Database(settings)
+        repository = Repository(database)
+        await ensure_bootstrap(settings)
+        device_id = await repository.upsert_device("ups", "Lab", {})
+        batch = []
+        for index in range(4 * 60 * 2 + 40):
+            snapshot = snapshot_from_status(
+                "ups", {"ups.status": "OL", "battery.charge": str(100 - index // 100), "input.voltage": "230.4"}
+            )
+            snapshot.observed_at = start + timedelta(seconds=15 * index)
+            batch.append((device_id, snapshot))
+        await repository.save_snapshots(batch)
+        window = (start, now)
+        before = await repository.telemetry_series(device_id, *window)
+        recent_before = await repository.recent_samples_for_device(device_id, limit=200)
+        maintenance = TelemetryMaintenance(repository, raw_retention_days=0)
+        await maintenance.run_once(now)
+        after = await repository.telemetry_series(device_id, *window)
+        recent_after = await repository.recent_samples_for_device(device_id, limit=200)
+        exported = [sample async for sample in repository.iter_samples(device_id)]
+        async with database.engine.connect() as connection:
+            rows = await connection.scalar(text("SELECT COUNT(*) FROM telemetry_samples"))
+            blocks = await connection.scalar(text("SELECT COUNT(*) FROM telemetry_blocks"))
+        await database.dispose()
+        return maintenance, before, after, recent_before, recent_after, exported, rows, blocks
+
+    maintenance, before, after, recent_before, recent_after, exported, rows, blocks = asyncio.run(scenario())
+    assert maintenance.metrics.samples_packed == 480
+    assert (rows, blocks) == (40, 2)
+    assert after == before
+    assert recent_after == recent_before
+    assert len(exported) == 520
+    assert [sample[0] for sample in exported] == sorted(sample[0] for sample in exported)
+    assert exported[0][1:] == (100.0, None, 230.4, None, None, "OL")
@@ -1,7 +1,8 @@
 from datetime import UTC, datetime
 
-from powersnitch_app.core.conditions import build_alert_text, evaluate_conditions
-from powersnitch_app.models import DeviceSnapshot
+from powersnitch_app.core.conditions import build_alert_text, compile_conditions, evaluate_conditions
+from powersnitch_app.integrations.nut import snapshot_from_status
+from powersnitch_app.models import CONDITIONS, DeviceSnapshot
 
 
 def test_evaluate_conditions_thresholds_and_flags():
@@ -42,3 +43,23 @@ def test_build_alert_text_appends_extra_text():
     assert "Lab UPS" in subject
     assert "Check generator log." in body
     assert "State: recovered" in body
+
+
+def test_compiled_conditions_match_full_evaluation():
+    snapshots = [
+        snapshot_from_status("ups", {"ups.status": "OB LB", "battery.charge": "19", "battery.runtime": "240"}),
+        snapshot_from_status("ups", {"ups.status": "OL", "battery.charge": "100", "battery.runtime": "1800"}),
+        snapshot_from_status("ups", {}),
+    ]
+    compiled = compile_conditions(None, 25, 300)
+    for snapshot in snapshots:
+        expected = {item.key: item for item in evaluate_conditions(snapshot, 25, 300)}
+        assert compiled.evaluate(snapshot) == {key: item.active for key, item in expected.items()}
+        assert all(compiled.result(key, snapshot) == expected[key] for key in CONDITIONS)
+
+
+def test_compiled_conditions_only_evaluate_requested_keys():
+    snapshot = snapshot_from_status("ups", {"ups.status": "OB", "battery.charge": "10"})
+    compiled = compile_conditions(["on_battery", "battery_low_pct", "on_battery"], 25, 300)
+    assert compiled.evaluate(snapshot) == {"on_battery": True, "battery_low_pct": True}
+    assert compiled.check("on_line", snapshot) is False
@@ -0,0 +1,282 @@
+import asyncio
+import sqlite3
+import time
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from alembic import command
+from alembic.script import ScriptDirectory
+from sqlalchemy.exc import OperationalError
+
+from powersnitch_app import bootstrap
+from powersnitch_app.bootstrap import SCHEMA_REVISION, alembic_config, ensure_bootstrap
+from powersnitch_app.db import Database, sqlite_pragmas
+from powersnitch_app.integrations.nut import snapshot_from_status
+from powersnitch_app.storage import Repository
+
+
+def test_pragma_profile_applies_to_bootstrap_and_app_connections(make_settings):
+    settings = make_settings(sqlite_cache_size_kib=4096, sqlite_busy_timeout_ms=1234)
+
+    async def scenario():
+        database = Database(settings)
+        await ensure_bootstrap(settings)
+        async with database.engine.connect() as connection:
+            values = {}
+            for pragma in ("journal_mode", "synchronous", "cache_size", "busy_timeout", "temp_store"):
+                values[pragma] = (await connection.exec_driver_sql(f"PRAGMA {pragma}")).scalar()
+        await database.dispose()
+        return values
+
+    values = asyncio.run(scenario())
+    assert values == {"journal_mode": "wal", "synchronous": 1, "cache_size": -4096, "busy_timeout": 1234, "temp_store": 2}
+    with sqlite3.connect(settings.sqlite_path) as connection:
+        assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_pragma_profile_rejects_unknown_modes(make_settings):
+    with pytest.raises(ValueError):
+        sqlite_pragmas(make_settings(sqlite_journal_mode="wal; DROP TABLE users"))
+
+
+def test_core_list_queries_match_orm_dicts(make_settings):
+    settings = make_settings()
+
+    async def scenario():
+        database = Database(settings)
+        repository = Repository(database)
+        await ensure_bootstrap(settings)
+        device_id = await repository.upsert_device("ups", "Lab", {"serial": "S1"})
+        await repository.upsert_device("spare", "Spare", {})
+        snapshot = snapshot_from_status("ups", {"ups.status": "OL", "battery.charge": "90"})
+        for moment in (datetime(2026, 1, 1, 0, 0, 0, tzinfo=UTC), datetime(2026, 1, 1, 0, 0, 15, tzinfo=UTC)):
+            snapshot.observed_at = moment
+            await repository.save_snapshot(device_id, snapshot)
+        await repository.log_alert_event(device_id, None, "on_battery", "active", "webhook", "hook", False, {}, 500)
+        devices = await repository.list_devices()
+        singles = [await repository.get_device(device["id"]) for device in devices]
+        return devices, singles, await repository.list_recent_alerts(), await repository.recent_samples_for_device(device_id)
+
+    devices, singles, alerts, samples = asyncio.run(scenario())
+    assert devices == singles
+    assert [device["reference_identifier"] for device in devices] == ["S1", "spare"]
+    assert alerts[0]["display_name"] == "Lab" and alerts[0]["success"] is False
+    assert alerts[0]["occurred_at"] == datetime.fromisoformat(alerts[0]["occurred_at"]).isoformat()
+    assert [sample["observed_at"] for sample in samples] == ["2026-01-01T00:00:00", "2026-01-01T00:00:15"]
+    assert samples[0]["battery_charge"] == 90.0
+
+
+def test_reads_use_query_only_pool_next_to_single_writer(make_settings):
+    settings = make_settings(sqlite_read_pool_size=2)
+
+    async def scenario():
+        database = Database(settings)
+        repository = Repository(database)
+        await ensure_bootstrap(settings)
+        await asyncio.gather(*(repository.set_setting(f"key{index}", str(index)) for index in range(20)))
+        values = await asyncio.gather(*(repository.get_setting(f"key{index}") for index in range(20)))
+        async with database.read_engine.connect() as connection:
+            query_only = (await connection.exec_driver_sql("PRAGMA query_only")).scalar()
+            with pytest.raises(OperationalError):
+                await connection.exec_driver_sql("DELETE FROM app_settings")
+        await database.dispose()
+        shared = Database(make_settings(sqlite_read_pool_size=0))
+        same_engine = shared.read_engine is shared.engine
+        await shared.dispose()
+        return values, query_only, same_engine
+
+    values, query_only, same_engine = asyncio.run(scenario())
+    assert values == [str(index) for index in range(20)]
+    assert query_only == 1
+    assert same_engine
+
+
+def test_epoch_migration_backfills_text_timestamps_and_reverts(make_settings):
+    settings = make_settings(telemetry_partitioning="monthly")
+    settings.sqlite_path.parent.mkdir(parents=True)
+    config = alembic_config(settings)
+    command.upgrade(config, "0009_deadband_filter")
+
+    columns = "ups_device_id, observed_at, battery_charge"
+    with sqlite3.connect(settings.sqlite_path) as connection:
+        device_id = connection.execute(
+            "INSERT INTO ups_devices (identifier, display_name, enabled, poll_interval_seconds, adaptive_polling, "
+            "min_poll_interval_seconds, max_poll_interval_seconds, battery_low_pct_threshold, "
+            "runtime_low_threshold_seconds, created_at, updated_at) "
+            "VALUES ('ups', 'Lab', 0, 15, 0, 1, 60, 25, 300, '2026-01-01 00:00:00', '2026-01-01 00:00:00')"
+        ).lastrowid
+        connection.execute(
+            "CREATE TABLE telemetry_samples_2026_02 (id INTEGER PRIMARY KEY, ups_device_id INTEGER NOT NULL, "
+            "observed_at DATETIME NOT NULL, battery_charge FLOAT, runtime_seconds FLOAT, input_voltage FLOAT, "
+            "output_voltage FLOAT, load_percent FLOAT, status_flags TEXT, raw_json TEXT, payload_id INTEGER)"
+        )
+        connection.execute(
+            f"INSERT INTO telemetry_samples ({columns}) VALUES (?, '2026-01-31 23:59:00.000000', 40)", (device_id,)
+        )
+        connection.execute(
+            f"INSERT INTO telemetry_samples_2026_02 ({columns}) VALUES (?, '2026-02-01 00:00:15.000000', 41)",
+            (device_id,),
+        )
+        connection.execute(
+            "INSERT INTO alert_events (occurred_at, condition_key, condition_state, provider, target, success, "
+            "payload_json) VALUES ('2026-02-01 00:01:00.000000', 'on_battery', 'active', 'webhook', 'hook', 1, '{}')"
+        )
+
+    def stored():
+        with sqlite3.connect(settings.sqlite_path) as connection:
+            return [
+                connection.execute(f"SELECT typeof({column}), {column} FROM {table}").fetchone()
+                for table, column in (
+                    ("telemetry_samples", "observed_at"),
+                    ("telemetry_samples_2026_02", "observed_at"),
+                    ("alert_events", "occurred_at"),
+                )
+            ]
+
+    command.upgrade(config, "head")
+    upgraded = stored()
+
+    async def read():
+        repository = Repository(Database(settings))
+        start = datetime(2026, 1, 31, 23, tzinfo=UTC)
+        series = await repository.telemetry_series(device_id, start, start + timedelta(hours=2))
+        alerts = await repository.list_recent_alerts()
+        await repository.db.dispose()
+        return series, alerts
+
+    series, alerts = asyncio.run(read())
+    command.downgrade(config, "0009_deadband_filter")
+
+    assert upgraded == [("integer", 1769903940), ("integer", 1769904015), ("integer", 1769904060)]
+    assert [(sample["observed_at"], sample["battery_charge"]) for sample in series] == [
+        ("2026-01-31T23:59:00", 40.0),
+        ("2026-02-01T00:00:15", 41.0),
+    ]
+    assert alerts[0]["occurred_at"] == "2026-02-01T00:01:00"
+    assert stored() == [
+        ("text", "2026-01-31 23:59:00.000000"),
+        ("text", "2026-02-01 00:00:15.000000"),
+        ("text", "2026-02-01 00:01:00.000000"),
+    ]
+
+
+def test_dashboard_counters_follow_writes_and_rebuild(make_settings):
+    settings = make_settings()
+
+    async def scenario():
+        database = Database(settings)
+        repository = Repository(database)
+        await ensure_bootstrap(settings)
+        first = await repository.upsert_device("ups", "Lab", {})
+        await repository.upsert_device("spare", "Spare", {})
+        await repository.upsert_device("ups", "Lab renamed", {})
+        await repository.set_device_enabled(first, True)
+        await repository.set_device_enabled(first, True)
+        await repository.log_alert_event(first, None, "on_battery", "active", "webhook", "hook", False, {})
+        await repository.log_alert_event(first, None, "on_battery", "active", "webhook", "hook", True, {})
+        with pytest.raises(RuntimeError):
+            async with repository.unit_of_work():
+                await repository.log_alert_event(first, None, "on_battery", "active", "webhook", "hook", False, {})
+                raise RuntimeError("poll failed")
+        counts = await repository.dashboard_counts()
+
+        async with database.engine.begin() as connection:
+            await connection.exec_driver_sql("UPDATE dashboard_counters SET value = 99 WHERE name = 'failed_alerts'")
+        drift = await repository.rebuild_dashboard_counts()
+        rebuilt = await repository.dashboard_counts()
+        await database.dispose()
+        return counts, drift, rebuilt
+
+    counts, drift, rebuilt = asyncio.run(scenario())
+    assert counts == {"devices": 2, "enabled_devices": 1, "failed_alerts": 1}
+    assert drift == {"devices": (2, 2), "enabled_devices": (1, 1), "failed_alerts": (99, 1)}
+    assert rebuilt == counts
+
+
+def test_alert_history_pages_by_cursor_through_same_second_ties(make_settings):
+    settings = make_settings()
+
+    async def scenario():
+        database = Database(settings)
+        repository = Repository(database)
+        await ensure_bootstrap(settings)
+        lab = await repository.upsert_device("ups", "Lab", {})
+        spare = await repository.upsert_device("spare", "Spare", {})
+        for index in range(7):
+            await repository.log_alert_event(
+                lab if index % 2 == 0 else spare, None, "on_battery", "active", "webhook", "hook", index != 3, {}
+            )
+        pages = []
+        cursor = None
+        while True:
+            alerts, cursor = await repository.list_alert_history(3, before=cursor)
+            pages.append([alert["id"] for alert in alerts])
+            if cursor is None:
+                break
+        lab_events, _ = await repository.list_alert_history(10, device_id=lab)
+        failed, _ = await repository.list_alert_history(10, success=False, provider="webhook")
+        await database.dispose()
+        return pages, lab_events, failed
+
+    pages, lab_events, failed = asyncio.run(scenario())
+    assert pages == [[7, 6, 5], [4, 3, 2], [1]]
+    assert [alert["id"] for alert in lab_events] == [7, 5, 3, 1]
+    assert [(alert["id"], alert["display_name"], alert["success"]) for alert in failed] == [(4, "Spare", False)]
+
+
+def test_schema_revision_is_alembic_head(make_settings):
+    config = alembic_config(make_settings())
+    assert ScriptDirectory.from_config(config).get_current_head() == SCHEMA_REVISION
+
+
+def test_startup_at_head_skips_alembic_and_reuses_app_engine(make_settings, monkeypatch):
+    settings = make_settings()
+
+    async def scenario():
+        started = time.perf_counter()
+        await ensure_bootstrap(settings)
+        cold = time.perf_counter() - started
+
+        def fail(_settings):
+            raise AssertionError("migrations ran at head")
+
+        monkeypatch.setattr(bootstrap, "upgrade_schema", fail)
+        database = Database(settings)
+        started = time.perf_counter()
+        await ensure_bootstrap(settings, database)
+        warm = time.perf_counter() - started
+        admin = await Repository(database).get_admin()
+        await database.dispose()
+        return cold, warm, admin
+
+    cold, warm, admin = asyncio.run(scenario())
+    assert admin["username"] == "admin"
+    assert warm * 5 < cold, f"startup at head took {warm * 1000:.1f} ms, first start {cold * 1000:.1f} ms"
+
+
+def test_create_rule_inside_unit_of_work_uses_a_savepoint(make_settings):
+    settings = make_settings()
+
+    async def scenario():
+        database = Database(settings)
+        repository = Repository(database)
+        await ensure_bootstrap(settings)
+        await repository.create_service("webhook", "hook", {"url": "http://localhost"})
+        service = (await repository.list_services())[0]
+        await repository.create_channel("ops", service["id"], {}, "")
+        channel = (await repository.list_channels())[0]
+        device_id = await repository.upsert_device("ups", "Lab", {})
+        async with asyncio.timeout(3):
+            async with repository.unit_of_work():
+                await repository.set_device_enabled(device_id, True)
+                await repository.create_rule(device_id, "on_battery", channel["id"], 900, True)
+                await repository.create_rule(device_id, "on_battery", channel["id"], 900, True)
+                await repository.create_rule(device_id, "runtime_low", channel["id"], 900, True)
+        rules = await repository.get_rules_for_device(device_id)
+        device = await repository.get_device(device_id)
+        await database.dispose()
+        return rules, device
+
+    rules, device = asyncio.run(scenario())
+    assert sorted(rule["condition_key"] for rule in rules) == ["on_battery", "runtime_low"]
+    assert device["enabled"] is True
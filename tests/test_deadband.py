@@ -0,0 +1,82 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+
+from powersnitch_app.bootstrap import ensure_bootstrap
+from powersnitch_app.core.deadband import DeadbandFilter, step_hold
+from powersnitch_app.db import Database
+from powersnitch_app.integrations.nut import snapshot_from_status
+from powersnitch_app.storage import Repository
+
+
+START = datetime(2026, 1, 1, tzinfo=UTC)
+DEVICE = {"id": 1, "deadband_enabled": True, "deadband_percent": 1.0, "deadband_heartbeat_seconds": 300}
+
+
+def _snapshot(seconds, status="OL", charge="100", voltage="230.0"):
+    snapshot = snapshot_from_status(
+        "ups", {"ups.status": status, "battery.charge": charge, "input.voltage": voltage}
+    )
+    snapshot.observed_at = START + timedelta(seconds=seconds)
+    return snapshot
+
+
+def test_deadband_stores_only_meaningful_samples():
+    deadband = DeadbandFilter()
+    admitted = [
+        deadband.admit(DEVICE, _snapshot(0)),
+        deadband.admit(DEVICE, _snapshot(15, voltage="231.0")),  # 0.4% move
+        deadband.admit(DEVICE, _snapshot(30, voltage="232.3")),  # 1% from the stored 230.0
+        deadband.admit(DEVICE, _snapshot(45, voltage="232.3")),
+        deadband.admit(DEVICE, _snapshot(60, status="OB", voltage="232.3")),
+        deadband.admit(DEVICE, _snapshot(75, status="OB", voltage="232.3")),
+        deadband.admit(DEVICE, _snapshot(360, status="OB", voltage="232.3")),  # heartbeat
+        deadband.admit(DEVICE, _snapshot(375, status="OB", charge="99", voltage="232.3")),
+    ]
+    assert admitted == [True, False, True, False, True, False, True, True]
+    assert all(deadband.admit({**DEVICE, "deadband_enabled": False}, _snapshot(400)) for _ in range(3))
+
+
+def test_step_hold_rebuilds_the_poll_grid():
+    async def stored():
+        for seconds, charge in ((0, 100.0), (60, 99.0)):
+            yield (START + timedelta(seconds=seconds), charge, None, None, None, None, "OL")
+
+    async def scenario():
+        return [sample async for sample in step_hold(stored(), 15, 300, START + timedelta(seconds=90))]
+
+    samples = asyncio.run(scenario())
+    assert [(sample[0] - START).total_seconds() for sample in samples] == [0, 15, 30, 45, 60, 75, 90]
+    assert [sample[1] for sample in samples] == [100.0, 100.0, 100.0, 100.0, 99.0, 99.0, 99.0]
+
+
+def test_step_hold_leaves_outages_and_off_grid_gaps_empty():
+    async def stored():
+        # 30 s steady, a 10 minute outage, then a poll at another interval.
+        for seconds, charge in ((0, 100.0), (30, 99.0), (630, 98.0), (650, 97.0)):
+            yield (START + timedelta(seconds=seconds), charge, None, None, None, None, "OL")
+
+    async def scenario():
+        return [sample async for sample in step_hold(stored(), 15, 300, START + timedelta(seconds=1650))]
+
+    samples = asyncio.run(scenario())
+    assert [(sample[0] - START).total_seconds() for sample in samples] == [0, 15, 30, 630, 650]
+
+
+def test_suppressed_snapshots_only_refresh_the_device(make_settings):
+    settings = make_settings()
+
+    async def scenario():
+        repository = Repository(Database(settings))
+        await ensure_bootstrap(settings)
+        device_id = await repository.upsert_device("ups", "Lab", {})
+        snapshots = [(device_id, _snapshot(0)), (device_id, _snapshot(15, voltage="230.5"))]
+        await repository.save_snapshots(snapshots, store=[True, False])
+        device = await repository.get_device(device_id)
+        samples = await repository.recent_samples_for_device(device_id)
+        await repository.db.dispose()
+        return device, samples
+
+    device, samples = asyncio.run(scenario())
+    assert len(samples) == 1
+    assert device["last_seen_at"] == "2026-01-01T00:00:15"
+    assert '"input.voltage":"230.5"' in device["last_snapshot_json"]
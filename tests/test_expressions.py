@@ -0,0 +1,55 @@
+import pytest
+
+from powersnitch_app.core.expressions import ExpressionError, compile_expression
+
+
+def test_expressions_compare_nut_variables_as_numbers():
+    hot = compile_expression("ups.temperature > 40 and not input.frequency < 49.5")
+    assert hot.variables == ("ups.temperature", "input.frequency")
+    assert hot({"ups.temperature": "41.5", "input.frequency": "50.0"}) is True
+    assert hot({"ups.temperature": "39", "input.frequency": "50.0"}) is False
+    ratio = compile_expression('battery.voltage < 0.9 * var("battery.voltage.nominal") and "OB" in ups.status')
+    assert ratio({"battery.voltage": "21.0", "battery.voltage.nominal": "24", "ups.status": "OB DISCHRG"}) is True
+    assert compile_expression("40 < ups.temperature < 42")({"ups.temperature": "41"}) is True
+
+
+def test_missing_or_mistyped_variables_never_match():
+    expression = compile_expression("ups.temperature / input.frequency > 1")
+    assert expression({}) is False
+    assert expression({"ups.temperature": "40", "input.frequency": "0"}) is False
+    assert compile_expression("ups.temperature > 40")({"ups.temperature": "n/a"}) is False
+
+
+def test_negating_missing_variables_never_matches():
+    assert compile_expression("not ups.temperature > 40")({}) is False
+    assert compile_expression("not ups.temperature > 40")({"ups.temperature": "n/a"}) is False
+    assert compile_expression("not (ups.temperature > 40 and ups.load > 80)")({"ups.load": "90"}) is False
+    assert compile_expression("not (ups.temperature > 40 or ups.load > 80)")({"ups.load": "10"}) is False
+    # A known result still decides, whatever the missing side would have been.
+    assert compile_expression("not (ups.temperature > 40 and ups.load > 80)")({"ups.load": "10"}) is True
+    assert compile_expression("ups.temperature > 40 or ups.load > 80")({"ups.load": "90"}) is True
+    assert compile_expression("not ups.temperature > 40")({"ups.temperature": "35"}) is True
+
+
+@pytest.mark.parametrize(
+    "source",
+    ["", "__import__('os')", "ups.status.lower()", "[1, 2]", "x if y else z", "lambda: 1", "ups.temperature >"],
+)
+def test_unsafe_or_invalid_expressions_are_rejected(source):
+    with pytest.raises(ExpressionError):
+        compile_expression(source)
+
+
+def test_arithmetic_only_applies_to_numbers():
+    repeated = compile_expression('ups.status * 100000000 == "x"')
+    assert repeated({"ups.status": "OL"}) is False
+    assert compile_expression('ups.status + "!" == "OL!"')({"ups.status": "OL"}) is False
+    assert compile_expression("-ups.status < 0 or abs(ups.status) > 0")({"ups.status": "OL"}) is False
+    assert compile_expression("ups.temperature * 2 > 80")({"ups.temperature": "41"}) is True
+
+
+def test_overflowing_arithmetic_never_matches():
+    huge = "9" * 400
+    assert compile_expression(f"ups.temperature * {huge} > 1")({"ups.temperature": "41"}) is False
+    assert compile_expression("ups.temperature * 1e308 * 1e308 > 1")({"ups.temperature": "41"}) is False
+    assert compile_expression("ups.temperature * 1e300 > 1")({"ups.temperature": "41"}) is True
@@ -0,0 +1,201 @@
+import asyncio
+
+import pytest
+
+from powersnitch_app.bootstrap import ensure_bootstrap
+from powersnitch_app.core.monitor import MonitorService
+from powersnitch_app.db import Database
+from powersnitch_app.integrations.influx import InfluxTelemetryMirror
+from powersnitch_app.models import DeliveryResult
+from powersnitch_app.storage import Repository
+
+
+class HungNutClient:
+    async def discover(self):
+        return []
+
+    async def fetch_status(self, identifier):
+        await asyncio.sleep(60)
+
+    async def close(self):
+        return None
+
+
+class RecordingNotifier:
+    def __init__(self):
+        self.subjects = []
+
+    async def deliver(self, service_type, service_config, target, subject, body):
+        self.subjects.append(subject)
+        return DeliveryResult(service_type, "test", True)
+
+
+def test_hung_polls_time_out_concurrently_as_communication_lost(make_settings):
+    settings = make_settings()
+
+    async def scenario():
+        repository = Repository(Database(settings))
+        await ensure_bootstrap(settings)
+        await repository.create_service("webhook", "hook", {"url": "http://localhost"})
+        service = (await repository.list_services())[0]
+        await repository.create_channel("ops", service["id"], {}, "")
+        channel = (await repository.list_channels())[0]
+        for index in range(3):
+            device_id = await repository.upsert_device(f"ups{index}", f"UPS {index}", {})
+            await repository.set_device_enabled(device_id, True)
+            await repository.create_rule(device_id, "ups_communication_lost", channel["id"], 900, True)
+        notifier = RecordingNotifier()
+        monitor = MonitorService(
+            repository,
+            HungNutClient(),
+            notifier,
+            InfluxTelemetryMirror(settings),
+            max_concurrency=3,
+            poll_timeout_seconds=0.2,
+        )
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        await monitor.run_once()
+        elapsed = loop.time() - started
+        await monitor.shutdown()
+        return elapsed, notifier.subjects
+
+    elapsed, subjects = asyncio.run(scenario())
+    assert elapsed < 2
+    assert sorted(subjects) == [f"UPS {index}: ups communication lost active" for index in range(3)]
+
+
+class StaticNutClient:
+    def __init__(self, status):
+        self.status = status
+
+    async def discover(self):
+        return []
+
+    async def fetch_status(self, identifier):
+        return dict(self.status)
+
+    async def close(self):
+        return None
+
+
+def test_rule_engine_only_writes_conditions_on_transitions(make_settings):
+    settings = make_settings()
+
+    async def scenario():
+        repository = Repository(Database(settings))
+        await ensure_bootstrap(settings)
+        await repository.create_service("webhook", "hook", {"url": "http://localhost"})
+        service = (await repository.list_services())[0]
+        await repository.create_channel("ops", service["id"], {}, "")
+        await repository.create_channel("pager", service["id"], {}, "")
+        channels = await repository.list_channels()
+        device_id = await repository.upsert_device("ups", "Lab", {})
+        await repository.set_device_enabled(device_id, True)
+        for channel in channels:
+            await repository.create_rule(device_id, "on_battery", channel["id"], 900, True)
+        writes = []
+        original_write = repository.open_or_update_active_condition
+
+        async def counting_write(*args, **kwargs):
+            writes.append(args[1])
+            return await original_write(*args, **kwargs)
+
+        repository.open_or_update_active_condition = counting_write
+        nut = StaticNutClient({"ups.status": "OB", "battery.charge": "10"})
+        notifier = RecordingNotifier()
+        monitor = MonitorService(repository, nut, notifier, InfluxTelemetryMirror(settings))
+        await monitor.run_once()
+        await monitor.run_once()
+        steady_writes = list(writes)
+        await repository.create_rule(device_id, "battery_low_pct", channels[0]["id"], 900, True)
+        await monitor.run_once()
+        await monitor.outbox.join()
+        nut.status = {"ups.status": "OL", "battery.charge": "100"}
+        await monitor.run_once()
+        await monitor.shutdown()
+        return steady_writes, writes, notifier.subjects, await repository.list_active_conditions()
+
+    steady_writes, writes, subjects, active = asyncio.run(scenario())
+    assert steady_writes == ["on_battery"]
+    assert writes == ["on_battery", "battery_low_pct"]
+    assert subjects[:3] == ["Lab: on battery active", "Lab: on battery active", "Lab: battery low pct active"]
+    assert sorted(subjects[3:]) == [
+        "Lab: battery low pct recovered",
+        "Lab: on battery recovered",
+        "Lab: on battery recovered",
+    ]
+    assert active == []
+
+
+def test_custom_expression_rules_alert_on_raw_nut_variables(make_settings):
+    settings = make_settings()
+
+    async def scenario():
+        repository = Repository(Database(settings))
+        await ensure_bootstrap(settings)
+        await repository.create_service("webhook", "hook", {"url": "http://localhost"})
+        service = (await repository.list_services())[0]
+        await repository.create_channel("ops", service["id"], {}, "")
+        channel = (await repository.list_channels())[0]
+        device_id = await repository.upsert_device("ups", "Lab", {})
+        await repository.set_device_enabled(device_id, True)
+        try:
+            await repository.create_rule(device_id, "custom:hot", channel["id"], 900, True, expression="ups.temp >")
+        except ValueError as exc:
+            rejected = str(exc)
+        await repository.create_rule(device_id, "custom:hot", channel["id"], 900, True, expression="ups.temperature>40")
+        nut = StaticNutClient({"ups.status": "OL", "ups.temperature": "45"})
+        notifier = RecordingNotifier()
+        monitor = MonitorService(repository, nut, notifier, InfluxTelemetryMirror(settings))
+        await monitor.run_once()
+        active = await repository.list_active_conditions()
+        nut.status = {"ups.status": "OL", "ups.temperature": "35"}
+        await monitor.run_once()
+        await monitor.shutdown()
+        return rejected, (await repository.list_rules())[0], active, notifier.subjects
+
+    rejected, rule, active, subjects = asyncio.run(scenario())
+    assert rejected.startswith("Invalid expression")
+    assert rule["expression"] == "ups.temperature > 40"
+    assert [(row["condition_key"], row["last_reason"], row["last_value"]) for row in active] == [
+        ("custom:hot", "ups.temperature > 40 is true", '"ups.temperature=45"')
+    ]
+    assert subjects == ["Lab: hot active", "Lab: hot recovered"]
+
+
+def test_failed_rule_evaluation_rolls_back_queued_alerts(make_settings):
+    settings = make_settings()
+
+    async def scenario():
+        repository = Repository(Database(settings))
+        await ensure_bootstrap(settings)
+        await repository.create_service("webhook", "hook", {"url": "http://localhost"})
+        service = (await repository.list_services())[0]
+        await repository.create_channel("ops", service["id"], {}, "")
+        channel = (await repository.list_channels())[0]
+        device_id = await repository.upsert_device("ups", "Lab", {})
+        await repository.set_device_enabled(device_id, True)
+        await repository.create_rule(device_id, "on_battery", channel["id"], 900, True)
+        original_write = repository.open_or_update_active_condition
+
+        async def failing_write(*args, **kwargs):
+            raise RuntimeError("disk full")
+
+        repository.open_or_update_active_condition = failing_write
+        nut = StaticNutClient({"ups.status": "OB", "battery.charge": "90"})
+        notifier = RecordingNotifier()
+        monitor = MonitorService(repository, nut, notifier, InfluxTelemetryMirror(settings))
+        with pytest.raises(RuntimeError):
+            await monitor.run_once()
+        failed = await repository.notification_outbox_counts()
+        repository.open_or_update_active_condition = original_write
+        await monitor.run_once()
+        await monitor.outbox.join()
+        await monitor.shutdown()
+        return failed, notifier.subjects, await repository.list_active_conditions()
+
+    failed, subjects, active = asyncio.run(scenario())
+    assert not any(failed.values())
+    assert subjects == ["Lab: on battery active"]
+    assert [row["condition_key"] for row in active] == ["on_battery"]
@@ -1,6 +1,9 @@
+import asyncio
 from pathlib import Path
 
-from powersnitch_app.integrations.nut import parse_upsc, snapshot_from_status
+import pytest
+
+from powersnitch_app.integrations.nut import NutClient, UpsdClient, parse_upsc, snapshot_from_status
 
 
 def test_parse_upsc_fixture():
@@ -28,3 +31,104 @@ def test_snapshot_from_status_extracts_flags_and_metrics():
     assert snapshot.battery_charge == 14.0
     assert snapshot.runtime_seconds == 125.0
     assert snapshot.load_percent == 53.0
+
+
+def _fake_upsd_reply(command: str) -> str:
+    if command == "LIST UPS":
+        return 'BEGIN LIST UPS\nUPS lab "Lab \\"rack\\" UPS"\nEND LIST UPS\n'
+    if command == "LIST VAR lab":
+        return (
+            "BEGIN LIST VAR lab\n"
+            'VAR lab battery.charge "87"\n'
+            'VAR lab ups.status "OB DISCHRG"\n'
+            "END LIST VAR lab\n"
+        )
+    if command == "LIST VAR rack":
+        return 'BEGIN LIST VAR rack\nVAR rack ups.status "OL"\nEND LIST VAR rack\n'
+    if command == "GET VAR lab battery.charge":
+        return 'VAR lab battery.charge "87"\n'
+    return "ERR UNKNOWN-UPS\n"
+
+
+async def _handle_fake_upsd(reader, writer):
+    while line := await reader.readline():
+        writer.write(_fake_upsd_reply(line.decode().strip()).encode())
+        await writer.drain()
+    writer.close()
+
+
+def test_upsd_client_reuses_one_connection():
+    connections = 0
+
+    async def handle(reader, writer):
+        nonlocal connections
+        connections += 1
+        await _handle_fake_upsd(reader, writer)
+
+    async def scenario():
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        client = UpsdClient("127.0.0.1", port, timeout=2)
+        try:
+            assert await client.discover() == ["lab"]
+            status = await client.fetch_status("lab")
+            assert await client.get_var(f"lab@127.0.0.1:{port}", "battery.charge") == "87"
+            with pytest.raises(RuntimeError):
+                await client.fetch_status("missing")
+            assert await client.fetch_status("lab") == status
+        finally:
+            await client.close()
+            server.close()
+            await server.wait_closed()
+        return status
+
+    status = asyncio.run(scenario())
+    assert connections == 1
+    snapshot = snapshot_from_status("lab", status)
+    assert snapshot.status_flags == {"OB", "DISCHRG"}
+    assert snapshot.battery_charge == 87.0
+
+
+def test_upsd_client_pipelines_hosts_and_backs_off():
+    async def scenario():
+        first = await asyncio.start_server(_handle_fake_upsd, "127.0.0.1", 0)
+        second = await asyncio.start_server(_handle_fake_upsd, "127.0.0.1", 0)
+        first_port = first.sockets[0].getsockname()[1]
+        second_port = second.sockets[0].getsockname()[1]
+        client = UpsdClient("127.0.0.1", first_port, timeout=2, extra_hosts=[f"localhost:{second_port}"])
+        try:
+            identifiers = await client.discover()
+            statuses = await client.fetch_many([*identifiers, "rack", "missing"])
+            await client.close()
+            second.close()
+            await second.wait_closed()
+            remote = f"lab@localhost:{second_port}"
+            with pytest.raises(RuntimeError):
+                await client.fetch_status(remote)
+            with pytest.raises(RuntimeError, match="retrying"):
+                await client.fetch_status(remote)
+        finally:
+            await client.close()
+            first.close()
+            await first.wait_closed()
+        return identifiers, statuses, second_port
+
+    identifiers, statuses, second_port = asyncio.run(scenario())
+    assert identifiers == ["lab", f"lab@localhost:{second_port}"]
+    assert statuses["lab"]["battery.charge"] == "87"
+    assert statuses[f"lab@localhost:{second_port}"]["ups.status"] == "OB DISCHRG"
+    assert statuses["rack"] == {"ups.status": "OL"}
+    assert isinstance(statuses["missing"], RuntimeError)
+
+
+def test_nut_client_kills_hung_subprocess():
+    client = NutClient("true", "sleep 5", timeout=0.1)
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        with pytest.raises(asyncio.TimeoutError):
+            await client.fetch_status("lab")
+        return loop.time() - started
+
+    assert asyncio.run(scenario()) < 2
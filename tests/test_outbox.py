@@ -0,0 +1,76 @@
+import asyncio
+
+from powersnitch_app.bootstrap import ensure_bootstrap
+from powersnitch_app.core.outbox import AlertJob, AlertOutbox
+from powersnitch_app.db import Database
+from powersnitch_app.models import DeliveryResult
+from powersnitch_app.storage import Repository
+
+
+class FlakyNotifier:
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = []
+
+    async def deliver(self, service_type, service_config, target, subject, body):
+        self.calls.append((service_type, service_config.get("url"), subject))
+        if len(self.calls) <= self.failures:
+            return DeliveryResult(service_type, "test", False, 503, "unavailable")
+        return DeliveryResult(service_type, "test", True, 200)
+
+
+async def _channel(settings):
+    repository = Repository(Database(settings))
+    await ensure_bootstrap(settings)
+    await repository.create_service("webhook", "hook", {"url": "http://old"})
+    service = (await repository.list_services())[0]
+    await repository.create_channel("ops", service["id"], {}, "")
+    channel = (await repository.list_channels())[0]
+    return repository, channel["id"]
+
+
+def _job(channel_id, key):
+    return AlertJob(None, channel_id, key, "active", key, "body", {"subject": key})
+
+
+def test_failed_deliveries_back_off_then_go_dead(make_settings):
+    settings = make_settings()
+
+    async def scenario():
+        repository, channel_id = await _channel(settings)
+        notifier = FlakyNotifier(failures=10)
+        outbox = AlertOutbox(repository, notifier, workers=1, max_attempts=3, retry_base_seconds=0, idle_poll_seconds=0.05)
+        await outbox.enqueue(_job(channel_id, "on_battery"))
+        await outbox.join()
+        await outbox.shutdown()
+        return notifier.calls, await repository.notification_outbox_counts(), outbox, repository
+
+    calls, counts, outbox, repository = asyncio.run(scenario())
+    assert len(calls) == 3
+    assert counts == {"dead": 1}
+    assert outbox.retry_delay(1) == 0
+    assert AlertOutbox(repository, None, retry_base_seconds=30, retry_max_seconds=100).retry_delay(3) == 100
+    metrics = outbox.snapshot()
+    assert (metrics["failed"], metrics["retried"], metrics["dead"]) == (3, 2, 1)
+
+
+def test_pending_alerts_survive_restart(make_settings):
+    settings = make_settings()
+
+    async def scenario():
+        repository, channel_id = await _channel(settings)
+        for key in ("on_battery", "low_battery"):
+            await repository.enqueue_notification(None, channel_id, key, "active", key, "body", {})
+
+        restarted = Repository(Database(settings))
+        notifier = FlakyNotifier(failures=0)
+        outbox = AlertOutbox(restarted, notifier, workers=2, batch_size=1, idle_poll_seconds=0.05)
+        outbox.start()
+        await outbox.join()
+        await outbox.shutdown()
+        return notifier.calls, await restarted.notification_outbox_counts(), await restarted.list_recent_alerts()
+
+    calls, counts, history = asyncio.run(scenario())
+    assert sorted(calls) == [("webhook", "http://old", "low_battery"), ("webhook", "http://old", "on_battery")]
+    assert counts == {}
+    assert len(history) == 2
@@ -0,0 +1,98 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+
+from powersnitch_app.bootstrap import ensure_bootstrap
+from powersnitch_app.db import Database
+from powersnitch_app.integrations.nut import snapshot_from_status
+from powersnitch_app.partitions import partition_name, partitions_between
+from powersnitch_app.storage import Repository
+
+
+def _snapshot(observed_at, charge):
+    snapshot = snapshot_from_status("ups", {"ups.status": "OL", "battery.charge": str(charge)})
+    snapshot.observed_at = observed_at
+    return snapshot
+
+
+async def _tables(database):
+    async with database.engine.connect() as connection:
+        rows = await connection.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'telemetry_samples%' ORDER BY name"
+        )
+        return [name for (name,) in rows.all()]
+
+
+def test_partitions_between_selects_overlapping_months():
+    names = ["telemetry_samples_2026_01", "telemetry_samples_2026_02", "telemetry_samples_2026_03"]
+    start = datetime(2026, 1, 31, 23, tzinfo=UTC)
+    assert partitions_between(names, start, datetime(2026, 2, 1, tzinfo=UTC)) == names[:1]
+    assert partitions_between(names, start, datetime(2026, 2, 1, 0, 1)) == names[:2]
+    assert partitions_between(names, None, None) == names
+    assert partition_name(datetime(2026, 12, 31, 23, 59, tzinfo=UTC)) == "telemetry_samples_2026_12"
+
+
+def test_samples_are_written_to_monthly_tables_and_read_across_them(make_settings):
+    legacy_settings = make_settings(telemetry_partitioning="none")
+    settings = make_settings(telemetry_partitioning="monthly")
+    first = datetime(2026, 1, 31, 23, 58, tzinfo=UTC)
+
+    async def scenario():
+        legacy = Repository(Database(legacy_settings))
+        await ensure_bootstrap(legacy_settings)
+        device_id = await legacy.upsert_device("ups", "Lab", {})
+        await legacy.save_snapshot(device_id, _snapshot(first - timedelta(minutes=1), 40))
+        await legacy.db.dispose()
+
+        database = Database(settings)
+        repository = Repository(database)
+        await repository.save_snapshots(
+            [(device_id, _snapshot(first + timedelta(minutes=index), 50 + index)) for index in range(4)]
+        )
+        tables = await _tables(database)
+        series = await repository.telemetry_series(device_id, first - timedelta(hours=1), first + timedelta(hours=1))
+        recent = await repository.recent_samples_for_device(device_id, limit=3)
+        await database.dispose()
+        return tables, series, recent
+
+    tables, series, recent = asyncio.run(scenario())
+    assert tables == ["telemetry_samples", "telemetry_samples_2026_01", "telemetry_samples_2026_02"]
+    assert [sample["battery_charge"] for sample in series] == [40, 50, 51, 52, 53]
+    assert [sample["battery_charge"] for sample in recent] == [51, 52, 53]
+
+
+def test_expired_months_are_dropped_whole(make_settings):
+    settings = make_settings(telemetry_partitioning="monthly")
+    start = datetime(2026, 1, 30, tzinfo=UTC)
+
+    async def scenario():
+        database = Database(settings)
+        repository = Repository(database)
+        await ensure_bootstrap(settings)
+        device_id = await repository.upsert_device("ups", "Lab", {})
+        await repository.save_snapshots(
+            [(device_id, _snapshot(start + timedelta(days=index), 10 * index)) for index in range(4)]
+        )
+        pruned = await repository.prune_telemetry(None, datetime(2026, 2, 2, tzinfo=UTC), 1)
+        again = await repository.prune_telemetry(None, datetime(2026, 2, 2, tzinfo=UTC), 1)
+        payloads = await repository.prune_raw_payloads(10)
+        tables = await _tables(database)
+        series = await repository.telemetry_series(device_id, start, start + timedelta(days=10))
+        async with database.engine.connect() as connection:
+            remaining_payloads = await connection.scalar(text("SELECT COUNT(*) FROM raw_payloads"))
+        await database.dispose()
+        return pruned, again, payloads, tables, series, remaining_payloads
+
+    pruned, again, payloads, tables, series, remaining_payloads = asyncio.run(scenario())
+    assert (pruned, again, payloads) == (2, 0, 2)
+    assert tables == ["telemetry_samples", "telemetry_samples_2026_02"]
+    # February started before the cutoff but has not fully expired, so it is kept intact.
+    assert [sample["battery_charge"] for sample in series] == [20, 30]
+    assert remaining_payloads == 2
+
+
+def test_unknown_partitioning_mode_is_rejected(make_settings):
+    with pytest.raises(ValueError):
+        Repository(Database(make_settings(telemetry_partitioning="weekly")))
@@ -0,0 +1,129 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import event
+
+from powersnitch_app.bootstrap import ensure_bootstrap
+from powersnitch_app.db import Database
+from powersnitch_app.integrations.nut import snapshot_from_status
+from powersnitch_app.models import DeliveryResult
+from powersnitch_app.storage import Repository, utcnow
+
+
+# Tables that grow with uptime or are touched on every poll. Statements that
+# read them must go through an index and must not sort in a temp b-tree.
+HOT_TABLES = (
+    "telemetry_samples",
+    "telemetry_rollups",
+    "telemetry_blocks",
+    "alert_events",
+    "notification_outbox",
+    "active_conditions",
+    "alert_rules",
+)
+
+
+QUERIES = {
+    "recent_samples_for_device": lambda repo, ids: repo.recent_samples_for_device(ids["device"]),
+    "list_recent_alerts": lambda repo, ids: repo.list_recent_alerts(),
+    "list_alert_history_page": lambda repo, ids: repo.list_alert_history(
+        2, before=(utcnow() + timedelta(seconds=1), 10**9)
+    ),
+    "list_alert_history_device": lambda repo, ids: repo.list_alert_history(2, device_id=ids["device"]),
+    "list_alert_history_channel": lambda repo, ids: repo.list_alert_history(2, channel_id=ids["channel"]),
+    "list_alert_history_condition": lambda repo, ids: repo.list_alert_history(2, condition_key="on_battery"),
+    "list_alert_history_provider": lambda repo, ids: repo.list_alert_history(2, provider="webhook"),
+    "list_alert_history_failed": lambda repo, ids: repo.list_alert_history(2, success=False),
+    "dashboard_counts": lambda repo, ids: repo.dashboard_counts(),
+    "save_snapshot": lambda repo, ids: repo.save_snapshot(ids["device"], snapshot_from_status("ups", {})),
+    "get_rules_for_device": lambda repo, ids: repo.get_rules_for_device(ids["device"]),
+    "list_active_conditions": lambda repo, ids: repo.list_active_conditions(),
+    "list_active_conditions_for_device": lambda repo, ids: repo.list_active_conditions_for_device(ids["device"]),
+    "open_or_update_active_condition": lambda repo, ids: repo.open_or_update_active_condition(
+        ids["device"], "on_battery", "OB", "UPS status contains OB", mark_alerted=True
+    ),
+    "clear_active_condition": lambda repo, ids: repo.clear_active_condition(ids["device"], "on_battery"),
+    "due_notifications": lambda repo, ids: repo.due_notifications(10, exclude=[ids["outbox"] + 1]),
+    "rollup_telemetry": lambda repo, ids: repo.rollup_telemetry(60, None, utcnow() - timedelta(hours=1), utcnow()),
+    "rollup_telemetry_hourly": lambda repo, ids: repo.rollup_telemetry(3600, 60, utcnow() - timedelta(days=1), utcnow()),
+    "prune_telemetry": lambda repo, ids: repo.prune_telemetry(None, utcnow(), 10),
+    "prune_telemetry_rollups": lambda repo, ids: repo.prune_telemetry(60, utcnow(), 10),
+    "prune_raw_payloads": lambda repo, ids: repo.prune_raw_payloads(10),
+    "pack_telemetry_blocks": lambda repo, ids: repo.pack_telemetry_blocks(utcnow() + timedelta(days=1)),
+    "iter_samples": lambda repo, ids: _drain(repo.iter_samples(ids["device"], utcnow() - timedelta(days=1))),
+    "telemetry_series": lambda repo, ids: repo.telemetry_series(ids["device"], utcnow() - timedelta(days=1), utcnow()),
+    "telemetry_series_rollups": lambda repo, ids: repo.telemetry_series(
+        ids["device"], utcnow() - timedelta(days=1), utcnow(), 60
+    ),
+    "notification_outbox_counts": lambda repo, ids: repo.notification_outbox_counts(),
+    "record_notification_attempt": lambda repo, ids: repo.record_notification_attempt(
+        ids["outbox"], DeliveryResult("webhook", "test", False, 500), None
+    ),
+}
+
+
+async def _drain(samples):
+    return [sample async for sample in samples]
+
+
+async def _seed(repository):
+    await repository.create_service("webhook", "hook", {"url": "http://localhost"})
+    service = (await repository.list_services())[0]
+    await repository.create_channel("ops", service["id"], {}, "")
+    channel = (await repository.list_channels())[0]
+    device_id = await repository.upsert_device("ups", "Lab", {})
+    await repository.create_rule(device_id, "on_battery", channel["id"], 900, True)
+    for _ in range(3):
+        await repository.save_snapshot(device_id, snapshot_from_status("ups", {"ups.status": "OL"}))
+        await repository.log_alert_event(
+            device_id, channel["id"], "on_battery", "active", "webhook", "test", False, {}, 500, "down"
+        )
+    outbox_id = await repository.enqueue_notification(device_id, channel["id"], "on_battery", "active", "s", "b", {})
+    return {"device": device_id, "channel": channel["id"], "outbox": outbox_id}
+
+
+def _plan_problems(plan, statement):
+    problems = []
+    for detail in plan:
+        for table in HOT_TABLES:
+            if detail.startswith(f"SCAN {table}") and "INDEX" not in detail:
+                problems.append(detail)
+    if "USE TEMP B-TREE" in " ".join(plan) and any(table in statement for table in HOT_TABLES):
+        problems.extend(detail for detail in plan if "TEMP B-TREE" in detail)
+    return problems
+
+
+@pytest.mark.parametrize("name", sorted(QUERIES))
+def test_repository_queries_use_indexes(make_settings, name):
+    settings = make_settings()
+
+    async def scenario():
+        database = Database(settings)
+        repository = Repository(database)
+        await ensure_bootstrap(settings)
+        ids = await _seed(repository)
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+                statements.append((statement, parameters))
+
+        engines = (database.engine.sync_engine, database.read_engine.sync_engine)
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", capture)
+        await QUERIES[name](repository, ids)
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", capture)
+        plans = []
+        async with database.engine.connect() as connection:
+            for statement, parameters in statements:
+                rows = await connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+                plans.append((statement, [row[-1] for row in rows.all()]))
+        await database.dispose()
+        return plans
+
+    plans = asyncio.run(scenario())
+    assert plans
+    for statement, plan in plans:
+        assert not _plan_problems(plan, statement), f"{name}: {plan}\n{statement}"
@@ -0,0 +1,112 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+
+from powersnitch_app.bootstrap import ensure_bootstrap
+from powersnitch_app.core.rollups import HOUR, MINUTE, TelemetryMaintenance, choose_resolution
+from powersnitch_app.db import Database
+from powersnitch_app.integrations.nut import snapshot_from_status
+from powersnitch_app.storage import Repository
+
+
+def _snapshot(observed_at, charge):
+    snapshot = snapshot_from_status("ups", {"ups.status": "OL", "battery.charge": str(charge)})
+    snapshot.observed_at = observed_at
+    return snapshot
+
+
+def test_choose_resolution_prefers_coarsest_dense_enough_and_retained():
+    now = datetime(2026, 1, 31, tzinfo=UTC)
+    retention = {None: 7, MINUTE: 90, HOUR: 0}
+    assert choose_resolution(now - timedelta(hours=1), now, now, retention) is None
+    assert choose_resolution(now - timedelta(days=1), now, now, retention) == MINUTE
+    assert choose_resolution(now - timedelta(days=30), now, now, retention) == HOUR
+    # Raw samples are already gone for this range, even though it is short.
+    assert choose_resolution(now - timedelta(days=10), now - timedelta(days=9, hours=23), now, retention) == MINUTE
+
+
+def test_maintenance_rolls_up_then_prunes_in_batches(make_settings):
+    settings = make_settings()
+    now = datetime(2026, 3, 1, 12, 0, tzinfo=UTC)
+    start = now - timedelta(days=10)
+
+    async def scenario():
+        database = Database(settings)
+        repository = Repository(database)
+        await ensure_bootstrap(settings)
+        device_id = await repository.upsert_device("ups", "Lab", {})
+        # Four samples per minute for three hours, ten days ago.
+        batch = [
+            (device_id, _snapshot(start + timedelta(seconds=15 * index), 50 + index % 4))
+            for index in range(4 * 60 * 3)
+        ]
+        await repository.save_snapshots(batch)
+        maintenance = TelemetryMaintenance(repository, raw_retention_days=7, batch_size=100)
+        await maintenance.run_once(now)
+        minutes = await repository.telemetry_series(device_id, start, start + timedelta(hours=3), MINUTE)
+        hours = await repository.telemetry_series(device_id, start, start + timedelta(hours=3), HOUR)
+        raw = await repository.telemetry_series(device_id, start, now, None)
+        await database.dispose()
+        return maintenance, minutes, hours, raw
+
+    maintenance, minutes, hours, raw = asyncio.run(scenario())
+    assert len(minutes) == 180
+    assert minutes[0]["sample_count"] == 4
+    assert minutes[0]["battery_charge_min"] == 50
+    assert minutes[0]["battery_charge_max"] == 53
+    assert minutes[0]["battery_charge"] == 51.5
+    assert len(hours) == 3
+    assert all(item["sample_count"] == 240 and item["battery_charge"] == 51.5 for item in hours)
+    assert raw == []
+    assert maintenance.metrics.samples_pruned == 720
+    assert maintenance.metrics.payloads_pruned == 3
+
+
+def test_maintenance_keeps_raw_samples_not_yet_rolled_up(make_settings):
+    settings = make_settings()
+    now = datetime(2026, 3, 1, 12, 0, 30, tzinfo=UTC)
+
+    async def scenario():
+        database = Database(settings)
+        repository = Repository(database)
+        await ensure_bootstrap(settings)
+        device_id = await repository.upsert_device("ups", "Lab", {})
+        await repository.save_snapshots([(device_id, _snapshot(now - timedelta(seconds=30), 90))])
+        maintenance = TelemetryMaintenance(repository, raw_retention_days=0.0001)
+        await maintenance.run_once(now)
+        raw = await repository.telemetry_series(device_id, now - timedelta(hours=1), now, None)
+        await database.dispose()
+        return raw
+
+    assert len(asyncio.run(scenario())) == 1
+
+
+def test_deadband_rollups_hold_values_across_quiet_minutes(make_settings):
+    settings = make_settings()
+    start = datetime(2026, 3, 1, 12, 0, tzinfo=UTC)
+
+    async def scenario():
+        database = Database(settings)
+        repository = Repository(database)
+        await ensure_bootstrap(settings)
+        device_id = await repository.upsert_device("ups", "Lab", {})
+        await repository.update_device_settings(
+            device_id, "Lab", True, 15, 20, 300, deadband_enabled=True, deadband_heartbeat_seconds=300
+        )
+        # Polled every 15 s; only the first poll and the drop to 40% at 150 s were stored.
+        seconds = range(0, 300, 15)
+        polls = [(device_id, _snapshot(start + timedelta(seconds=second), 100 if second < 150 else 40)) for second in seconds]
+        await repository.save_snapshots(polls, store=[second in (0, 150) for second in seconds])
+        # Two windows, so the second has to carry the sample stored before it.
+        for window_start, window_end in ((0, 120), (120, 300)):
+            await repository.rollup_telemetry(
+                MINUTE, None, start + timedelta(seconds=window_start), start + timedelta(seconds=window_end)
+            )
+        minutes = await repository.telemetry_series(device_id, start, start + timedelta(minutes=5), MINUTE)
+        await database.dispose()
+        return minutes
+
+    minutes = asyncio.run(scenario())
+    assert [item["sample_count"] for item in minutes] == [4, 4, 4, 4, 4]
+    assert [item["battery_charge"] for item in minutes] == [100, 100, 70, 40, 40]
+    assert minutes[2]["battery_charge_min"] == 40
+    assert minutes[2]["battery_charge_max"] == 100
@@ -0,0 +1,31 @@
+from powersnitch_app.core.scheduler import PollScheduler
+
+
+def test_scheduler_orders_devices_by_their_own_interval():
+    scheduler = PollScheduler()
+    scheduler.sync({1: 10.0, 2: 30.0}, now=0.0)
+    assert sorted(scheduler.pop_due(0.0)) == [1, 2]
+    scheduler.complete(1, 0.5)
+    scheduler.complete(2, 0.5)
+    assert scheduler.pop_due(9.0) == []
+    assert scheduler.next_due_in(9.0) == 1.0
+    assert scheduler.pop_due(10.0) == [1]
+    scheduler.complete(1, 10.2)
+    assert scheduler.pop_due(20.0) == [1]
+    scheduler.complete(1, 20.1)
+    assert sorted(scheduler.pop_due(30.0)) == [1, 2]
+
+
+def test_scheduler_tracks_drift_and_missed_deadlines():
+    scheduler = PollScheduler()
+    scheduler.sync({1: 10.0}, now=0.0)
+    scheduler.pop_due(0.0)
+    scheduler.complete(1, 1.0)
+    assert scheduler.pop_due(12.0) == [1]
+    scheduler.complete(1, 35.0)
+    entry = scheduler.entries()[0]
+    assert entry.last_drift == 2.0
+    assert entry.missed == 2
+    assert entry.next_due == 40.0
+    scheduler.sync({}, now=36.0)
+    assert scheduler.pop_due(50.0) == []
@@ -0,0 +1,30 @@
+import asyncio
+import logging
+
+from powersnitch_app.core.tasks import cancel_and_wait
+
+
+def test_cancel_and_wait_cancels_once_and_lets_cleanup_finish(caplog):
+    events = []
+
+    async def stubborn():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            events.append("cancelled")
+            # Cleanup that a second cancel would cut short.
+            await asyncio.sleep(0.3)
+            events.append("cleaned up")
+
+    async def scenario():
+        task = asyncio.create_task(stubborn(), name="stubborn")
+        await asyncio.sleep(0)
+        with caplog.at_level(logging.WARNING, logger="powersnitch_app.core.tasks"):
+            await cancel_and_wait(task, timeout=0.1)
+        warned = [record.getMessage() for record in caplog.records]
+        await task
+        return warned
+
+    warned = asyncio.run(scenario())
+    assert events == ["cancelled", "cleaned up"]
+    assert warned == ["stubborn did not stop within 0.1 s of being cancelled"]
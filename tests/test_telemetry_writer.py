@@ -0,0 +1,131 @@
+import asyncio
+import json
+import sqlite3
+
+from powersnitch_app import storage
+from powersnitch_app.bootstrap import ensure_bootstrap
+from powersnitch_app.core.telemetry_writer import TelemetryWriter
+from powersnitch_app.db import Database
+from powersnitch_app.integrations.nut import snapshot_from_status
+from powersnitch_app.storage import Repository
+
+
+class CountingRepository:
+    def __init__(self):
+        self.batches = []
+        self.stored = 0
+
+    async def save_snapshots(self, snapshots, store=None):
+        await asyncio.sleep(0.01)
+        self.batches.append(len(snapshots))
+        self.stored += sum(store)
+
+
+def test_writer_groups_snapshots_and_bounds_its_buffer():
+    repository = CountingRepository()
+    writer = TelemetryWriter(repository, batch_size=4, flush_interval=0.05, max_pending=8)
+    snapshot = snapshot_from_status("ups", {"ups.status": "OL"})
+
+    async def scenario():
+        for _ in range(3):
+            await writer.submit(1, snapshot)
+        await asyncio.sleep(0.2)
+        for device_id in range(20):
+            await writer.submit(device_id, snapshot, store_sample=device_id % 2 == 0)
+            assert writer.pending <= 8
+        await writer.shutdown()
+        return writer.snapshot()
+
+    metrics = asyncio.run(scenario())
+    assert repository.batches[0] == 3
+    assert sum(repository.batches) == 23
+    assert max(repository.batches) == 4
+    assert metrics["written"] == repository.stored == 13
+    assert metrics["suppressed"] == 10
+    assert metrics["pending"] == 0
+    assert metrics["max_batch_size"] == 4
+
+
+def test_save_snapshots_writes_a_batch_and_updates_known_devices(make_settings):
+    settings = make_settings()
+
+    async def scenario():
+        repository = Repository(Database(settings))
+        await ensure_bootstrap(settings)
+        first = await repository.upsert_device("ups1", "One", {})
+        second = await repository.upsert_device("ups2", "Two", {})
+        older = snapshot_from_status("ups1", {"ups.status": "OB"})
+        newer = snapshot_from_status("ups1", {"ups.status": "OL"})
+        await repository.save_snapshots(
+            [(first, newer), (second, snapshot_from_status("ups2", {"ups.status": "OL"})), (first, older), (999, older)]
+        )
+        return (
+            await repository.recent_samples_for_device(first),
+            await repository.recent_samples_for_device(second),
+            await repository.get_device(first),
+        )
+
+    first_samples, second_samples, device = asyncio.run(scenario())
+    assert len(first_samples) == 2
+    assert len(second_samples) == 1
+    assert device["last_seen_at"] is not None
+
+
+def test_identical_raw_payloads_are_stored_once(make_settings):
+    settings = make_settings()
+    status = {"ups.status": "OL", "battery.charge": "100", "ups.model": "Smart-UPS 1500"}
+
+    async def scenario():
+        repository = Repository(Database(settings))
+        await ensure_bootstrap(settings)
+        device_id = await repository.upsert_device("ups", "Lab", {})
+        for _ in range(5):
+            await repository.save_snapshot(device_id, snapshot_from_status("ups", dict(status)))
+        reordered = dict(reversed(list(status.items())))
+        restarted = Repository(Database(settings))
+        await restarted.save_snapshots([(device_id, snapshot_from_status("ups", reordered))])
+        await restarted.save_snapshot(device_id, snapshot_from_status("ups", {**status, "ups.status": "OB"}))
+        return await restarted.get_device(device_id)
+
+    device = asyncio.run(scenario())
+    with sqlite3.connect(settings.sqlite_path) as connection:
+        assert connection.execute("SELECT COUNT(*) FROM raw_payloads").fetchone() == (2,)
+        assert connection.execute(
+            "SELECT COUNT(DISTINCT payload_id), COUNT(*), COUNT(raw_json) FROM telemetry_samples"
+        ).fetchone() == (2, 7, 0)
+    assert json.loads(device["last_snapshot_json"])["ups.status"] == "OB"
+
+
+def test_failed_flush_does_not_cache_rolled_back_payload_ids(make_settings, monkeypatch):
+    settings = make_settings()
+    online = {"ups.status": "OL", "battery.charge": "100"}
+    on_battery = {"ups.status": "OB", "battery.charge": "50"}
+
+    async def scenario():
+        repository = Repository(Database(settings))
+        await ensure_bootstrap(settings)
+        device_id = await repository.upsert_device("ups", "Lab", {})
+        real_sample_table = storage.sample_table
+
+        def failing_sample_table():
+            monkeypatch.setattr(storage, "sample_table", real_sample_table)
+            raise RuntimeError("disk full")
+
+        monkeypatch.setattr(storage, "sample_table", failing_sample_table)
+        try:
+            await repository.save_snapshot(device_id, snapshot_from_status("ups", online))
+        except RuntimeError:
+            pass
+        # SQLite hands the rolled back payload's rowid to the next new payload.
+        await repository.save_snapshot(device_id, snapshot_from_status("ups", on_battery))
+        await repository.save_snapshot(device_id, snapshot_from_status("ups", online))
+        return await repository.get_device(device_id)
+
+    device = asyncio.run(scenario())
+    with sqlite3.connect(settings.sqlite_path) as connection:
+        samples = connection.execute(
+            "SELECT s.status_flags, p.payload_json FROM telemetry_samples s"
+            " JOIN raw_payloads p ON p.id = s.payload_id ORDER BY s.id"
+        ).fetchall()
+    assert [(flags, json.loads(payload)["ups.status"]) for flags, payload in samples] == [("OB", "OB"), ("OL", "OL")]
+    assert json.loads(device["last_snapshot_json"])["ups.status"] == "OL"
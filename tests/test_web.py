@@ -2,19 +2,13 @@ from pathlib import Path
 
 from fastapi.testclient import TestClient
 
-from powersnitch_app.config import Settings
 from powersnitch_app.web.app import create_app
 
 
-def test_login_and_dashboard(tmp_path):
-    data_dir = tmp_path / "data"
-    settings = Settings(
-        data_dir=data_dir,
-        sqlite_path=data_dir / "powersnitch.db",
-        initial_password_file=data_dir / "initial_admin_password.txt",
+def test_login_and_dashboard(make_settings):
+    settings = make_settings(
         bind_host="127.0.0.1",
         port=8000,
-        session_secret="test-secret",
         startup_discovery=False,
         nut_list_command="true",
         nut_status_command="true",
@@ -33,3 +27,52 @@ def test_login_and_dashboard(tmp_path):
         dashboard = client.get("/dashboard")
         assert dashboard.status_code == 200
         assert "Dashboard" in dashboard.text
+        graphs = client.get("/graphs?range=7d")
+        assert graphs.status_code == 200
+        assert "1 minute averages" in graphs.text
+        export = client.get("/graphs/1/export.csv")
+        assert export.status_code == 200
+        assert export.text.splitlines()[0].startswith("observed_at,battery_charge")
+        history = client.get("/history?device=1&result=failed&provider=webhook&before=1769904060-5")
+        assert history.status_code == 200
+        assert "Alert History" in history.text
+        assert "No alert history yet." in history.text
+        assert client.get("/history?before=garbage&device=x").status_code == 200
+        for query in (
+            "before=99999999999999999999-1",
+            "before=1-99999999999999999999999",
+            "before=-5-1",
+            "device=99999999999999999999999",
+            "channel=99999999999999999999999",
+            "device=%C2%B2",
+        ):
+            assert client.get(f"/history?{query}").status_code == 200, query
+
+
+def test_history_filters_custom_rule_alerts(make_settings):
+    settings = make_settings(startup_discovery=False, nut_list_command="true", nut_status_command="true")
+    app = create_app(settings)
+
+    async def seed():
+        repository = app.state.repository
+        device_id = await repository.upsert_device("ups1", "Rack UPS", {})
+        await repository.create_service("webhook", "hook", {"url": "http://localhost"})
+        await repository.create_channel("ops", 1, {"url": "http://localhost"}, "")
+        await repository.create_rule(device_id, "custom:hot", 1, 300, False, "ups_temperature > 40")
+        for condition_key in ("custom:hot", "on_battery"):
+            await repository.log_alert_event(
+                device_id, 1, condition_key, "active", "webhook", "http://localhost", True, {}
+            )
+
+    with TestClient(app) as client:
+        client.portal.call(seed)
+        password = Path(settings.initial_password_file).read_text(encoding="utf-8").strip()
+        client.post("/login", data={"username": "admin", "password": password}, follow_redirects=False)
+        history = client.get("/history?condition=custom:hot")
+        assert history.status_code == 200
+        assert '<option value="custom:hot" selected>' in history.text
+        rows = history.text.split("<tbody>")[1]
+        assert "custom:hot" in rows
+        assert "on_battery" not in rows
+        # A key no rule uses any more still shows as the selected filter.
+        assert '<option value="custom:gone" selected>' in client.get("/history?condition=custom:gone").text